@@ -0,0 +1,124 @@
+"""Announcements of the hands: belote-rebelote, sequences and carrés.
+
+The announcements are found in the 8 cards of a hand once the deal is
+done, with table lookups and bit operations on its mask:
+
+- belote-rebelote, the king and the queen of the trump: 20 points
+- a sequence of 3 cards of a suit in the natural order (tierce): 20 points,
+  of 4 cards (cinquante): 50 points, of 5 cards or more (cent): 100 points
+- a carré, the 4 cards of a rank: 200 points for the jacks, 150 for the
+  nines, 100 for the aces, tens, kings and queens
+
+Only the team with the strongest sequence or carré scores its sequences
+and carrés, and none of them when both teams have the same strongest one.
+Belote-rebelote is always scored.
+"""
+from dataclasses import dataclass, field
+from typing import List, Optional, Sequence, Tuple
+
+from rules import SEQUENCE, Rank
+
+BELOTE_POINTS = 20
+# Points of the sequences, by number of cards
+SEQUENCE_POINTS = (0, 0, 0, 20, 50, 100, 100, 100, 100)
+# Points of the carrés, by position in SEQUENCE
+CARRE_POINTS: Tuple[int, ...] = tuple(
+    {Rank.JACK: 200, Rank.NINE: 150, Rank.SEVEN: 0, Rank.EIGHT: 0}.get(rank, 100)
+    for rank in SEQUENCE
+)
+# Positions of the ranks that score a carré, as a byte
+CARRE_RANKS = sum(1 << position for position, points in enumerate(CARRE_POINTS)
+                  if points)
+
+
+@dataclass(frozen=True)
+class Announcement:
+    points: int
+    cards: int
+    # Sequences only
+    suit: Optional[int] = None
+    # Order of the announcements, without the trump: the most points, then
+    # a carré over a sequence, then the highest card
+    strength: int = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        top = self.cards.bit_length() - 1
+        object.__setattr__(self, 'strength', self.points << 8
+                           | (self.suit is None) << 7 | top & 7)
+
+
+def _sequences(suit: int, byte: int) -> Tuple[Announcement, ...]:
+    """The sequences of 3 cards or more of a suit's byte."""
+    sequences = []
+    position = 0
+    while position < 8:
+        length = 0
+        while position + length < 8 and byte >> (position + length) & 1:
+            length += 1
+        if length >= 3:
+            cards = ((1 << length) - 1) << position
+            sequences.append(Announcement(SEQUENCE_POINTS[length],
+                                          cards << 8 * suit, suit))
+        position += length + 1
+    return tuple(sequences)
+
+
+# Sequences of every suit, indexed by suit and byte of the suit
+SEQUENCES: Tuple[Tuple[Tuple[Announcement, ...], ...], ...] = tuple(
+    tuple(_sequences(suit, byte) for byte in range(256))
+    for suit in range(4)
+)
+# Carrés, indexed by position in SEQUENCE
+CARRES: Tuple[Optional[Announcement], ...] = tuple(
+    Announcement(points, 0x01010101 << position) if points else None
+    for position, points in enumerate(CARRE_POINTS)
+)
+# King and queen of every trump
+BELOTE_MASKS: Tuple[int, ...] = tuple(
+    (1 << SEQUENCE.index(Rank.KING) | 1 << SEQUENCE.index(Rank.QUEEN))
+    << 8 * suit for suit in range(4)
+)
+
+
+def hand_announcements(hand: int) -> List[Announcement]:
+    """The sequences and carrés of hand."""
+    announcements = [*SEQUENCES[0][hand & 0xff],
+                     *SEQUENCES[1][hand >> 8 & 0xff],
+                     *SEQUENCES[2][hand >> 16 & 0xff],
+                     *SEQUENCES[3][hand >> 24 & 0xff]]
+    # The ranks held in the 4 suits
+    carres = hand & hand >> 8 & hand >> 16 & hand >> 24 & CARRE_RANKS
+    while carres:
+        position = (carres & -carres).bit_length() - 1
+        announcements.append(CARRES[position])
+        carres &= carres - 1
+    return announcements
+
+
+def has_belote(hand: int, trump: int) -> bool:
+    return hand & BELOTE_MASKS[trump] == BELOTE_MASKS[trump]
+
+
+def announcement_scores(hands: Sequence[int], trump: int) -> List[int]:
+    """Points of the announcements of both teams, from the hands of the 4
+    seats.
+
+    Between sequences of the same strength, a sequence of the trump wins.
+    """
+    points = [0, 0]
+    best = [0, 0]
+    for seat, hand in enumerate(hands):
+        team = seat & 1
+        for announcement in hand_announcements(hand):
+            points[team] += announcement.points
+            strength = announcement.strength << 1 | (announcement.suit == trump)
+            best[team] = max(best[team], strength)
+    if best[0] != best[1]:
+        loser = 0 if best[0] < best[1] else 1
+        points[loser] = 0
+    else:
+        points = [0, 0]
+    for seat, hand in enumerate(hands):
+        if has_belote(hand, trump):
+            points[seat & 1] += BELOTE_POINTS
+    return points
@@ -0,0 +1,110 @@
+"""Deals and hand features for millions of deals at once, with NumPy.
+
+A batch of decks is an array of card indexes of shape (nb_deals, 32), the top
+of every deck being the last column, as in engine. The cards are dealt with
+the same order as Player.deal_5_cards and Player.deal_remaining.
+"""
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
+
+import numpy as np
+
+from engine import deal_5_cards, deal_remaining
+from rules import (
+    CARDS,
+    NORMAL_VALUE,
+    SEQUENCE,
+    SUITS,
+    TRUMP_VALUE,
+    Rank,
+    mask_to_indexes,
+)
+
+# Column of the turned card, once the first 5 cards are dealt
+TURNED_POSITION = 11
+
+_BITS = np.left_shift(np.uint32(1), np.arange(len(CARDS), dtype=np.uint32))
+
+# Indexed by the byte of a suit in a hand mask
+_BYTE_COUNTS = np.array([bin(byte).count('1') for byte in range(256)], np.uint8)
+
+
+def _byte_points(values) -> np.ndarray:
+    points = [sum(values[rank] for i, rank in enumerate(SEQUENCE) if byte >> i & 1)
+              for byte in range(256)]
+    return np.array(points, np.uint16)
+
+
+_TRUMP_BYTE_POINTS = _byte_points(TRUMP_VALUE)
+_NORMAL_BYTE_POINTS = _byte_points(NORMAL_VALUE)
+_JACK = SEQUENCE.index(Rank.JACK)
+_NINE = SEQUENCE.index(Rank.NINE)
+
+
+def shuffled_decks(nb_deals: int, rng: Optional[np.random.Generator] = None,
+                   chunk_size: int = 1 << 16) -> np.ndarray:
+    """Shuffled decks, shape (nb_deals, 32).
+
+    Every deck is the order of 32 random floats, sorted by chunks to keep
+    the temporary arrays small.
+    """
+    rng = rng or np.random.default_rng()
+    decks = np.empty((nb_deals, len(CARDS)), np.uint8)
+    for start in range(0, nb_deals, chunk_size):
+        stop = min(nb_deals, start + chunk_size)
+        decks[start:stop] = rng.random((stop - start, len(CARDS))).argsort(axis=1)
+    return decks
+
+
+@lru_cache(maxsize=None)
+def deal_positions(dealer: int, taker: Optional[int] = None) -> np.ndarray:
+    """Columns of the cards of every seat, shape (4, 5) or (4, 8) with a taker.
+
+    Found by dealing a deck of column numbers with engine.
+    """
+    columns = list(range(len(CARDS)))
+    hands = [0, 0, 0, 0]
+    deal_5_cards(columns, hands, dealer)
+    if taker is not None:
+        deal_remaining(columns, hands, dealer, taker)
+    positions = np.array([mask_to_indexes(hand) for hand in hands], np.intp)
+    positions.flags.writeable = False
+    return positions
+
+
+def deal_hands(decks: np.ndarray, dealer: int = 0,
+               taker: Optional[int] = None) -> np.ndarray:
+    """Card indexes of every seat, shape (nb_deals, 4, 5) or (nb_deals, 4, 8)."""
+    return decks[:, deal_positions(dealer, taker)]
+
+
+def hand_masks(hands: np.ndarray) -> np.ndarray:
+    """Masks of hands of card indexes, reducing the last axis."""
+    return np.bitwise_or.reduce(_BITS[hands], axis=-1)
+
+
+@dataclass
+class HandFeatures:
+    """Arrays of the shape of the masks, with one more axis for the trump."""
+    trump_count: np.ndarray
+    points: np.ndarray
+    has_jack: np.ndarray
+    has_nine: np.ndarray
+
+
+def hand_features(masks: np.ndarray) -> HandFeatures:
+    """Features of hand masks for every candidate trump."""
+    # The byte of every suit, the first suit being the lowest byte
+    suit_bytes = np.ascontiguousarray(masks, '<u4').view(np.uint8).reshape(
+        masks.shape + (len(SUITS),))
+    normal_points = _NORMAL_BYTE_POINTS[suit_bytes]
+    # The points with a trump: the trump suit counts with the trump values
+    points = (normal_points.sum(axis=-1, dtype=np.uint16)[..., None]
+              - normal_points + _TRUMP_BYTE_POINTS[suit_bytes])
+    return HandFeatures(
+        trump_count=_BYTE_COUNTS[suit_bytes],
+        points=points,
+        has_jack=(suit_bytes >> _JACK & 1).view(bool),
+        has_nine=(suit_bytes >> _NINE & 1).view(bool),
+    )
@@ -1,160 +1,79 @@
+"""A game of Belote between 4 players, answering through their transport.
+
+The rules are in rules.py, and the server seating the connections at the
+tables in server.py.
+"""
 import asyncio
 import itertools
 import random
+import struct
+import time
 from dataclasses import dataclass, field
-from enum import Enum
-from typing import Dict, Generator, Iterable, List, Optional, Tuple
-
-
-class Rank(Enum):
-    ACE = 'A'
-    KING = 'K'
-    QUEEN = 'Q'
-    JACK = 'J'
-    TEN = '10'
-    NINE = '9'
-    EIGHT = '8'
-    SEVEN = '7'
-
-
-TRUMP_ORDER: Dict[Rank, int] = {
-    Rank.SEVEN: 0,
-    Rank.EIGHT: 1,
-    Rank.QUEEN: 2,
-    Rank.KING: 3,
-    Rank.TEN: 4,
-    Rank.ACE: 5,
-    Rank.NINE: 6,
-    Rank.JACK: 7,
-}
-NORMAL_ORDER: Dict[Rank, int] = {
-    Rank.SEVEN: 0,
-    Rank.EIGHT: 1,
-    Rank.NINE: 2,
-    Rank.JACK: 3,
-    Rank.QUEEN: 4,
-    Rank.KING: 5,
-    Rank.TEN: 6,
-    Rank.ACE: 7,
-}
-TRUMP_VALUE: Dict[Rank, int] = {
-    Rank.SEVEN: 0,
-    Rank.EIGHT: 0,
-    Rank.QUEEN: 3,
-    Rank.KING: 4,
-    Rank.TEN: 10,
-    Rank.ACE: 11,
-    Rank.NINE: 14,
-    Rank.JACK: 20,
-}
-NORMAL_VALUE: Dict[Rank, int] = {
-    Rank.SEVEN: 0,
-    Rank.EIGHT: 0,
-    Rank.NINE: 0,
-    Rank.JACK: 2,
-    Rank.QUEEN: 3,
-    Rank.KING: 4,
-    Rank.TEN: 10,
-    Rank.ACE: 11,
-}
-
-
-class Suit(Enum):
-    DIAMOND = '♦'
-    HEARTS = '♥'
-    SPADES = '♠'
-    CLUBS = '♣'
-
-
-@dataclass(frozen=True)
-class Card:
-    rank: Rank
-    suit: Suit
-
-    def get_value(self, trump: Suit) -> int:
-        if self.suit == trump:
-            return TRUMP_VALUE[self.rank]
-        else:
-            return NORMAL_VALUE[self.rank]
-
-    def get_rank(self, trump: Suit) -> int:
-        if self.suit == trump:
-            return TRUMP_ORDER[self.rank]
-        else:
-            return NORMAL_ORDER[self.rank]
-
-    @classmethod
-    def from_string(cls, s: str):
-        if len(s) < 2:
-            raise ValueError(f'{s} is not a valid card.')
-        try:
-            return cls(Rank(s[:-1]), Suit(s[-1]))
-        except ValueError:
-            raise ValueError(f'{s} is not a valid card.')
-
-    def __repr__(self) -> str:
-        cls_name = self.__class__.__name__
-        return f'<{cls_name}: {self.rank.value}{self.suit.value}>'
-
-
-class Deck:
-    def __init__(self):
-        self.cards: List[Card] = [
-            Card(rank, suit)
-            for rank, suit in itertools.product(Rank, Suit)
-        ]
-        # There should be 32 cards
-        assert len(self.cards) == 32
-        random.shuffle(self.cards)
-
-    def cut(self, index: int) -> None:
-        assert 0 <= index < len(self.cards)
-
-        first_chunk = self.cards[:index]
-        second_chunk = self.cards[index:]
-
-        # We should cut at least 3 cards
-        assert len(first_chunk) >= 3
-        assert len(second_chunk) >= 3
-
-        self.cards = second_chunk + first_chunk
-
-    def pop_many(self, nb_cards: int) -> List[Card]:
-        cards = [self.cards.pop() for _ in range(nb_cards)]
-
-        assert len(cards) == nb_cards
-        return cards
-
-    def peek(self) -> Card:
-        return self.cards[-1]
-
-    def __len__(self) -> int:
-        return len(self.cards)
-
-    def __repr__(self) -> str:
-        cls_name = self.__class__.__name__
-        return f'<{cls_name}: {repr(self.cards)}>'
+from typing import Callable, Dict, Generator, Iterable, List, Optional, Tuple
+
+import metrics
+from announcements import announcement_scores
+from deadlines import TimerWheel
+from gamelog import NO_VALUE, DealRecord, GameLog
+from knowledge import Knowledge
+from rules import (
+    ALL_CARDS_MASK,
+    CARD_VALUES,
+    CARDS,
+    NB_TRICKS,
+    SUIT_INDEX,
+    SUITS,
+    TRICK_STRENGTHS,
+    Card,
+    Deck,
+    Hand,
+    Suit,
+    cards_to_mask,
+    legal_moves_mask,
+    mask_to_cards,
+)
 
 
 @dataclass
 class Team:
+    # Points of the current deal, and of the match
     score: int = 0
     has_contract: bool = False
+    total: int = 0
 
 
 @dataclass
 class Trick:
     game: 'Belote'
     pile: List[Tuple['Player', Card]] = field(default_factory=list)
-
-    def pile_key_function(self, player_card: Tuple['Player', Card]) -> Tuple[int, int]:
-        _, card = player_card
-        if card.suit == self.game.trump:
-            return 2, card.get_rank(self.game.trump)
-        elif card.suit == self.dominant_suit:
-            return 1, card.get_rank(self.game.trump)
-        else:
-            return 0, card.get_rank(self.game.trump)
+    # Kept up to date by add()
+    winner: Optional[Tuple['Player', Card]] = field(default=None, init=False)
+    points: int = field(default=0, init=False)
+    trump: int = field(default=0, init=False, repr=False)
+    led_suit: int = field(default=0, init=False, repr=False)
+    strengths: Tuple[int, ...] = field(default=(), init=False, repr=False)
+
+    def add(self, player: 'Player', card: Card) -> None:
+        player_card = (player, card)
+        if not self.pile:
+            self.trump = SUIT_INDEX[self.game.trump]
+            self.led_suit = card.index >> 3
+            self.strengths = TRICK_STRENGTHS[self.trump][self.led_suit]
+            self.winner = player_card
+        elif self.beats(card):
+            self.winner = player_card
+        self.pile.append(player_card)
+        self.points += CARD_VALUES[self.trump][card.index]
+
+    def clear(self) -> None:
+        self.pile.clear()
+        self.winner = None
+        self.points = 0
+
+    def beats(self, card: Card) -> bool:
+        """Whether card would win the trick over the current winner."""
+        _, winning_card = self.winner
+        return self.strengths[card.index] > self.strengths[winning_card.index]
 
     @property
     def dominant_suit(self) -> Optional[Suit]:
@@ -166,22 +85,87 @@ class Trick:
 
     @property
     def winning_player_card(self) -> Tuple['Player', Card]:
-        return max(self.pile, key=self.pile_key_function)
+        return self.winner
 
     @property
     def total_score(self):
-        return sum((card.get_value(self.game.trump) for _, card in self.pile))
+        return self.points
+
+
+def encode(msg: str) -> bytes:
+    return (msg + '\n').encode()
+
+
+class Outbox:
+    """Coalesce the messages sent to every transport.
+
+    The messages are written with a single write per transport once the
+    current step of the loop is done, that is at the next await point of
+    the game.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop) -> None:
+        self.loop = loop
+        self.pending: Dict[asyncio.WriteTransport, List[bytes]] = {}
+        self.handle: Optional[asyncio.Handle] = None
+        self.nb_writes = 0
+
+    def write(self, transport: asyncio.WriteTransport, data: bytes) -> None:
+        chunks = self.pending.get(transport)
+        if chunks is not None:
+            chunks.append(data)
+            return
+        self.pending[transport] = [data]
+        if self.handle is None:
+            self.handle = self.loop.call_soon(self.flush)
+
+    def flush(self) -> None:
+        self.handle = None
+        pending, self.pending = self.pending, {}
+        for transport, chunks in pending.items():
+            if not transport.is_closing():
+                transport.write(chunks[0] if len(chunks) == 1
+                                else b''.join(chunks))
+                self.nb_writes += 1
+                metrics.WRITES.inc()
+
+
+# Put in the queue of a player when it has to stop waiting for an answer
+_NO_ANSWER = object()
+# Answers to the question of the card to play before playing the default card
+MAX_PLAY_ATTEMPTS = 3
 
 
 class Player:
-    def __init__(self, transport: asyncio.WriteTransport):
+    """A seat at a table.
+
+    With a timer wheel, a player who doesn't answer within timeout seconds
+    gets the default answer of the question. A disconnected player keeps the
+    seat for one more timeout to reconnect, then every question gets its
+    default answer right away.
+    """
+
+    def __init__(self, transport: Optional[asyncio.WriteTransport] = None,
+                 outbox: Optional[Outbox] = None,
+                 wheel: Optional[TimerWheel] = None, timeout: float = 30):
         self.previous: Player = None
         self.next: Player = None
-        self.hand: List[Card] = []
+        self.hand = Hand()
         self.team: Team = None
         self.number: int
         self.transport = transport
+        self.outbox = outbox
         self.queue = asyncio.Queue()
+        self.nb_messages = 0
+        self.nb_bytes = 0
+        self.wheel = wheel
+        self.timeout = timeout
+        self.disconnected = False
+        self.abandoned = False
+        # Given to the client to reconnect to the seat
+        self.token: Optional[str] = None
+        # Pending question, sent again on reconnection
+        self.question: Optional[str] = None
 
     def send_hand(self):
         self.send_message(f'Your hand is {self.hand}')
@@ -192,21 +176,86 @@ class Player:
 
     def send_message(self, msg: str):
         """Send a message to the player."""
-        msg += '\n'
-        self.transport.write(msg.encode())
-
-    async def recv_message(self):
-        """Get a message from the player."""
-        return await self.queue.get()
+        self.send_bytes(encode(msg))
+
+    def send_bytes(self, data: bytes):
+        """Send an encoded message, possibly shared with other players."""
+        if self.transport is None:
+            # Restored seat waiting for its client
+            return
+        self.nb_messages += 1
+        self.nb_bytes += len(data)
+        if self.outbox is None:
+            self.transport.write(data)
+        else:
+            self.outbox.write(self.transport, data)
+
+    async def recv_message(self, default: Optional[str] = None):
+        """Get a message from the player.
+
+        With a default, it is returned when the player has left or doesn't
+        answer in time.
+        """
+        if default is not None and self.abandoned:
+            return default
+        deadline = None
+        if default is not None and self.wheel is not None:
+            deadline = self.wheel.call_later(
+                self.timeout, self.queue.put_nowait, _NO_ANSWER)
+        try:
+            message = await self.queue.get()
+        finally:
+            # Also when the table is cancelled
+            if deadline is not None:
+                deadline.cancel()
+        if message is _NO_ANSWER:
+            if self.disconnected:
+                self.abandoned = True
+            metrics.DEFAULT_ANSWERS.inc()
+            return default
+        return message
+
+    async def ask(self, question: str, default: str) -> str:
+        """Send a question and return its answer, or default."""
+        # Drop the late answers to the previous questions
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.question = question
+        self.send_message(question)
+        try:
+            return await self.recv_message(default)
+        finally:
+            self.question = None
+
+    def disconnect(self) -> None:
+        """Keep the seat until the next timeout, or leave it at once."""
+        self.disconnected = True
+        if self.wheel is None:
+            # Nothing would end the wait for an answer
+            self.abandoned = True
+            self.queue.put_nowait(_NO_ANSWER)
+
+    def reconnect(self, transport: asyncio.WriteTransport) -> None:
+        self.transport = transport
+        self.disconnected = self.abandoned = False
 
     def plays(self, trick: Trick, card: Card):
-        trick.pile.append((self, card))
+        trick.add(self, card)
         self.hand.remove(card)
+        knowledge = trick.game.knowledge
+        if knowledge is not None:
+            knowledge.observe(self.number - 1, card.index)
+        data = encode(f'Player {self.number} is playing {card}')
         for player in self.iter_from_next():
-            player.send_message(f'Player {self.number} is playing {card}')
+            player.send_bytes(data)
 
     def add_to_hand(self, cards: Iterable[Card]) -> None:
-        self.hand.extend(cards)
+        for card in cards:
+            self.hand.add(card)
+
+    @property
+    def hand_mask(self) -> int:
+        return self.hand.mask
 
     def deal_5_cards(self, deck: Deck) -> None:
         # Deal 2 cards, then 3 cards, starting from the next player
@@ -238,47 +287,129 @@ class Player:
             player = player.next
 
     def legal_moves(self, trick: Trick) -> List[Card]:
-        if not trick.dominant_suit:
-            return self.hand
-        winning_player, winning_card = trick.winning_player_card
-        same_suit = [card for card in self.hand
-                     if card.suit == trick.dominant_suit]
-        if trick.dominant_suit == trick.game.trump:
-            if not same_suit:
-                return self.hand
-            if winning_player == self.team:
-                return same_suit
-            higher_trumps = [card for card in same_suit
-                             if card.get_rank(trick.game.trump) > winning_card.get_rank(trick.game.trump)]
-            return higher_trumps or same_suit
-
-        if same_suit:
-            return same_suit
-        trumps = [card for card in self.hand
-                  if card.suit == trick.game.trump]
-        if trumps:
-            if winning_player == self.team:
-                return trumps
-            higher_trumps = [card for card in same_suit
-                             if card.get_rank(trick.game.trump) > winning_card.get_rank(trick.game.trump)]
-            return higher_trumps or trumps
-        # At this point, you can play whatever you want.
-        return self.hand
+        return self.hand.cards(self.legal_moves_mask(trick))
+
+    def legal_moves_mask(self, trick: Trick) -> int:
+        if not trick.pile:
+            return self.hand.mask
+        winning_player, winning_card = trick.winner
+        return legal_moves_mask(
+            self.hand.mask,
+            trick.led_suit,
+            trick.trump,
+            winning_card.index,
+            winning_player.team is self.team,
+        )
 
     async def ask_to_play(self, trick: Trick):
         legal_moves = self.legal_moves(trick)
-        self.send_message(f'What are you playing? {legal_moves}')
-        # TODO: Handle errors
-        card = Card.from_string(await self.recv_message())
-        assert card in legal_moves
+        # By default, play the card with the lowest value, then rank
+        trump = SUIT_INDEX[trick.game.trump]
+        default = min(legal_moves, key=lambda card: (
+            CARD_VALUES[trump][card.index],
+            TRICK_STRENGTHS[trump][card.index >> 3][card.index]))
+        start = time.perf_counter()
+        # Ask again after an invalid or illegal card, then play the default
+        for _ in range(MAX_PLAY_ATTEMPTS):
+            answer = await self.ask(f'What are you playing? {legal_moves}',
+                                    default.to_string())
+            try:
+                card = Card.from_string(answer)
+            except ValueError as error:
+                self.send_message(str(error))
+                continue
+            if card in legal_moves:
+                break
+            self.send_message(f'{card} is not a legal move.')
+        else:
+            card = default
+        metrics.THINK_SECONDS.observe(time.perf_counter() - start)
         self.plays(trick, card)
 
 
+# The state of a deal being played: the hands, the trump, the taker, the
+# dealer, the leader of the current trick, the number of finished tricks,
+# the turned card, the cards of the current trick as seat << 5 | card index
+# padded with NO_VALUE, the scores of both teams in the deal and in the
+# match, and the target of the match, 0 for a single deal.
+SNAPSHOT = struct.Struct('<4I6B3s5H')
+
+
+@dataclass
+class Snapshot:
+    """State of a deal after its bidding, in SNAPSHOT.size bytes packed."""
+    hands: Tuple[int, ...]
+    trump: int
+    taker: int
+    dealer: int
+    leader: int
+    nb_tricks: int
+    turned: int
+    # (seat, card index) of the current trick
+    pile: List[Tuple[int, int]]
+    scores: Tuple[int, int]
+    totals: Tuple[int, int] = (0, 0)
+    target: int = 0
+
+    @property
+    def seat_to_play(self) -> int:
+        return (self.leader + len(self.pile)) & 3
+
+    def pack(self) -> bytes:
+        pile = bytes(seat << 5 | card for seat, card in self.pile)
+        return SNAPSHOT.pack(
+            *self.hands, self.trump, self.taker, self.dealer, self.leader,
+            self.nb_tricks, self.turned, pile.ljust(3, bytes([NO_VALUE])),
+            *self.scores, *self.totals, self.target)
+
+    @classmethod
+    def unpack(cls, data: bytes) -> 'Snapshot':
+        fields = SNAPSHOT.unpack(data)
+        return cls(
+            hands=fields[:4],
+            trump=fields[4],
+            taker=fields[5],
+            dealer=fields[6],
+            leader=fields[7],
+            nb_tricks=fields[8],
+            turned=fields[9],
+            pile=[(play >> 5, play & 0x1f) for play in fields[10]
+                  if play != NO_VALUE],
+            scores=fields[11:13],
+            totals=fields[13:15],
+            target=fields[15],
+        )
+
+
 class Belote:
-    def __init__(self) -> None:
+    """A table of 4 players.
+
+    start() plays a single deal, or a match to target points if target is
+    set. The deck, the players and the tricks are reused from deal to deal.
+    """
+
+    def __init__(self, log: Optional[GameLog] = None, target: int = 0) -> None:
         self.players: List[Player] = []
         self.deck = Deck()
+        self.log = log
+        self.target = target
         self.trump: Suit
+        self.dealer: Player = None
+        self.bidder: Player = None
+        self.card: Card = None
+        self.tricks: List[Trick] = []
+        # The tricks of the previous deals, reused by new_trick()
+        self.trick_pool: List[Trick] = []
+        self.nb_tricks = 0
+        # Points of the announcements of both teams in the deal
+        self.announcements = [0, 0]
+        # What the cards played tell of the hands, once the trump is chosen
+        self.knowledge: Optional[Knowledge] = None
+        # Leader of the current trick
+        self.leader: Player = None
+        # Called before every trick, to checkpoint the game
+        self.on_trick: Optional[Callable[['Belote'], None]] = None
+        self.table_id = 0
 
     def set_teams(self):
         self.teams = [Team(), Team()]
@@ -302,22 +433,87 @@ class Belote:
         player.set_number(self.players.index(player) + 1)
 
     def broadcast(self, msg):
+        data = encode(msg)
         for player in self.players:
-            player.send_message(msg)
+            player.send_bytes(data)
 
     async def start(self, dealer=None) -> None:
+        """Play a deal, then the next ones until the match is over if
+        self.target is set."""
         # Get a random dealer
         dealer = dealer or random.choice(self.players)
+        if await self.deal(dealer):
+            await self.play(dealer.next)
+        if self.target:
+            await self.play_match(dealer.next)
+
+    async def play_match(self, dealer: Player) -> None:
+        """Deal from dealer, then from every next player, until a team has
+        self.target points and more than the other."""
+        while not self.match_over:
+            self.gather()
+            if await self.deal(dealer):
+                await self.play(dealer.next)
+            dealer = dealer.next
+        winner = max(self.teams, key=lambda team: team.total)
+        numbers = ' and '.join(str(player.number) for player in self.players
+                               if player.team is winner)
+        self.broadcast(f'Players {numbers} won the match')
+
+    @property
+    def match_over(self) -> bool:
+        first, second = (team.total for team in self.teams)
+        return max(first, second) >= self.target and first != second
+
+    def gather(self) -> None:
+        """Put the cards of the last deal back in the deck, and cut it."""
+        cards = self.deck.cards
+        for trick in self.tricks:
+            cards.extend(card for _, card in trick.pile)
+        # The hands are not empty when everybody passed
+        for player in self.players:
+            cards.extend(player.hand)
+            player.hand.clear()
+            player.hand.set_trump(None)
+        # The cards of the finished tricks of a restored deal are unknown,
+        # and mask_to_cards() would put them back sorted
+        if len(cards) < len(CARDS):
+            missing = mask_to_cards(ALL_CARDS_MASK & ~cards_to_mask(cards))
+            random.shuffle(missing)
+            cards.extend(missing)
+        self.deck.cut(random.randint(3, len(cards) - 3))
+
+    def new_trick(self) -> Trick:
+        """The next trick of the deal, reusing the ones of the last deal."""
+        if len(self.tricks) == len(self.trick_pool):
+            self.trick_pool.append(Trick(self))
+        trick = self.trick_pool[len(self.tricks)]
+        trick.clear()
+        self.tricks.append(trick)
+        return trick
+
+    async def deal(self, dealer: Player) -> bool:
+        """Deal the cards and run the bidding, return whether someone
+        took."""
+        self.dealer = dealer
+        self.bidder = None
+        self.tricks.clear()
+        self.nb_tricks = 0
+        self.announcements[:] = (0, 0)
+        for team in self.teams:
+            team.score = 0
+            team.has_contract = False
+        self.deck_order = [card.index for card in self.deck.cards]
         self.broadcast(f'The dealer is Player {dealer.number}')
         dealer.deal_5_cards(self.deck)
 
-        card = self.deck.peek()
+        card = self.card = self.deck.peek()
         self.broadcast(f'The card is {card}')
         for player in self.players:
             player.send_hand()
+        bidding_start = time.perf_counter()
         for player in dealer.iter_from_next():
-            player.send_message('Do you want to take the card?')
-            answer = await player.recv_message()
+            answer = await player.ask('Do you want to take the card?', 'no')
             if answer == 'yes':
                 bidder = player
                 self.trump = card.suit
@@ -327,45 +523,194 @@ class Belote:
             choices = [suit.value for suit in Suit if suit != Suit(card.suit)]
             msg = f'What should be the trump?\nChoices: {" ".join(choices)}'
             for player in dealer.iter_from_next():
-                player.send_message(msg)
-                suit = await player.recv_message()
+                suit = await player.ask(msg, 'no')
                 if suit in choices:
                     bidder = player
                     self.trump = Suit(suit)
                     self.broadcast(f'Player {bidder.number} choosed {suit}')
                     break
             else:
-                # Current player needs to cut and we need to start a new game.
-                # We'll deal with that later
-                return
+                # The cards are gathered and cut for the next deal
+                metrics.BIDDING_SECONDS.observe(
+                    time.perf_counter() - bidding_start)
+                self.write_log()
+                return False
+        metrics.BIDDING_SECONDS.observe(time.perf_counter() - bidding_start)
+        self.bidder = bidder
+        trump = SUIT_INDEX[self.trump]
+        for player in self.players:
+            player.hand.set_trump(trump)
         bidder.team.has_contract = True
         dealer.deal_remaining(self.deck, bidder)
+        self.score_announcements(trump)
+        if self.knowledge is None:
+            self.knowledge = Knowledge(trump, bidder.number - 1, card.index)
+        else:
+            self.knowledge.reset(trump, bidder.number - 1, card.index)
         for player in self.players:
             player.send_hand()
-
-        nb_tricks = 8
-        winner = dealer.next
-        for _ in range(nb_tricks):
-            trick: Trick = Trick(self)
-            for player in winner.iter_from_self():
+        return True
+
+    def score_announcements(self, trump: int) -> None:
+        """Add the points of the announcements to the deal's scores."""
+        self.announcements[:] = announcement_scores(
+            [player.hand.mask for player in self.players], trump)
+        for team, numbers, points in zip(self.teams, ('1 and 3', '2 and 4'),
+                                         self.announcements):
+            if points:
+                team.score += points
+                self.broadcast(f'Players {numbers} announced {points} points')
+
+    async def play(self, leader: Player) -> None:
+        """Play the tricks left, the first one led by leader.
+
+        The last trick of self.tricks is played on if it is not finished.
+        """
+        winner = leader
+        while self.nb_tricks < NB_TRICKS:
+            self.leader = winner
+            if self.on_trick is not None:
+                self.on_trick(self)
+            if self.tricks and len(self.tricks[-1].pile) < 4:
+                trick = self.tricks[-1]
+            else:
+                trick = self.new_trick()
+            trick_start = time.perf_counter()
+            for player in itertools.islice(winner.iter_from_self(),
+                                           len(trick.pile), None):
                 await player.ask_to_play(trick)
 
             winner, winning_card = trick.winning_player_card
             winner.team.score += trick.total_score
+            self.nb_tricks += 1
+            metrics.TRICK_DURATION_SECONDS.observe(
+                time.perf_counter() - trick_start)
         # The winner of the last trick gets 10 points
         winner.team.score += 10
-        print(f'Bidding team: {self.bidding_team.score}')
-        print(f'Other team: {self.other_team.score}')
+        for team in self.teams:
+            team.total += team.score
+        self.write_log()
+        metrics.DEALS.inc()
         if self.bidding_team.score > self.other_team.score:
-            print('Bidding team won!')
+            result = 'Bidding team won!'
         else:
-            print('Other team won!')
-
-    def start_game_if_ready(self, loop):
+            result = 'Other team won!'
+            metrics.FAILED_CONTRACTS.inc()
+        first, second = self.teams
+        self.broadcast(f'Deal: Players 1 and 3 {first.score}, '
+                       f'Players 2 and 4 {second.score}. {result}')
+        if self.target:
+            self.broadcast(f'Match: Players 1 and 3 {first.total}, '
+                           f'Players 2 and 4 {second.total}')
+
+    def snapshot(self) -> Snapshot:
+        """State of the deal, once the trump is chosen."""
+        players = self.players
+        pile = []
+        if self.tricks and len(self.tricks[-1].pile) < 4:
+            pile = [(player.number - 1, card.index)
+                    for player, card in self.tricks[-1].pile]
+        return Snapshot(
+            hands=(players[0].hand.mask, players[1].hand.mask,
+                   players[2].hand.mask, players[3].hand.mask),
+            trump=SUIT_INDEX[self.trump],
+            taker=self.bidder.number - 1,
+            dealer=self.dealer.number - 1,
+            leader=self.leader.number - 1,
+            nb_tricks=self.nb_tricks,
+            turned=self.card.index,
+            pile=pile,
+            scores=(self.teams[0].score, self.teams[1].score),
+            totals=(self.teams[0].total, self.teams[1].total),
+            target=self.target,
+        )
+
+    def restore(self, snapshot: Snapshot) -> None:
+        """Put the 4 players of the game in the state of snapshot.
+
+        The deal goes on with resume(). It is not logged, since the cards of
+        the finished tricks are not in the snapshot.
+        """
+        players = self.players
+        initialize_double_linked_list(players)
+        self.set_teams()
+        self.log = None
+        self.trump = SUITS[snapshot.trump]
+        self.bidder = players[snapshot.taker]
+        self.bidder.team.has_contract = True
+        self.dealer = players[snapshot.dealer]
+        self.leader = players[snapshot.leader]
+        self.card = CARDS[snapshot.turned]
+        self.deck.cards = []
+        for player, mask in zip(players, snapshot.hands):
+            player.hand = Hand(mask_to_cards(mask))
+            player.hand.set_trump(snapshot.trump)
+        for team, score, total in zip(self.teams, snapshot.scores,
+                                      snapshot.totals):
+            team.score = score
+            team.total = total
+        self.target = snapshot.target
+        self.nb_tricks = snapshot.nb_tricks
+        self.tricks.clear()
+        # The voids shown by the finished tricks are lost
+        counts = [mask.bit_count() for mask in snapshot.hands]
+        in_hands = 0
+        for mask in snapshot.hands:
+            in_hands |= mask
+        for seat, card in snapshot.pile:
+            counts[seat] += 1
+            in_hands |= 1 << card
+        self.knowledge = Knowledge(snapshot.trump, snapshot.taker,
+                                   snapshot.turned, counts,
+                                   ALL_CARDS_MASK & ~in_hands)
+        if snapshot.pile:
+            trick = self.new_trick()
+            for seat, card in snapshot.pile:
+                trick.add(players[seat], CARDS[card])
+                self.knowledge.observe(seat, card)
+
+    async def resume(self) -> None:
+        await self.play(self.leader)
+        if self.target:
+            await self.play_match(self.dealer.next)
+
+    def send_state(self, player: Player) -> None:
+        """Tell a reconnected player where the deal is."""
+        player.send_message(f'You are the Player {player.number}')
+        if self.dealer is not None:
+            player.send_message(f'The dealer is Player {self.dealer.number}')
+            player.send_message(f'The card is {self.card}')
+        if self.bidder is not None:
+            player.send_message(f'The trump is {self.trump.value}')
+        if self.tricks and len(self.tricks[-1].pile) < 4:
+            for other, card in self.tricks[-1].pile:
+                player.send_message(f'Player {other.number} is playing {card}')
+        player.send_hand()
+        if player.question is not None:
+            player.send_message(player.question)
+
+    def deal_record(self) -> DealRecord:
+        seats = {player: seat for seat, player in enumerate(self.players)}
+        record = DealRecord(self.deck_order, seats[self.dealer])
+        if self.bidder is not None:
+            record.taker = seats[self.bidder]
+            record.trump = SUIT_INDEX[self.trump]
+            record.plays = [(seats[player], card.index)
+                            for trick in self.tricks
+                            for player, card in trick.pile]
+            record.scores = (self.teams[0].score, self.teams[1].score)
+        return record
+
+    def write_log(self) -> None:
+        if self.log is not None:
+            self.log.append(self.deal_record())
+
+    def start_game_if_ready(self, loop) -> Optional[asyncio.Task]:
         if len(self.players) == 4:
             initialize_double_linked_list(self.players)
             self.set_teams()
-            asyncio.ensure_future(self.start())
+            return loop.create_task(self.start())
+        return None
 
 
 def initialize_double_linked_list(players: List[Player]) -> None:
@@ -376,37 +721,3 @@ def initialize_double_linked_list(players: List[Player]) -> None:
         previous_player.next = player
         player.previous = previous_player
         previous_player = player
-
-
-class BeloteProtocol(asyncio.Protocol):
-    def __init__(self, game, loop):
-        super().__init__()
-        self.game = game
-        self.loop = loop
-
-    def connection_made(self, transport):
-        self.player = Player(transport)
-        self.game.add_player(self.player)
-        self.game.start_game_if_ready(self.loop)
-
-    def data_received(self, data):
-        self.player.queue.put_nowait(data.decode().strip())
-
-
-loop = asyncio.get_event_loop()
-loop.set_debug(True)
-belote = Belote()
-server = loop.run_until_complete(
-loop.create_server(lambda: BeloteProtocol(belote, loop), '127.0.0.1', 8888))
-
-# Serve requests until Ctrl+C is pressed
-print('Serving on {}'.format(server.sockets[0].getsockname()))
-try:
-    loop.run_forever()
-except KeyboardInterrupt:
-    pass
-
-# Close the server
-server.close()
-loop.run_until_complete(server.wait_closed())
-loop.close()
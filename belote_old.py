@@ -85,7 +85,7 @@ class Team:
     def __init__(self):
         self.score: int = 0
 
-    def add_points(self, pile: List[Player, Card], trump: Suit) -> None:
+    def add_points(self, pile: 'List[Tuple[Player, Card]]', trump: Suit) -> None:
         for _, card in pile:
             if card.suit == trump:
                 points = TRUMP_ORDER[card.rank]
@@ -140,7 +140,7 @@ class Player:
         self.hand: List[Card] = []
         self.team: Team = None
 
-    def add_points(self, pile: List[Player, Card], trump: Suit) -> None:
+    def add_points(self, pile: 'List[Tuple[Player, Card]]', trump: Suit) -> None:
         self.team.add_points(pile)
 
     def add_to_hand(self, cards: Iterable[Card]) -> None:
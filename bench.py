@@ -0,0 +1,306 @@
+"""Benchmarks of the imports, of the rules hot paths, of the double dummy
+solver, of full deals and of the server.
+
+Every result is printed as a JSON object per line. The random data comes
+from --seed, so the results of two commits can be compared:
+
+    python bench.py > before.jsonl
+    git checkout other-commit
+    python bench.py --compare before.jsonl
+
+The run fails when a library import is over its IMPORT_BUDGETS, or slower
+than before by more than IMPORT_REGRESSION.
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import subprocess
+import sys
+import time
+import timeit
+from typing import Callable, Dict, Iterator, List, Tuple
+
+import loadtest
+import perft
+from belote import Belote, Player, Trick, initialize_double_linked_list
+from rules import CARDS, SUITS, Card, Deck
+from server import BeloteProtocol, Lobby
+from solver import Solver
+
+CARD_RE = re.compile(rb'<Card: ([^>]+)>')
+# The library modules, imported in a fresh interpreter by the pool workers and
+# the tools on every start. The server is not included.
+LIBRARY_MODULES: Tuple[str, ...] = ('rules', 'engine', 'bots')
+# Seconds to import the library modules, in multiples of the start of a bare
+# interpreter, which slows down as much as the imports on a loaded machine
+IMPORT_BUDGETS: Dict[str, float] = {'rules': 5, 'engine': 6, 'bots': 8}
+# Slowdown of an import flagged by --compare
+IMPORT_REGRESSION = 0.2
+
+
+def ns_per_op(function: Callable, nb_ops: int = 1, number: int = 1000) -> float:
+    """Best time of 5 runs, per operation. function does nb_ops operations."""
+    times = timeit.Timer(function).repeat(5, number)
+    return min(times) / number / nb_ops * 1e9
+
+
+def result(name: str, value: float, unit: str) -> Dict:
+    return {'name': name, 'value': round(value, 3), 'unit': unit}
+
+
+def dealt_game(rng: random.Random) -> Belote:
+    """A game with 4 players holding 8 cards and a trump."""
+    random.seed(rng.random())
+    game = Belote()
+    game.players = [Player() for _ in range(4)]
+    initialize_double_linked_list(game.players)
+    game.set_teams()
+    dealer, taker = rng.choice(game.players), rng.choice(game.players)
+    dealer.deal_5_cards(game.deck)
+    dealer.deal_remaining(game.deck, taker)
+    game.trump = rng.choice(SUITS)
+    return game
+
+
+def tricks(rng: random.Random, nb_tricks: int) -> List[Tuple[Player, Trick]]:
+    """Tricks with 1 to 3 random legal cards, and the player to play."""
+    positions = []
+    for _ in range(nb_tricks):
+        game = dealt_game(rng)
+        trick = Trick(game)
+        player = rng.choice(game.players)
+        for _ in range(rng.randint(1, 3)):
+            trick.add(player, rng.choice(player.legal_moves(trick)))
+            player = player.next
+        positions.append((player, trick))
+    return positions
+
+
+def bench_rules(seed: int) -> Iterator[Dict]:
+    rng = random.Random(seed)
+    strings = [f'{card.rank.value}{card.suit.value}' for card in CARDS]
+    yield result('Card.from_string',
+                 ns_per_op(lambda: [Card.from_string(s) for s in strings],
+                           len(strings), 100), 'ns/op')
+
+    random.seed(seed)
+    yield result('Deck()', ns_per_op(Deck, number=2000), 'ns/op')
+
+    deck = Deck()
+    cards = list(deck.cards)
+
+    def pop_many():
+        deck.cards[:] = cards
+        for _ in range(10):
+            deck.pop_many(3)
+    yield result('Deck.pop_many(3)', ns_per_op(pop_many, 10, 2000), 'ns/op')
+
+    positions = tricks(rng, 200)
+    trick_list = [trick for _, trick in positions]
+    yield result(
+        'Player.legal_moves',
+        ns_per_op(lambda: [p.legal_moves(t) for p, t in positions],
+                  len(positions), 50), 'ns/op')
+    yield result(
+        'Player.legal_moves_mask',
+        ns_per_op(lambda: [p.legal_moves_mask(t) for p, t in positions],
+                  len(positions), 50), 'ns/op')
+    yield result(
+        'Trick.winning_player_card',
+        ns_per_op(lambda: [t.winning_player_card for t in trick_list],
+                  len(trick_list), 200), 'ns/op')
+    yield result(
+        'Trick.total_score',
+        ns_per_op(lambda: [t.total_score for t in trick_list],
+                  len(trick_list), 200), 'ns/op')
+
+    position = perft.random_position(rng)
+    nb_sequences = perft.perft(position, 4)
+    yield result('perft(4)',
+                 ns_per_op(lambda: perft.perft(position, 4), nb_sequences, 1),
+                 'ns/op')
+
+
+def bench_solver(seed: int, nb_deals: int = 20) -> Iterator[Dict]:
+    """Solve random deals from their first trick, as test_solver.py does."""
+    durations = []
+    for deal in range(nb_deals):
+        rng = random.Random(seed + deal)
+        cards = rng.sample(range(32), 32)
+        hands = [sum(1 << card for card in cards[i::4]) for i in range(4)]
+        solver = Solver(hands, trump=rng.randrange(4))
+        start = time.process_time()
+        solver.solve(0)
+        durations.append(time.process_time() - start)
+    yield result('Solver.solve', sum(durations) / nb_deals, 's')
+    yield result('Solver.solve_max', max(durations), 's')
+
+
+class ScriptedTransport:
+    """Answers the prompts of its player: takes and plays the first card."""
+
+    def __init__(self) -> None:
+        self.player: Player = None
+
+    def is_closing(self) -> bool:
+        return False
+
+    def write(self, data: bytes) -> None:
+        for line in data.split(b'\n'):
+            if line.startswith(b'Do you want to take the card?'):
+                self.player.queue.put_nowait('yes')
+            elif line.startswith(b'What are you playing?'):
+                card = CARD_RE.search(line).group(1).decode()
+                self.player.queue.put_nowait(card)
+
+
+async def play_scripted_deals(nb_deals: int) -> None:
+    loop = asyncio.get_running_loop()
+    for _ in range(nb_deals):
+        game = Belote()
+        for _ in range(4):
+            transport = ScriptedTransport()
+            transport.player = Player(transport)
+            game.add_player(transport.player)
+        await game.start_game_if_ready(loop)
+
+
+def bench_deals(seed: int, nb_deals: int) -> Iterator[Dict]:
+    random.seed(seed)
+    start = time.perf_counter()
+    asyncio.run(play_scripted_deals(nb_deals))
+    duration = time.perf_counter() - start
+    yield result('Belote.start', nb_deals / duration, 'deals/s')
+
+
+async def play_server(nb_tables: int, duration: float) -> Tuple[List[float], int]:
+    loop = asyncio.get_running_loop()
+    lobby = Lobby(loop)
+    server = await loop.create_server(lambda: BeloteProtocol(lobby),
+                                      '127.0.0.1', 0)
+    port = server.sockets[0].getsockname()[1]
+    clients = await loadtest.connect(loop, '127.0.0.1', port, 4 * nb_tables,
+                                     play=True)
+    await asyncio.sleep(duration)
+    for client in clients:
+        client.transport.close()
+    server.close()
+    await server.wait_closed()
+    # Players still connected go back to the lobby when their table stops
+    while lobby.tables:
+        for task in list(lobby.tables):
+            task.cancel()
+        await asyncio.sleep(0.01)
+    latencies = [latency for client in clients
+                 for latency in client.move_latencies]
+    return latencies, lobby.nb_finished_tables
+
+
+def bench_server(seed: int, nb_tables: int, duration: float) -> Iterator[Dict]:
+    random.seed(seed)
+    latencies, nb_finished = asyncio.run(play_server(nb_tables, duration))
+    yield result('server.tables', nb_finished / duration, 'tables/s')
+    for p in (50, 99):
+        yield result(f'server.move_latency_p{p}',
+                     1000 * loadtest.percentile(latencies, p), 'ms')
+
+
+def import_seconds(module: str, number: int = 5) -> float:
+    """Best time of number imports of module, each in a new interpreter."""
+    code = ('import time; start = time.perf_counter(); '
+            f'import {module}; print(time.perf_counter() - start)')
+    return min(float(subprocess.run(
+        [sys.executable, '-c', code], capture_output=True, text=True,
+        check=True).stdout) for _ in range(number))
+
+
+def startup_seconds(number: int = 5) -> float:
+    """Best time of number starts of a bare interpreter."""
+    times = []
+    for _ in range(number):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', 'pass'], check=True)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def bench_imports() -> Iterator[Dict]:
+    yield result('import.python', 1000 * startup_seconds(), 'ms')
+    for module in (*LIBRARY_MODULES, 'server'):
+        yield result(f'import.{module}', 1000 * import_seconds(module), 'ms')
+
+
+def over_budget(results: List[Dict]) -> List[str]:
+    """The imports slower than their IMPORT_BUDGETS."""
+    times = {r['name']: r['value'] for r in results
+             if r['name'].startswith('import.')}
+    return [f'import.{module}' for module, budget in IMPORT_BUDGETS.items()
+            if times[f'import.{module}'] > budget * times['import.python']]
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+            text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def compare(results: List[Dict], path: str) -> List[str]:
+    """Print the changes, and return the imports slower by more than
+    IMPORT_REGRESSION."""
+    with open(path) as f:
+        before = {r['name']: r for r in map(json.loads, f)}
+    regressions = []
+    print(f'{"benchmark":32} {"before":>12} {"after":>12} {"change":>8}')
+    for r in results:
+        old = before.get(r['name'])
+        if old is None or not old['value']:
+            continue
+        change = r['value'] / old['value'] - 1
+        flag = ''
+        if r['name'].startswith('import.') and change > IMPORT_REGRESSION:
+            regressions.append(r['name'])
+            flag = ' REGRESSION'
+        print(f'{r["name"]:32} {old["value"]:12.3f} {r["value"]:12.3f} '
+              f'{100 * change:+7.1f}% {r["unit"]}{flag}')
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--deals', type=int, default=2000)
+    parser.add_argument('--tables', type=int, default=100)
+    parser.add_argument('--duration', type=float, default=5)
+    parser.add_argument('--skip-server', action='store_true')
+    parser.add_argument('--compare', metavar='FILE',
+                        help='Compare with the results of a previous run')
+    args = parser.parse_args()
+
+    revision = git_revision()
+    benchmarks = [bench_imports(), bench_rules(args.seed),
+                  bench_solver(args.seed),
+                  bench_deals(args.seed, args.deals)]
+    if not args.skip_server:
+        benchmarks.append(bench_server(args.seed, args.tables, args.duration))
+    results = []
+    for benchmark in benchmarks:
+        for r in benchmark:
+            r['revision'] = revision
+            results.append(r)
+            if not args.compare:
+                print(json.dumps(r, ensure_ascii=False), flush=True)
+    regressions = compare(results, args.compare) if args.compare else []
+    failures = over_budget(results)
+    for name in failures:
+        print(f'{name} is over its budget', file=sys.stderr)
+    if regressions or failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+"""Throughput of the batch deals, against Deck and Player.deal_5_cards.
+
+    python bench_batch.py --deals 1000000
+"""
+import argparse
+import time
+
+from batch import deal_hands, hand_features, hand_masks, shuffled_decks
+from belote import Player, initialize_double_linked_list
+from rules import Deck
+
+
+def bench_players(nb_deals: int) -> float:
+    players = [Player() for _ in range(4)]
+    initialize_double_linked_list(players)
+    start = time.perf_counter()
+    for _ in range(nb_deals):
+        for player in players:
+            player.hand.clear()
+        deck = Deck()
+        players[0].deal_5_cards(deck)
+        players[0].deal_remaining(deck, players[1])
+    return time.perf_counter() - start
+
+
+def bench_batch(nb_deals: int) -> float:
+    start = time.perf_counter()
+    decks = shuffled_decks(nb_deals)
+    hand_features(hand_masks(deal_hands(decks, dealer=0, taker=1)))
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--deals', type=int, default=1000000)
+    args = parser.parse_args()
+
+    nb_deals = max(1, args.deals // 100)
+    duration = bench_players(nb_deals)
+    print(f'players: {4 * nb_deals / duration:14,.0f} hands/s')
+    duration = bench_batch(args.deals)
+    print(f'batch:   {4 * args.deals / duration:14,.0f} hands/s '
+          '(with the features)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""Decision quality of the Monte Carlo bots, by number of samples and workers.
+
+The positions have 4 tricks left and the bot leads. Every lead is scored by
+the double dummy solver, the regret of a decision being the points lost
+against the best lead knowing all the cards:
+
+    python bench_bots.py --positions 100 --samples 10 50 200 --workers 1 2 4
+"""
+import argparse
+import concurrent.futures
+import random
+import time
+from typing import List, Tuple
+
+from bots import CardProblem, MonteCarlo, best, evaluate_cards
+from rules import ALL_CARDS_MASK, mask_to_indexes
+from solver import Solver
+
+
+def positions(nb_positions: int, seed: int) -> List[Tuple[CardProblem, dict]]:
+    """Problems for the seat 0 and the solver's value of every lead."""
+    rng = random.Random(seed)
+    result = []
+    for _ in range(nb_positions):
+        cards = rng.sample(range(32), 32)
+        hands = [sum(1 << card for card in cards[i:16:4]) for i in range(4)]
+        trump = rng.randrange(4)
+        problem = CardProblem(
+            seat=0,
+            hand=hands[0],
+            trump=trump,
+            leader=0,
+            trick=[],
+            played=ALL_CARDS_MASK & ~(hands[0] | hands[1] | hands[2] | hands[3]),
+            counts=[4, 4, 4, 4],
+            scores=[0, 0],
+            # The turned card is already played
+            taker=0,
+            turned=cards[16],
+        )
+        result.append((problem, Solver(hands, trump).lead_values(0)))
+    return result
+
+
+def run(monte_carlo: MonteCarlo, problems) -> Tuple[float, float]:
+    """Return the average regret and the time per decision."""
+    regret = 0
+    start = time.perf_counter()
+    for problem, values in problems:
+        cards = mask_to_indexes(problem.hand)
+        card, _ = best(cards, monte_carlo.evaluate(evaluate_cards, problem, cards))
+        regret += max(values.values()) - values[card]
+    return regret / len(problems), (time.perf_counter() - start) / len(problems)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--positions', type=int, default=100)
+    parser.add_argument('--samples', type=int, nargs='+', default=[10, 50, 200])
+    parser.add_argument('--workers', type=int, nargs='+', default=[1])
+    parser.add_argument('--budget', type=float, help='Seconds per decision')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    problems = positions(args.positions, args.seed)
+    print('workers  samples  regret  ms_per_decision')
+    for nb_workers in args.workers:
+        with concurrent.futures.ProcessPoolExecutor(nb_workers) as pool:
+            for nb_samples in args.samples:
+                monte_carlo = MonteCarlo(
+                    nb_samples, pool, args.budget,
+                    chunk_size=max(1, nb_samples // nb_workers),
+                    seed=args.seed)
+                regret, duration = run(monte_carlo, problems)
+                print(f'{nb_workers:7d} {nb_samples:8d} {regret:7.2f} '
+                      f'{1000 * duration:16.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""Benchmark of the sharded server, from 1 to N workers.
+
+For every number of workers, it starts the workers and as many client
+processes, each one playing --tables tables with the loadtest clients, and
+prints the number of tables finished per second:
+
+    python bench_shards.py --workers 4 --tables 50 --duration 10
+"""
+import argparse
+import asyncio
+import contextlib
+import multiprocessing
+import os
+import socket
+import sys
+import time
+
+import loadtest
+from server import serve
+from shards import stop_workers
+
+
+def free_port(host: str) -> int:
+    with socket.socket() as sock:
+        sock.bind((host, 0))
+        return sock.getsockname()[1]
+
+
+def quiet_serve(host: str, port: int) -> None:
+    sys.stdout = sys.stderr = open(os.devnull, 'w')
+    serve(host, port, reuse_port=True, debug=False)
+
+
+def wait_for_server(host: str, port: int, timeout: float = 10) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            socket.create_connection((host, port)).close()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.05)
+
+
+async def play(host: str, port: int, nb_tables: int, duration: float) -> int:
+    loop = asyncio.get_event_loop()
+    clients = await loadtest.connect(loop, host, port, 4 * nb_tables, play=True)
+    await asyncio.sleep(duration)
+    for client in clients:
+        client.transport.close()
+    # Every client is seated once more than the number of games it finished
+    return sum(client.nb_seated - 1 for client in clients) // 4
+
+
+def client_process(host, port, nb_tables, duration, results) -> None:
+    with contextlib.redirect_stderr(open(os.devnull, 'w')):
+        results.put(asyncio.run(play(host, port, nb_tables, duration)))
+
+
+def run(host: str, nb_workers: int, nb_tables: int, duration: float) -> float:
+    port = free_port(host)
+    workers = [
+        multiprocessing.Process(target=quiet_serve, args=(host, port),
+                                daemon=True)
+        for _ in range(nb_workers)
+    ]
+    for worker in workers:
+        worker.start()
+    try:
+        wait_for_server(host, port)
+        results = multiprocessing.Queue()
+        clients = [
+            multiprocessing.Process(
+                target=client_process,
+                args=(host, port, nb_tables, duration, results))
+            for _ in range(nb_workers)
+        ]
+        for client in clients:
+            client.start()
+        finished = sum(results.get() for _ in clients)
+        for client in clients:
+            client.join()
+    finally:
+        stop_workers(workers)
+    return finished / duration
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--tables', type=int, default=50,
+                        help='Tables per client process')
+    parser.add_argument('--duration', type=float, default=10)
+    args = parser.parse_args()
+
+    print('workers  tables  tables_per_s  speedup')
+    base = None
+    for nb_workers in range(1, args.workers + 1):
+        rate = run(args.host, nb_workers, args.tables, args.duration)
+        base = base or rate
+        print(f'{nb_workers:7d} {nb_workers * args.tables:7d} '
+              f'{rate:13.1f} {rate / base:8.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,346 @@
+"""Monte Carlo bots.
+
+A decision is evaluated on deals sampled for the cards the bot can't see:
+every candidate action is played out on every sampled deal with a simple
+greedy policy, and the action with the best average for the bot's team is
+chosen. The samples are evaluated in chunks on a process pool, within a time
+budget per decision.
+"""
+import concurrent.futures
+import functools
+import random
+import time
+from dataclasses import dataclass
+from typing import Callable, Iterator, List, Optional, Sequence, Tuple
+
+from announcements import announcement_scores
+from engine import LAST_TRICK_BONUS, DealState, Strategy
+from equity import EquityTable
+from knowledge import sample_deal
+from rules import (
+    ALL_CARDS_MASK,
+    CARD_VALUES,
+    TRICK_STRENGTHS,
+    legal_moves_mask,
+    mask_to_indexes,
+)
+
+# The taker's team has to score more than half of the 162 points
+TAKE_THRESHOLD = 81
+
+
+@dataclass
+class BidProblem:
+    """Whether to take, seen from seat, which holds 5 cards."""
+    seat: int
+    hand: int
+    dealer: int
+    turned: int
+
+
+@dataclass
+class CardProblem:
+    """Which card to play, seen from seat."""
+    seat: int
+    hand: int
+    trump: int
+    leader: int
+    # (seat, card) of the current trick
+    trick: List[Tuple[int, int]]
+    # Cards already played, including the current trick
+    played: int
+    # Number of cards in every hand
+    counts: List[int]
+    scores: List[int]
+    taker: int
+    turned: int
+    # Cards every seat may hold, from Knowledge.possible
+    possible: Optional[List[int]] = None
+
+
+def sample_hands(rng: random.Random, seat: int, hand: int, unseen: int,
+                 counts: Sequence[int], holder: Optional[int] = None,
+                 card: Optional[int] = None) -> List[int]:
+    """Deal the unseen cards to the other seats, counts[i] cards to seat i.
+
+    If card is unseen, it goes to holder.
+    """
+    cards = mask_to_indexes(unseen)
+    rng.shuffle(cards)
+    hands = [0, 0, 0, 0]
+    hands[seat] = hand
+    missing = list(counts)
+    if card is not None and unseen >> card & 1:
+        cards.remove(card)
+        hands[holder] |= 1 << card
+        missing[holder] -= 1
+    start = 0
+    for other in range(4):
+        if other != seat:
+            for c in cards[start:start + missing[other]]:
+                hands[other] |= 1 << c
+            start += missing[other]
+    return hands
+
+
+def greedy_card(legal: int, position: int, trump: int, strengths,
+                winning_card: int, partner_is_winning: bool) -> int:
+    """Playout policy: win cheaply when possible, give points to the partner,
+    otherwise play the cheapest card."""
+    if not legal & (legal - 1):
+        return legal.bit_length() - 1
+    values = CARD_VALUES[trump]
+    cards = mask_to_indexes(legal)
+    if not position:
+        # Lead with the strongest plain card
+        plain = [card for card in cards if card >> 3 != trump] or cards
+        return max(plain, key=lambda card: TRICK_STRENGTHS[trump][card >> 3][card])
+    if partner_is_winning:
+        return max(cards, key=lambda card: values[card] - 20 * (card >> 3 == trump))
+    winning = [card for card in cards if strengths[card] > strengths[winning_card]]
+    return min(winning or cards, key=values.__getitem__)
+
+
+def playout(hands: Sequence[int], trump: int, leader: int,
+            trick: Sequence[Tuple[int, int]], scores: Sequence[int]) -> List[int]:
+    """Play the deal to the end with greedy_card, return the final scores."""
+    hands = list(hands)
+    scores = list(scores)
+    values = CARD_VALUES[trump]
+    winner, winning_card, led_suit, points = leader, 0, 0, 0
+    strengths = TRICK_STRENGTHS[trump][0]
+    for position, (seat, card) in enumerate(trick):
+        if not position:
+            led_suit = card >> 3
+            strengths = TRICK_STRENGTHS[trump][led_suit]
+            winner, winning_card = seat, card
+        elif strengths[card] > strengths[winning_card]:
+            winner, winning_card = seat, card
+        points += values[card]
+
+    position = len(trick)
+    while True:
+        if position == 4:
+            scores[winner & 1] += points
+            if not (hands[0] | hands[1] | hands[2] | hands[3]):
+                scores[winner & 1] += LAST_TRICK_BONUS
+                return scores
+            leader, position, points = winner, 0, 0
+        seat = (leader + position) & 3
+        if position:
+            partner_is_winning = (winner ^ seat) & 1 == 0
+            legal = legal_moves_mask(hands[seat], led_suit, trump,
+                                     winning_card, partner_is_winning)
+        else:
+            partner_is_winning = False
+            legal = hands[seat]
+        card = greedy_card(legal, position, trump, strengths, winning_card,
+                           partner_is_winning)
+        hands[seat] ^= 1 << card
+        if not position:
+            led_suit = card >> 3
+            strengths = TRICK_STRENGTHS[trump][led_suit]
+            winner, winning_card = seat, card
+        elif strengths[card] > strengths[winning_card]:
+            winner, winning_card = seat, card
+        points += values[card]
+        position += 1
+
+
+def samples(nb_samples: int, deadline: Optional[float]) -> Iterator[int]:
+    """range(nb_samples), stopped once time.time() is past deadline. The
+    first sample is always taken."""
+    for i in range(nb_samples):
+        if i and deadline is not None and time.time() > deadline:
+            return
+        yield i
+
+
+def evaluate_trumps(problem: BidProblem, trumps: Sequence[int],
+                    nb_samples: int, seed: int,
+                    deadline: Optional[float] = None) -> Tuple[List[int], int]:
+    """Sum of the points of the bot's team when it takes with every trump,
+    and the number of samples."""
+    rng = random.Random(seed)
+    seat = problem.seat
+    turned = 1 << problem.turned
+    unseen = ALL_CARDS_MASK & ~problem.hand & ~turned
+    # The others get 8 cards, the bot gets the turned card and what is left
+    hand = problem.hand | turned
+    totals = [0] * len(trumps)
+    nb_done = 0
+    for nb_done, _ in enumerate(samples(nb_samples, deadline), 1):
+        hands = sample_hands(rng, seat, hand, unseen, (8, 8, 8, 8))
+        hands[seat] = ALL_CARDS_MASK & ~(hands[0] | hands[1] | hands[2]
+                                         | hands[3]) | hand
+        for i, trump in enumerate(trumps):
+            scores = playout(hands, trump, (problem.dealer + 1) & 3, (),
+                             announcement_scores(hands, trump))
+            totals[i] += scores[seat & 1]
+    return totals, nb_done
+
+
+def evaluate_cards(problem: CardProblem, cards: Sequence[int],
+                   nb_samples: int, seed: int,
+                   deadline: Optional[float] = None) -> Tuple[List[int], int]:
+    """Sum of the final points of the bot's team for every card, and the
+    number of samples."""
+    rng = random.Random(seed)
+    seat = problem.seat
+    unseen = ALL_CARDS_MASK & ~problem.hand & ~problem.played
+    totals = [0] * len(cards)
+    nb_done = 0
+    for nb_done, _ in enumerate(samples(nb_samples, deadline), 1):
+        if problem.possible is None:
+            hands = sample_hands(rng, seat, problem.hand, unseen,
+                                 problem.counts, problem.taker, problem.turned)
+        else:
+            hands = sample_deal(rng, problem.possible, problem.counts)
+        for i, card in enumerate(cards):
+            hands[seat] = problem.hand & ~(1 << card)
+            scores = playout(hands, problem.trump, problem.leader,
+                             [*problem.trick, (seat, card)], problem.scores)
+            totals[i] += scores[seat & 1]
+    return totals, nb_done
+
+
+Evaluation = Callable[..., Tuple[List[int], int]]
+
+
+class MonteCarlo:
+    """Run an evaluation on nb_samples samples, split in chunks.
+
+    Without pool, the chunks run in this process. With a time budget, every
+    chunk stops sampling at the deadline, so that the chunks already running
+    free their workers, and the chunks not started in time are dropped. At
+    least one sample is always used.
+    """
+
+    def __init__(self, nb_samples: int = 200,
+                 pool: Optional[concurrent.futures.Executor] = None,
+                 time_budget: Optional[float] = None, chunk_size: int = 25,
+                 seed: Optional[int] = None) -> None:
+        self.nb_samples = nb_samples
+        self.pool = pool
+        self.time_budget = time_budget
+        self.chunk_size = chunk_size
+        self.rng = random.Random(seed)
+
+    def chunks(self, evaluation: Evaluation, problem,
+               candidates: Sequence[int]) -> List[Callable]:
+        # time.time, unlike time.monotonic, is comparable between processes
+        deadline = (None if self.time_budget is None
+                    else time.time() + self.time_budget)
+        return [
+            functools.partial(evaluation, problem, candidates,
+                              min(self.chunk_size, self.nb_samples - start),
+                              self.rng.getrandbits(32), deadline)
+            for start in range(0, self.nb_samples, self.chunk_size)
+        ]
+
+    @staticmethod
+    def averages(results: Sequence[Tuple[List[int], int]]) -> List[float]:
+        nb_samples = sum(n for _, n in results)
+        return [sum(column) / nb_samples
+                for column in zip(*(totals for totals, _ in results))]
+
+    def evaluate(self, evaluation: Evaluation, problem,
+                 candidates: Sequence[int]) -> List[float]:
+        chunks = self.chunks(evaluation, problem, candidates)
+        if self.pool is None:
+            deadline = time.monotonic() + (self.time_budget or float('inf'))
+            results = [chunks[0]()]
+            for chunk in chunks[1:]:
+                if time.monotonic() > deadline:
+                    break
+                results.append(chunk())
+            return self.averages(results)
+
+        futures = [self.pool.submit(chunk) for chunk in chunks]
+        done, pending = concurrent.futures.wait(futures, self.time_budget)
+        if not done:
+            done, pending = concurrent.futures.wait(
+                pending, return_when=concurrent.futures.FIRST_COMPLETED)
+        for future in pending:
+            future.cancel()
+        return self.averages([future.result() for future in done])
+
+    async def evaluate_async(self, evaluation: Evaluation, problem,
+                             candidates: Sequence[int]) -> List[float]:
+        """Same as evaluate, without blocking the event loop."""
+        # Only the server runs an event loop: the workers and the tools
+        # don't pay for importing asyncio
+        import asyncio
+        loop = asyncio.get_running_loop()
+        futures = [loop.run_in_executor(self.pool, chunk)
+                   for chunk in self.chunks(evaluation, problem, candidates)]
+        done, pending = await asyncio.wait(futures, timeout=self.time_budget)
+        if not done:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED)
+        for future in pending:
+            future.cancel()
+        return self.averages([future.result() for future in done])
+
+
+def best(candidates: Sequence[int], averages: Sequence[float]) -> Tuple[int, float]:
+    return max(zip(candidates, averages), key=lambda pair: pair[1])
+
+
+class MonteCarloStrategy(Strategy):
+    """Monte Carlo decisions for the engine.
+
+    With an equity table, the first round of the bidding is looked up. The
+    hands of the others are sampled consistently with state.knowledge.
+    """
+
+    uses_knowledge = True
+
+    def __init__(self, monte_carlo: MonteCarlo,
+                 equity: Optional[EquityTable] = None) -> None:
+        self.monte_carlo = monte_carlo
+        self.equity = equity
+
+    def bid_problem(self, state: DealState) -> BidProblem:
+        return BidProblem(state.seat, state.hands[state.seat], state.dealer,
+                          state.card)
+
+    def choose_take(self, state: DealState) -> bool:
+        if self.equity is not None:
+            average = self.equity.lookup(state.hands[state.seat], state.card,
+                                         (state.seat - state.dealer) & 3)
+            if average is not None:
+                return average > TAKE_THRESHOLD
+        average, = self.monte_carlo.evaluate(
+            evaluate_trumps, self.bid_problem(state), [state.card >> 3])
+        return average > TAKE_THRESHOLD
+
+    def choose_trump(self, state: DealState, choices: List[int]) -> Optional[int]:
+        averages = self.monte_carlo.evaluate(
+            evaluate_trumps, self.bid_problem(state), choices)
+        trump, average = best(choices, averages)
+        return trump if average > TAKE_THRESHOLD else None
+
+    def choose_card(self, state: DealState, legal: int) -> int:
+        if not legal & (legal - 1):
+            return legal.bit_length() - 1
+        hand = state.hands[state.seat]
+        knowledge = state.knowledge
+        problem = CardProblem(
+            seat=state.seat,
+            hand=hand,
+            trump=state.trump,
+            leader=state.trick[0][0] if state.trick else state.seat,
+            trick=list(state.trick),
+            played=state.played,
+            counts=[mask.bit_count() for mask in state.hands],
+            scores=list(state.scores),
+            taker=state.taker,
+            turned=state.card,
+            possible=(None if knowledge is None
+                      else knowledge.possible(state.seat, hand)),
+        )
+        cards = mask_to_indexes(legal)
+        averages = self.monte_carlo.evaluate(evaluate_cards, problem, cards)
+        card, _ = best(cards, averages)
+        return card
@@ -0,0 +1,72 @@
+"""Canonical forms of hands and positions under the permutations of suits.
+
+The rules treat the 4 suits alike until one of them is the trump, and the
+trump alike whatever its suit: relabelling the suits of a position gives a
+position with the same values. A position is canonical when its fixed suits
+(the trump, or the suit of the turned card during the bidding) come first,
+followed by the other suits sorted by their column, the column of a suit
+being its byte in every mask of the position.
+
+The keys are the columns in canonical order, so isomorphic positions share
+their key and their entries in the caches.
+"""
+from typing import Optional, Sequence, Tuple
+
+NB_SUITS = 4
+
+
+def suit_order(masks: Sequence[int],
+               fixed: Sequence[int] = ()) -> Tuple[int, ...]:
+    """The suits in canonical order: fixed, then the others by decreasing
+    column."""
+    _, order = canonical(masks, fixed)
+    return order
+
+
+def permute(mask: int, order: Sequence[int]) -> int:
+    """mask with the suit order[i] moved to the suit i."""
+    suits = mask.to_bytes(NB_SUITS, 'little')
+    return (suits[order[0]] | suits[order[1]] << 8 | suits[order[2]] << 16
+            | suits[order[3]] << 24)
+
+
+def permute_card(card: int, order: Sequence[int]) -> int:
+    return order.index(card >> 3) << 3 | card & 7
+
+
+def canonical(masks: Sequence[int],
+              fixed: Sequence[int] = ()) -> Tuple[bytes, Tuple[int, ...]]:
+    """Key of masks and the suit order giving their canonical form."""
+    data = b''.join([mask.to_bytes(NB_SUITS, 'little') for mask in masks])
+    columns = [data[suit::NB_SUITS] for suit in range(NB_SUITS)]
+    free = sorted((suit for suit in range(NB_SUITS) if suit not in fixed),
+                  key=columns.__getitem__, reverse=True)
+    order = (*fixed, *free)
+    return b''.join([columns[suit] for suit in order]), order
+
+
+def hand_key(hand: int, trump: Optional[int] = None) -> bytes:
+    """Key of a hand, before the bidding if trump is None."""
+    if trump is None:
+        return bytes(sorted(hand.to_bytes(NB_SUITS, 'little'), reverse=True))
+    key, _ = canonical((hand,), (trump,))
+    return key
+
+
+def bidding_key(hand: int, turned: int) -> bytes:
+    """Key of a hand during the bidding, with the turned card."""
+    key, _ = canonical((hand, 1 << turned), (turned >> 3,))
+    return key
+
+
+def state_key(hands: Sequence[int], trump: int, leader: int,
+              trick: Sequence[int] = (), played: int = 0) -> bytes:
+    """Key of a position of the card play.
+
+    trick lists the cards of the current trick, led by leader, and played
+    the cards of the finished tricks.
+    """
+    masks = [*hands, played]
+    masks += [1 << card for card in trick]
+    key, _ = canonical(masks, (trump,))
+    return bytes([leader]) + key
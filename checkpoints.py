@@ -0,0 +1,82 @@
+"""Latest state of every live table, kept in a local file.
+
+The states are only kept in memory when they change. Every interval seconds
+after a change, the file is rewritten with all of them in a single write,
+and replaces the previous one atomically. It is made of a header followed by
+entries of:
+
+- the table id, a little-endian unsigned int
+- the length of the state, a little-endian unsigned short
+- the state
+
+A server restarted with the same file can resume the tables from
+read_checkpoints().
+"""
+import asyncio
+import os
+import struct
+from typing import Dict, Optional
+
+HEADER = b'BELCKPT\x02'
+ENTRY = struct.Struct('<IH')
+
+
+class Checkpoints:
+    def __init__(self, loop: asyncio.AbstractEventLoop, path: str,
+                 interval: float = 1.0) -> None:
+        self.loop = loop
+        self.path = path
+        self.interval = interval
+        self.states: Dict[int, bytes] = {}
+        self.handle: Optional[asyncio.TimerHandle] = None
+        self.nb_writes = 0
+
+    def save(self, table_id: int, state: bytes) -> None:
+        self.states[table_id] = state
+        self.schedule()
+
+    def discard(self, table_id: int) -> None:
+        if self.states.pop(table_id, None) is not None:
+            self.schedule()
+
+    def schedule(self) -> None:
+        if self.handle is None:
+            self.handle = self.loop.call_later(self.interval, self.flush)
+
+    def flush(self) -> None:
+        if self.handle is not None:
+            self.handle.cancel()
+            self.handle = None
+        chunks = [HEADER]
+        for table_id, state in self.states.items():
+            chunks.append(ENTRY.pack(table_id, len(state)))
+            chunks.append(state)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'wb') as file:
+            file.write(b''.join(chunks))
+        os.replace(tmp_path, self.path)
+        self.nb_writes += 1
+
+    def close(self) -> None:
+        """Write the pending changes."""
+        if self.handle is not None:
+            self.flush()
+
+
+def read_checkpoints(path: str) -> Dict[int, bytes]:
+    """The states of the tables in the file, by table id."""
+    try:
+        with open(path, 'rb') as file:
+            data = file.read()
+    except FileNotFoundError:
+        return {}
+    if not data.startswith(HEADER):
+        raise ValueError(f'{path} is not a checkpoint file')
+    states = {}
+    offset = len(HEADER)
+    while offset + ENTRY.size <= len(data):
+        table_id, size = ENTRY.unpack_from(data, offset)
+        offset += ENTRY.size
+        states[table_id] = data[offset:offset + size]
+        offset += size
+    return states
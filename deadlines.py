@@ -0,0 +1,88 @@
+"""Deadlines of the turns of all the tables, on a single timer wheel.
+
+A deadline goes in the slot of its tick, and one loop callback per tick runs
+the expired deadlines of the current slot. Adding and cancelling a deadline
+are dict operations, whatever the number of pending deadlines, and the loop
+only holds one timer for all of them.
+"""
+import asyncio
+import math
+from typing import Callable, Dict, List, Optional
+
+
+class Deadline:
+    __slots__ = ('wheel', 'tick', 'callback', 'args')
+
+    def __init__(self, wheel: 'TimerWheel', tick: int, callback: Callable,
+                 args: tuple) -> None:
+        self.wheel = wheel
+        self.tick = tick
+        self.callback = callback
+        self.args = args
+
+    def cancel(self) -> None:
+        self.wheel.cancel(self)
+
+
+class TimerWheel:
+    """Run callbacks after a delay, rounded up to resolution seconds.
+
+    Deadlines further than nb_slots ticks share their slot with nearer
+    ones, and stay there until their tick comes.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop,
+                 resolution: float = 0.1, nb_slots: int = 1024) -> None:
+        self.loop = loop
+        self.resolution = resolution
+        self.slots: List[Dict[Deadline, None]] = [{} for _ in range(nb_slots)]
+        # Last tick whose deadlines were run
+        self.tick = 0
+        self.handle: Optional[asyncio.TimerHandle] = None
+        self.nb_deadlines = 0
+
+    def __len__(self) -> int:
+        return self.nb_deadlines
+
+    def call_later(self, delay: float, callback: Callable, *args) -> Deadline:
+        if self.handle is None:
+            self.tick = int(self.loop.time() / self.resolution)
+            self.schedule()
+        tick = max(self.tick + 1,
+                   math.ceil((self.loop.time() + delay) / self.resolution))
+        deadline = Deadline(self, tick, callback, args)
+        self.slots[tick % len(self.slots)][deadline] = None
+        self.nb_deadlines += 1
+        return deadline
+
+    def cancel(self, deadline: Deadline) -> None:
+        slot = self.slots[deadline.tick % len(self.slots)]
+        if deadline in slot:
+            del slot[deadline]
+            self.nb_deadlines -= 1
+
+    def schedule(self) -> None:
+        self.handle = self.loop.call_at((self.tick + 1) * self.resolution,
+                                        self.advance)
+
+    def advance(self) -> None:
+        # The loop may run the callback slightly before its time
+        now = int(self.loop.time() / self.resolution + 1e-6)
+        while self.tick < now:
+            self.tick += 1
+            slot = self.slots[self.tick % len(self.slots)]
+            expired = [deadline for deadline in slot
+                       if deadline.tick <= self.tick]
+            for deadline in expired:
+                del slot[deadline]
+                self.nb_deadlines -= 1
+                deadline.callback(*deadline.args)
+        if self.nb_deadlines:
+            self.schedule()
+        else:
+            self.handle = None
+
+    def close(self) -> None:
+        if self.handle is not None:
+            self.handle.cancel()
+            self.handle = None
@@ -0,0 +1,214 @@
+"""Synchronous Belote engine, without transport nor event loop.
+
+It runs the same flow as Belote.start (dealing, two bidding rounds, the
+announcements and the 8 tricks) on card indexes and hand masks, and asks
+Strategy objects for the decisions. Seats are numbered from 0 to 3, seats 0
+and 2 play together.
+"""
+import random
+from dataclasses import dataclass, field
+from typing import List, Optional, Sequence, Tuple
+
+from announcements import announcement_scores
+from knowledge import Knowledge
+from rules import (
+    CARD_VALUES,
+    CARDS,
+    NB_TRICKS,
+    SUITS,
+    TRICK_STRENGTHS,
+    legal_moves_mask,
+    mask_to_indexes,
+)
+
+LAST_TRICK_BONUS = 10
+
+
+def team_of(seat: int) -> int:
+    return seat & 1
+
+
+@dataclass
+class DealState:
+    """What the strategies see. It is updated in place during the deal."""
+    dealer: int
+    card: int
+    hands: List[int] = field(default_factory=lambda: [0, 0, 0, 0])
+    seat: int = 0
+    trump: Optional[int] = None
+    taker: Optional[int] = None
+    # (seat, card index) of the current trick, in playing order
+    trick: List[Tuple[int, int]] = field(default_factory=list)
+    played: int = 0
+    scores: List[int] = field(default_factory=lambda: [0, 0])
+    # Tracked during the tricks if a strategy uses it
+    knowledge: Optional[Knowledge] = None
+
+
+@dataclass
+class DealResult:
+    dealer: int
+    taker: Optional[int]
+    trump: Optional[int]
+    scores: Tuple[int, int]
+    trick_winners: List[int]
+    # (seat, card index), in playing order
+    moves: List[Tuple[int, int]]
+    # Points of the announcements, included in scores
+    announcements: Tuple[int, int] = (0, 0)
+
+
+class Strategy:
+    """Base strategy: never takes, plays the first legal card."""
+
+    # Whether choose_card reads state.knowledge
+    uses_knowledge = False
+
+    def choose_take(self, state: DealState) -> bool:
+        return False
+
+    def choose_trump(self, state: DealState, choices: List[int]) -> Optional[int]:
+        return None
+
+    def choose_card(self, state: DealState, legal: int) -> int:
+        return (legal & -legal).bit_length() - 1
+
+
+class RandomStrategy(Strategy):
+    def __init__(self, rng: Optional[random.Random] = None,
+                 take_probability: float = 0.25) -> None:
+        self.rng = rng or random.Random()
+        self.take_probability = take_probability
+
+    def choose_take(self, state: DealState) -> bool:
+        return self.rng.random() < self.take_probability
+
+    def choose_trump(self, state: DealState, choices: List[int]) -> Optional[int]:
+        if self.rng.random() < self.take_probability:
+            return self.rng.choice(choices)
+        return None
+
+    def choose_card(self, state: DealState, legal: int) -> int:
+        return self.rng.choice(mask_to_indexes(legal))
+
+
+def shuffled_deck(rng: Optional[random.Random] = None) -> List[int]:
+    cards = list(range(len(CARDS)))
+    (rng or random).shuffle(cards)
+    return cards
+
+
+def deal_5_cards(deck: List[int], hands: List[int], dealer: int) -> None:
+    # Deal 2 cards, then 3 cards, starting from the next player
+    for nb_cards in (2, 3):
+        for i in range(1, 5):
+            seat = (dealer + i) & 3
+            for _ in range(nb_cards):
+                hands[seat] |= 1 << deck.pop()
+
+
+def deal_remaining(deck: List[int], hands: List[int], dealer: int,
+                   taker: int) -> None:
+    # Taker gets the top card, then 2 cards, the other people get 3 cards.
+    hands[taker] |= 1 << deck.pop()
+    for i in range(1, 5):
+        seat = (dealer + i) & 3
+        for _ in range(2 if seat == taker else 3):
+            hands[seat] |= 1 << deck.pop()
+
+
+def bid(state: DealState, strategies: Sequence[Strategy]) -> bool:
+    """Run both bidding rounds, return whether someone took."""
+    dealer = state.dealer
+    for i in range(1, 5):
+        state.seat = seat = (dealer + i) & 3
+        if strategies[seat].choose_take(state):
+            state.taker = seat
+            state.trump = state.card >> 3
+            return True
+
+    choices = [suit for suit in range(len(SUITS)) if suit != state.card >> 3]
+    for i in range(1, 5):
+        state.seat = seat = (dealer + i) & 3
+        suit = strategies[seat].choose_trump(state, choices)
+        if suit in choices:
+            state.taker = seat
+            state.trump = suit
+            return True
+    return False
+
+
+def play_tricks(state: DealState, strategies: Sequence[Strategy],
+                leader: int, moves: List[Tuple[int, int]],
+                trick_winners: List[int]) -> None:
+    hands = state.hands
+    trump = state.trump
+    knowledge = state.knowledge
+    values = CARD_VALUES[trump]
+    trick = state.trick
+    winner = leader
+    for _ in range(NB_TRICKS - len(trick_winners)):
+        trick.clear()
+        leader = winner
+        points = 0
+        for i in range(4):
+            state.seat = seat = (leader + i) & 3
+            if trick:
+                legal = legal_moves_mask(
+                    hands[seat], led_suit, trump, winning_card,
+                    (winner ^ seat) & 1 == 0)
+            else:
+                legal = hands[seat]
+            card = strategies[seat].choose_card(state, legal)
+            assert legal >> card & 1
+            hands[seat] ^= 1 << card
+            state.played |= 1 << card
+            if knowledge is not None:
+                knowledge.observe(seat, card)
+            trick.append((seat, card))
+            moves.append((seat, card))
+
+            if i == 0:
+                led_suit = card >> 3
+                strengths = TRICK_STRENGTHS[trump][led_suit]
+                winner, winning_card = seat, card
+            elif strengths[card] > strengths[winning_card]:
+                winner, winning_card = seat, card
+            points += values[card]
+
+        state.scores[team_of(winner)] += points
+        trick_winners.append(winner)
+    # The winner of the last trick gets 10 points
+    state.scores[team_of(winner)] += LAST_TRICK_BONUS
+
+
+def play_deal(strategies: Sequence[Strategy], dealer: int = 0,
+              deck: Optional[List[int]] = None,
+              rng: Optional[random.Random] = None) -> DealResult:
+    """Play one deal.
+
+    deck lists card indexes, the top of the deck being the last one. It is
+    consumed by the deal. Without deck, a new shuffled one is used.
+    """
+    assert len(strategies) == 4
+    if deck is None:
+        deck = shuffled_deck(rng)
+
+    hands = [0, 0, 0, 0]
+    deal_5_cards(deck, hands, dealer)
+    # The card turned after the first 5 cards of everyone
+    state = DealState(dealer=dealer, card=deck[-1], hands=hands)
+    moves: List[Tuple[int, int]] = []
+    trick_winners: List[int] = []
+    if not bid(state, strategies):
+        return DealResult(dealer, None, None, (0, 0), trick_winners, moves)
+
+    deal_remaining(deck, state.hands, dealer, state.taker)
+    announcements = announcement_scores(state.hands, state.trump)
+    state.scores[:] = announcements
+    if any(strategy.uses_knowledge for strategy in strategies):
+        state.knowledge = Knowledge(state.trump, state.taker, state.card)
+    play_tricks(state, strategies, (dealer + 1) & 3, moves, trick_winners)
+    return DealResult(dealer, state.taker, state.trump,
+                      (state.scores[0], state.scores[1]),
+                      trick_winners, moves, tuple(announcements))
@@ -0,0 +1,170 @@
+"""Expected points of taking the turned card, for every opening hand.
+
+During the first round of the bidding, the players hold 5 cards and are
+offered the turned card. The table gives, for every hand, turned card and
+position after the dealer (0 for the dealer), the average points of the
+player's team when it takes, estimated by the playouts of
+bots.evaluate_trumps.
+
+The file is a header followed by one byte per entry, NO_VALUE for the hands
+that are not canonical (see canonical.py) or were not evaluated. The entry
+of a canonical hand, whose turned card is in the first suit, is at:
+
+    (position * 8 + turned card) * NB_HANDS + colex rank of the hand
+
+The table is built offline:
+
+    python equity.py equity.table --samples 64 --workers 4
+"""
+import argparse
+import concurrent.futures
+import itertools
+import math
+import mmap
+import os
+import random
+import struct
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+from canonical import permute, suit_order
+
+MAGIC = b'BELEQT\x00\x01'
+# Magic, number of samples per entry, reserved
+HEADER = struct.Struct('<8sI4x')
+NO_VALUE = 0xff
+NB_CARDS = 32
+HAND_SIZE = 5
+NB_HANDS = math.comb(NB_CARDS, HAND_SIZE)
+NB_ENTRIES = 4 * 8 * NB_HANDS
+
+# Binomial coefficients C(card, k), indexed by card and k
+_BINOMIALS: Tuple[Tuple[int, ...], ...] = tuple(
+    tuple(math.comb(card, k) for k in range(HAND_SIZE + 1))
+    for card in range(NB_CARDS)
+)
+
+# (position, turned card, hand), in canonical form
+Entry = Tuple[int, int, int]
+
+
+def hand_rank(hand: int) -> int:
+    """Colex rank of a 5-card hand, from 0 to NB_HANDS - 1."""
+    rank = 0
+    k = 1
+    while hand:
+        card = (hand & -hand).bit_length() - 1
+        rank += _BINOMIALS[card][k]
+        k += 1
+        hand &= hand - 1
+    return rank
+
+
+def entry_offset(hand: int, turned: int, position: int) -> int:
+    order = suit_order((hand, 1 << turned), (turned >> 3,))
+    return ((position * 8 + (turned & 7)) * NB_HANDS
+            + hand_rank(permute(hand, order)))
+
+
+class EquityTable:
+    """Memory-mapped table, read with lookup()."""
+
+    def __init__(self, path: str) -> None:
+        with open(path, 'rb') as file:
+            self.mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self.mmap) != HEADER.size + NB_ENTRIES:
+            self.mmap.close()
+            raise ValueError(f'{path} is not an equity table')
+        magic, self.nb_samples = HEADER.unpack_from(self.mmap)
+        if magic != MAGIC:
+            self.mmap.close()
+            raise ValueError(f'{path} is not an equity table')
+
+    def lookup(self, hand: int, turned: int, position: int) -> Optional[int]:
+        """Average points of the team of the player at position after the
+        dealer, taking turned with hand, or None if it is unknown."""
+        value = self.mmap[HEADER.size + entry_offset(hand, turned, position)]
+        return None if value == NO_VALUE else value
+
+    def close(self) -> None:
+        self.mmap.close()
+
+    def __enter__(self) -> 'EquityTable':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def canonical_hands(turned: int) -> Iterator[int]:
+    """The canonical hands without turned, a card of the first suit."""
+    for cards in itertools.combinations(range(NB_CARDS), HAND_SIZE):
+        if turned in cards:
+            continue
+        hand = sum(1 << card for card in cards)
+        if permute(hand, suit_order((hand, 1 << turned), (0,))) == hand:
+            yield hand
+
+
+def all_entries() -> List[Entry]:
+    return [(position, turned, hand)
+            for turned in range(8)
+            for hand in canonical_hands(turned)
+            for position in range(4)]
+
+
+def evaluate_entries(entries: Sequence[Entry], nb_samples: int,
+                     seed: str) -> bytes:
+    # bots imports this module
+    from bots import BidProblem, evaluate_trumps
+    rng = random.Random(seed)
+    values = bytearray()
+    for position, turned, hand in entries:
+        # The dealer is the seat 0
+        (total,), n = evaluate_trumps(BidProblem(position, hand, 0, turned),
+                                      [turned >> 3], nb_samples,
+                                      rng.getrandbits(32))
+        # The announcements may take the average above a byte
+        values.append(min(round(total / n), NO_VALUE - 1))
+    return bytes(values)
+
+
+def build_table(path: str, nb_samples: int = 64, seed: int = 0,
+                pool: Optional[concurrent.futures.Executor] = None,
+                entries: Optional[Sequence[Entry]] = None,
+                chunk_size: int = 1000) -> None:
+    """Write the table of entries, all of them by default.
+
+    Every chunk of entries has its own seed, derived from seed.
+    """
+    if entries is None:
+        entries = all_entries()
+    chunks = [entries[start:start + chunk_size]
+              for start in range(0, len(entries), chunk_size)]
+    args = ([chunk, nb_samples, f'{seed}:{i}'] for i, chunk in enumerate(chunks))
+    if pool is None:
+        results = itertools.starmap(evaluate_entries, args)
+    else:
+        results = pool.map(evaluate_entries, *zip(*args))
+    table = bytearray([NO_VALUE]) * NB_ENTRIES
+    for chunk, values in zip(chunks, results):
+        for (position, turned, hand), value in zip(chunk, values):
+            table[(position * 8 + turned) * NB_HANDS + hand_rank(hand)] = value
+    with open(path, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, nb_samples))
+        file.write(table)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('path')
+    parser.add_argument('--samples', type=int, default=64)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    with concurrent.futures.ProcessPoolExecutor(args.workers) as pool:
+        build_table(args.path, args.samples, args.seed, pool)
+
+
+if __name__ == '__main__':
+    main()
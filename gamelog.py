@@ -0,0 +1,176 @@
+"""Append-only binary log of deals.
+
+The file starts with a header, followed by records of RECORD.size bytes:
+
+- the deck before the deal, 32 card indexes, the top of the deck last
+- the dealer, the taker and the trump, NO_VALUE when nobody took
+- the 32 plays in playing order, seat << 5 | card index, NO_VALUE when the
+  deal was not played
+- the scores of both teams, 2 little-endian unsigned shorts
+- one reserved byte
+
+Writers only append whole records, and readers ignore a truncated record at
+the end of the file. With an event loop, the buffered records are written
+at most interval seconds after their deal, so a crash loses a second of
+deals rather than a full buffer.
+"""
+import asyncio
+import mmap
+import os
+import struct
+from dataclasses import dataclass, field
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+HEADER = b'BELOTE\x00\x01'
+RECORD = struct.Struct('<32sBBB32s2Hx')
+NO_VALUE = 0xff
+NB_CARDS = 32
+
+
+@dataclass
+class DealRecord:
+    deck: Sequence[int]
+    dealer: int
+    taker: Optional[int] = None
+    trump: Optional[int] = None
+    # (seat, card index), in playing order
+    plays: List[Tuple[int, int]] = field(default_factory=list)
+    scores: Tuple[int, int] = (0, 0)
+
+    def pack_into(self, buffer, offset: int) -> None:
+        plays = bytes(seat << 5 | card for seat, card in self.plays)
+        RECORD.pack_into(
+            buffer, offset, bytes(self.deck), self.dealer,
+            NO_VALUE if self.taker is None else self.taker,
+            NO_VALUE if self.trump is None else self.trump,
+            plays.ljust(NB_CARDS, bytes([NO_VALUE])), *self.scores)
+
+    @classmethod
+    def unpack_from(cls, buffer, offset: int = 0) -> 'DealRecord':
+        return cls.from_fields(*RECORD.unpack_from(buffer, offset))
+
+    @classmethod
+    def from_fields(cls, deck: bytes, dealer: int, taker: int, trump: int,
+                    plays: bytes, *scores: int) -> 'DealRecord':
+        return cls(
+            deck=list(deck),
+            dealer=dealer,
+            taker=None if taker == NO_VALUE else taker,
+            trump=None if trump == NO_VALUE else trump,
+            plays=[(play >> 5, play & 0x1f) for play in plays
+                   if play != NO_VALUE],
+            scores=scores,
+        )
+
+
+class GameLog:
+    """Append records to a log, by blocks of buffer_size bytes, or every
+    interval seconds with a loop."""
+
+    def __init__(self, path: str, buffer_size: int = 1 << 16,
+                 loop: Optional[asyncio.AbstractEventLoop] = None,
+                 interval: float = 1.0) -> None:
+        self.file = open(path, 'a+b', buffering=0)
+        size = self.file.seek(0, os.SEEK_END)
+        if size < len(HEADER):
+            self.file.truncate(0)
+            self.file.write(HEADER)
+        else:
+            self.file.seek(0)
+            if self.file.read(len(HEADER)) != HEADER:
+                raise ValueError(f'{path} is not a game log')
+            # Drop a record truncated by a crash
+            self.file.truncate(size - (size - len(HEADER)) % RECORD.size)
+        self.buffer = bytearray(buffer_size - buffer_size % RECORD.size
+                                or RECORD.size)
+        self.used = 0
+        self.loop = loop
+        self.interval = interval
+        self.handle: Optional[asyncio.TimerHandle] = None
+
+    def append(self, record: DealRecord) -> None:
+        record.pack_into(self.buffer, self.used)
+        self.used += RECORD.size
+        if self.used == len(self.buffer):
+            self.flush()
+        elif self.loop is not None and self.handle is None:
+            self.handle = self.loop.call_later(self.interval, self.flush)
+
+    def flush(self) -> None:
+        if self.handle is not None:
+            self.handle.cancel()
+            self.handle = None
+        if self.used:
+            self.file.write(memoryview(self.buffer)[:self.used])
+            self.used = 0
+
+    def close(self) -> None:
+        self.flush()
+        self.file.close()
+
+    def __enter__(self) -> 'GameLog':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def record_dtype():
+    """NumPy dtype of a record."""
+    import numpy as np
+    return np.dtype([
+        ('deck', np.uint8, NB_CARDS),
+        ('dealer', np.uint8),
+        ('taker', np.uint8),
+        ('trump', np.uint8),
+        ('plays', np.uint8, NB_CARDS),
+        ('scores', '<u2', 2),
+        ('reserved', np.uint8),
+    ])
+
+
+class GameLogReader:
+    """Memory-mapped view of a log."""
+
+    def __init__(self, path: str) -> None:
+        with open(path, 'rb') as file:
+            self.mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.mmap[:len(HEADER)] != HEADER:
+            self.mmap.close()
+            raise ValueError(f'{path} is not a game log')
+        self.records = memoryview(self.mmap)[
+            len(HEADER):len(HEADER) + len(self) * RECORD.size]
+
+    def __len__(self) -> int:
+        return (len(self.mmap) - len(HEADER)) // RECORD.size
+
+    def __getitem__(self, i: int) -> DealRecord:
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return DealRecord.unpack_from(self.records, i * RECORD.size)
+
+    def __iter__(self) -> Iterator[DealRecord]:
+        for fields in RECORD.iter_unpack(self.records):
+            yield DealRecord.from_fields(*fields)
+
+    def iter_fields(self) -> Iterator[tuple]:
+        """The raw fields of RECORD, without building DealRecord objects."""
+        return RECORD.iter_unpack(self.records)
+
+    def array(self):
+        """All the records as a NumPy structured array on the mapping.
+
+        The array has to be deleted before closing the reader.
+        """
+        import numpy as np
+        return np.frombuffer(self.records, record_dtype())
+
+    def close(self) -> None:
+        self.records.release()
+        self.mmap.close()
+
+    def __enter__(self) -> 'GameLogReader':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,71 @@
+"""Hand the connections over between the workers of shards.py.
+
+Every worker binds a Unix datagram socket in a directory shared by the
+workers. A worker passes a connection to another one by sending it the file
+descriptor of the connection, with the bytes received but not processed
+yet. The receiving worker adopts the connection on its own event loop.
+"""
+import array
+import asyncio
+import contextlib
+import os
+import socket
+from typing import Callable
+
+# Largest bytes sent with a connection
+MAX_DATA = 64 * 1024
+# Delay before sending again when the receiver's queue is full
+RETRY_DELAY = 0.01
+
+
+class Handoff:
+    def __init__(self, loop: asyncio.AbstractEventLoop, directory: str,
+                 worker: int,
+                 accept: Callable[[socket.socket, bytes], None]) -> None:
+        self.loop = loop
+        self.directory = directory
+        self.worker = worker
+        self.accept = accept
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(self.path(worker))
+        self.sock.bind(self.path(worker))
+        self.sock.setblocking(False)
+        loop.add_reader(self.sock.fileno(), self.receive)
+
+    def path(self, worker: int) -> str:
+        return os.path.join(self.directory, f'worker-{worker}.sock')
+
+    def has_worker(self, worker: int) -> bool:
+        return os.path.exists(self.path(worker))
+
+    def send(self, worker: int, sock: socket.socket, data: bytes) -> None:
+        """Pass sock to worker, and close it here."""
+        try:
+            # socket.send_fds() ignores its address argument
+            self.sock.sendmsg(
+                [data], [(socket.SOL_SOCKET, socket.SCM_RIGHTS,
+                          array.array('i', [sock.fileno()]))],
+                0, self.path(worker))
+        except BlockingIOError:
+            self.loop.call_later(RETRY_DELAY, self.send, worker, sock, data)
+            return
+        except OSError:
+            # The worker is gone, and so is the seat
+            pass
+        sock.close()
+
+    def receive(self) -> None:
+        while True:
+            try:
+                data, fds, _, _ = socket.recv_fds(self.sock, MAX_DATA, 1)
+            except BlockingIOError:
+                return
+            for fd in fds:
+                self.accept(socket.socket(fileno=fd), data)
+
+    def close(self) -> None:
+        self.loop.remove_reader(self.sock.fileno())
+        self.sock.close()
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(self.path(self.worker))
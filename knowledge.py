@@ -0,0 +1,146 @@
+"""What the table knows of the hands, from the cards played so far.
+
+Every card played tells the other seats that it is out, and sometimes that
+its player holds no card of a suit: not following the led suit, not
+trumping, or not overtrumping when the rules of legal_moves_mask ask for it.
+Knowledge keeps these facts as masks, updated in a few operations by
+observe() on every card, and gives every seat the cards it may still hold.
+
+The facts only depend on the cards played, so a single Knowledge serves the
+4 seats: the cards a seat may hold, seen from another one, are the unknown
+cards that are not in the hand of the other seat. sample_deal() deals the
+unknown cards consistently with them, for the Monte Carlo bots.
+"""
+import random
+from typing import List, Sequence
+
+from rules import (
+    ALL_CARDS_MASK,
+    HIGHER_TRUMPS,
+    SUIT_MASKS,
+    TRICK_STRENGTHS,
+    mask_to_indexes,
+)
+
+# Deals tried by sample_deal before giving up
+MAX_ATTEMPTS = 1000
+
+
+class Knowledge:
+    """Facts known by everyone at the table, once the trump is chosen.
+
+    taker took the turned card, so it holds it until it is played. counts
+    and played are the cards left in every hand and the cards already
+    played, when they are not the 8 cards of a new deal.
+    """
+
+    def __init__(self, trump: int, taker: int, turned: int,
+                 counts: Sequence[int] = (8, 8, 8, 8), played: int = 0) -> None:
+        self.counts = [0, 0, 0, 0]
+        # Cards every seat is known not to hold
+        self.excluded = [0, 0, 0, 0]
+        self.reset(trump, taker, turned, counts, played)
+
+    def reset(self, trump: int, taker: int, turned: int,
+              counts: Sequence[int] = (8, 8, 8, 8), played: int = 0) -> None:
+        """Start over, for a new deal."""
+        self.trump = trump
+        self.taker = taker
+        self.turned = turned
+        self.counts[:] = counts
+        self.played = played
+        self.excluded[:] = (0, 0, 0, 0)
+        # The current trick
+        self.nb_cards = 0
+        self.led_suit = 0
+        self.winner = 0
+        self.winning_card = 0
+        self.strengths = TRICK_STRENGTHS[trump][0]
+
+    def observe(self, seat: int, card: int) -> None:
+        """seat played card."""
+        self.played |= 1 << card
+        self.counts[seat] -= 1
+        suit = card >> 3
+        trump = self.trump
+        if not self.nb_cards:
+            self.led_suit = suit
+            self.strengths = TRICK_STRENGTHS[trump][suit]
+            self.winner, self.winning_card = seat, card
+            self.nb_cards = 1
+            return
+
+        led_suit = self.led_suit
+        winning_card = self.winning_card
+        beats = self.strengths[card] > self.strengths[winning_card]
+        if suit != led_suit:
+            excluded = SUIT_MASKS[led_suit]
+            # Without the led suit, a player holding trumps has to trump
+            if suit != trump:
+                excluded |= SUIT_MASKS[trump]
+            self.excluded[seat] |= excluded
+        # A trump that doesn't beat a trump of the opponents means that
+        # the player holds no higher one
+        if (suit == trump and not beats and winning_card >> 3 == trump
+                and (self.winner ^ seat) & 1):
+            self.excluded[seat] |= HIGHER_TRUMPS[winning_card]
+        if beats:
+            self.winner, self.winning_card = seat, card
+        self.nb_cards = (self.nb_cards + 1) & 3
+
+    def possible(self, seat: int, hand: int) -> List[int]:
+        """The cards every seat may hold, seen from seat holding hand."""
+        unknown = ALL_CARDS_MASK & ~self.played & ~hand
+        turned = 1 << self.turned & unknown
+        masks = []
+        for other in range(4):
+            if other == seat:
+                masks.append(hand)
+            elif other == self.taker:
+                masks.append(unknown & ~self.excluded[other] | turned)
+            else:
+                masks.append(unknown & ~self.excluded[other] & ~turned)
+        return masks
+
+    def sample(self, rng: random.Random, seat: int, hand: int) -> List[int]:
+        """Hands of the 4 seats, consistent with what seat knows."""
+        return sample_deal(rng, self.possible(seat, hand), self.counts)
+
+
+def sample_deal(rng: random.Random, possible: Sequence[int],
+                counts: Sequence[int]) -> List[int]:
+    """Deal counts[i] cards of possible[i] to every seat i.
+
+    The cards with the fewest possible seats are dealt first, every card
+    going to one of its seats with a probability proportional to the cards
+    the seat still misses. A deal may run out of seats for a card, and is
+    then tried again.
+    """
+    cards = mask_to_indexes(possible[0] | possible[1] | possible[2]
+                            | possible[3])
+    rng.shuffle(cards)
+    choices = [([seat for seat in range(4) if possible[seat] >> card & 1], card)
+               for card in cards]
+    choices.sort(key=lambda choice: len(choice[0]))
+    for _ in range(MAX_ATTEMPTS):
+        hands = [0, 0, 0, 0]
+        missing = list(counts)
+        for seats, card in choices:
+            if len(seats) == 1:
+                seat = seats[0]
+            else:
+                total = sum(missing[seat] for seat in seats)
+                if not total:
+                    break
+                r = rng.randrange(total)
+                for seat in seats:
+                    r -= missing[seat]
+                    if r < 0:
+                        break
+            if not missing[seat]:
+                break
+            hands[seat] |= 1 << card
+            missing[seat] -= 1
+        else:
+            return hands
+    raise ValueError('No deal is consistent with the possible cards')
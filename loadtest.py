@@ -0,0 +1,185 @@
+"""Load test of the lobby.
+
+It starts a server in this process and opens fake clients against it, 4 per
+table. For every level of tables, it prints the connection to seat latency
+of the new clients:
+
+    python loadtest.py --tables 100 500 1000 2000
+
+With --play, the clients play their games (they always take the card and
+play the first legal card), and the number of finished tables and the
+memory are printed every second instead. --stalled clients stop reading
+once seated. With --binary, the clients answer with the binary framing.
+"""
+import argparse
+import asyncio
+import os
+import re
+import resource
+import time
+from typing import List, Optional
+
+from server import BeloteProtocol, Lobby, encode_frame
+
+CARD_RE = re.compile(r'<Card: ([^>]+)>')
+
+
+def percentile(values: List[float], p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p / 100 * len(values)))]
+
+
+def rss_kb() -> int:
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pages * os.sysconf('SC_PAGE_SIZE') // 1024
+
+
+class Client(asyncio.Protocol):
+    def __init__(self, play: bool = False, stalled: bool = False,
+                 binary: bool = False) -> None:
+        self.play = play
+        self.stalled = stalled
+        self.binary = binary
+        self.created = time.perf_counter()
+        self.seated: asyncio.Future = asyncio.get_event_loop().create_future()
+        self.transport: Optional[asyncio.Transport] = None
+        self.buffer = b''
+        self.nb_seated = 0
+        self.number = 0
+        # Time from sending a card to receiving its announcement
+        self.sent_at = 0.0
+        self.move_latencies: List[float] = []
+
+    def connection_made(self, transport):
+        self.transport = transport
+        if self.binary:
+            transport.write(b'binary\n')
+        self.send('play')
+
+    def send(self, message: str) -> None:
+        if self.binary:
+            self.transport.write(encode_frame(message))
+        else:
+            self.transport.write(f'{message}\n'.encode())
+
+    def data_received(self, data):
+        *lines, self.buffer = (self.buffer + data).split(b'\n')
+        for line in lines:
+            self.line_received(line.decode())
+
+    def line_received(self, line: str) -> None:
+        if line.startswith('You are the Player'):
+            self.nb_seated += 1
+            self.number = int(line.split()[-1])
+            if not self.seated.done():
+                self.seated.set_result(time.perf_counter() - self.created)
+            if self.stalled:
+                self.transport.pause_reading()
+        elif not self.play:
+            return
+        elif line == 'Do you want to take the card?':
+            self.send('yes')
+        elif line.startswith('What are you playing?'):
+            card = CARD_RE.search(line).group(1)
+            self.sent_at = time.perf_counter()
+            self.send(card)
+        elif self.sent_at and line.startswith(f'Player {self.number} is playing'):
+            self.move_latencies.append(time.perf_counter() - self.sent_at)
+            self.sent_at = 0.0
+
+
+async def connect(loop, host: str, port: int, nb_clients: int,
+                  play: bool, nb_stalled: int = 0,
+                  binary: bool = False) -> List[Client]:
+    clients = []
+    for start in range(0, nb_clients, 100):
+        batch = [Client(play, start + i < nb_stalled, binary)
+                 for i in range(min(100, nb_clients - start))]
+        await asyncio.gather(*(
+            loop.create_connection(lambda client=client: client, host, port)
+            for client in batch))
+        clients.extend(batch)
+    return clients
+
+
+async def seat_latency(loop, host, port, levels: List[int], lobby) -> None:
+    print('tables  p50_ms  p99_ms  max_ms  rss_kb')
+    clients: List[Client] = []
+    for level in levels:
+        new_clients = await connect(
+            loop, host, port, 4 * level - len(clients), play=False)
+        latencies = await asyncio.gather(*(c.seated for c in new_clients))
+        clients.extend(new_clients)
+        if lobby is not None:
+            assert len(lobby.tables) == level
+        print(f'{level:6d} {1000 * percentile(latencies, 50):7.2f} '
+              f'{1000 * percentile(latencies, 99):7.2f} '
+              f'{1000 * max(latencies):7.2f} {rss_kb():7d}')
+    for client in clients:
+        client.transport.close()
+
+
+async def play_games(loop, host, port, nb_tables: int, duration: float,
+                     lobby, nb_stalled: int = 0, binary: bool = False) -> None:
+    clients = await connect(loop, host, port, 4 * nb_tables, play=True,
+                            nb_stalled=nb_stalled, binary=binary)
+    print('seconds  finished_tables  rss_kb  buffered_kb  dropped')
+    start = time.perf_counter()
+    while time.perf_counter() - start < duration:
+        await asyncio.sleep(1)
+        finished = buffered = dropped = -1
+        if lobby is not None:
+            finished = lobby.nb_finished_tables
+            buffered = sum(lobby.buffered().values()) // 1024
+            dropped = lobby.nb_dropped
+        print(f'{time.perf_counter() - start:7.1f} {finished:16d} '
+              f'{rss_kb():7d} {buffered:12d} {dropped:8d}')
+    for client in clients:
+        client.transport.close()
+    latencies = [latency for client in clients
+                 for latency in client.move_latencies]
+    if latencies:
+        print(f'move latency: p50 {1000 * percentile(latencies, 50):.2f} ms, '
+              f'p99 {1000 * percentile(latencies, 99):.2f} ms')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=0,
+                        help='Port of an external server. By default, a '
+                             'server is started in this process.')
+    parser.add_argument('--tables', type=int, nargs='+',
+                        default=[100, 250, 500, 1000])
+    parser.add_argument('--play', action='store_true')
+    parser.add_argument('--stalled', type=int, default=0,
+                        help='Number of clients that stop reading')
+    parser.add_argument('--binary', action='store_true')
+    parser.add_argument('--duration', type=float, default=10)
+    args = parser.parse_args()
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    lobby = None
+    port = args.port
+    if not port:
+        lobby = Lobby(loop)
+        server = loop.run_until_complete(loop.create_server(
+            lambda: BeloteProtocol(lobby), args.host, 0))
+        port = server.sockets[0].getsockname()[1]
+
+    if args.play:
+        loop.run_until_complete(play_games(
+            loop, args.host, port, args.tables[-1], args.duration, lobby,
+            args.stalled, args.binary))
+    else:
+        loop.run_until_complete(seat_latency(
+            loop, args.host, port, args.tables, lobby))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,177 @@
+"""Counters and histograms of the server, rendered as plaintext.
+
+The metrics are plain Python objects updated in place, cheap enough to be
+always on. render() writes them in the Prometheus text format, served by
+serve_metrics on a local port:
+
+    curl http://127.0.0.1:9100/
+"""
+import asyncio
+import bisect
+from typing import Callable, Dict, List, Optional, Sequence
+
+# Upper bounds in seconds, from 100µs to 100s
+TIME_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100)
+SIZE_BUCKETS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 25000,
+                50000, 100000)
+
+
+class Counter:
+    def __init__(self, name: str, help: str) -> None:
+        self.name = name
+        self.help = help
+        self.value = 0
+
+    def inc(self, value: int = 1) -> None:
+        self.value += value
+
+    def render(self) -> List[str]:
+        return [f'# HELP {self.name} {self.help}',
+                f'# TYPE {self.name} counter',
+                f'{self.name} {self.value}']
+
+
+class Gauge:
+    """A value read from a function when rendered."""
+
+    def __init__(self, name: str, help: str,
+                 function: Callable[[], float] = lambda: 0) -> None:
+        self.name = name
+        self.help = help
+        self.function = function
+
+    def render(self) -> List[str]:
+        return [f'# HELP {self.name} {self.help}',
+                f'# TYPE {self.name} gauge',
+                f'{self.name} {self.function()}']
+
+
+class Histogram:
+    def __init__(self, name: str, help: str,
+                 buckets: Sequence[float] = TIME_BUCKETS) -> None:
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        # The last count is for the values above the last bucket
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.help}',
+                 f'# TYPE {self.name} histogram']
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            lines.append(f'{self.name}_bucket{{le="{bound}"}} {total}')
+        total += self.counts[-1]
+        lines.append(f'{self.name}_bucket{{le="+Inf"}} {total}')
+        lines.append(f'{self.name}_sum {self.sum}')
+        lines.append(f'{self.name}_count {total}')
+        return lines
+
+
+class Registry:
+    def __init__(self) -> None:
+        self.metrics: Dict[str, object] = {}
+
+    def add(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        return ''.join(line + '\n' for metric in self.metrics.values()
+                       for line in metric.render())
+
+
+REGISTRY = Registry()
+
+BIDDING_SECONDS = REGISTRY.add(Histogram(
+    'belote_bidding_seconds', 'Duration of the bidding of a deal'))
+THINK_SECONDS = REGISTRY.add(Histogram(
+    'belote_think_seconds', 'Time waiting for a player to play a card'))
+TRICK_DURATION_SECONDS = REGISTRY.add(Histogram(
+    'belote_trick_duration_seconds', 'Wall time of a trick, from asking its '
+    'first card to its winner, mostly the think time of the players'))
+LOOP_LAG_SECONDS = REGISTRY.add(Histogram(
+    'belote_loop_lag_seconds', 'Delay of the event loop in running a '
+    'callback'))
+TABLE_MESSAGES = REGISTRY.add(Histogram(
+    'belote_table_messages', 'Messages sent by a finished table',
+    SIZE_BUCKETS))
+TABLE_BYTES = REGISTRY.add(Histogram(
+    'belote_table_bytes', 'Bytes sent by a finished table',
+    [100 * size for size in SIZE_BUCKETS]))
+# Counted when the tables close
+MESSAGES = REGISTRY.add(Counter(
+    'belote_messages_total', 'Messages sent by the finished tables'))
+MESSAGE_BYTES = REGISTRY.add(Counter(
+    'belote_message_bytes_total', 'Bytes sent by the finished tables'))
+DEFAULT_ANSWERS = REGISTRY.add(Counter(
+    'belote_default_answers_total', 'Questions answered by default, after '
+    'a timeout or a disconnection'))
+DEALS = REGISTRY.add(Counter(
+    'belote_deals_total', 'Deals played to the last trick'))
+FAILED_CONTRACTS = REGISTRY.add(Counter(
+    'belote_failed_contracts_total', 'Deals where the bidding team did not '
+    'get more points than the other team'))
+WRITES = REGISTRY.add(Counter(
+    'belote_writes_total', 'Writes to the transports'))
+TABLES = REGISTRY.add(Gauge('belote_tables', 'Tables being played'))
+CONNECTIONS = REGISTRY.add(Gauge('belote_connections', 'Open connections'))
+
+
+class LagMonitor:
+    """Measure how late the loop runs a callback scheduled every interval."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop,
+                 histogram: Histogram = LOOP_LAG_SECONDS,
+                 interval: float = 0.25) -> None:
+        self.loop = loop
+        self.histogram = histogram
+        self.interval = interval
+        self.handle: Optional[asyncio.TimerHandle] = None
+        self.expected = 0.0
+
+    def start(self) -> None:
+        self.expected = self.loop.time() + self.interval
+        self.handle = self.loop.call_at(self.expected, self.tick)
+
+    def tick(self) -> None:
+        self.histogram.observe(max(0.0, self.loop.time() - self.expected))
+        self.start()
+
+    def stop(self) -> None:
+        if self.handle is not None:
+            self.handle.cancel()
+            self.handle = None
+
+
+async def serve_metrics(host: str = '127.0.0.1', port: int = 9100,
+                        registry: Registry = REGISTRY) -> asyncio.AbstractServer:
+    """Answer every HTTP request with the metrics."""
+    async def handle(reader: asyncio.StreamReader,
+                     writer: asyncio.StreamWriter) -> None:
+        try:
+            # Only the request line and the headers are read
+            await reader.readuntil(b'\r\n\r\n')
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            pass
+        body = registry.render().encode()
+        writer.write(b'HTTP/1.0 200 OK\r\n'
+                     b'Content-Type: text/plain; version=0.0.4\r\n'
+                     b'Content-Length: %d\r\n\r\n' % len(body) + body)
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host, port)
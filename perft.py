@@ -0,0 +1,315 @@
+"""Count the card plays of a deal, like the perft of the chess engines.
+
+From a position, perft counts the sequences of depth cards, or of all the
+cards left when depth is None. The tree is walked with the game objects:
+Player.legal_moves gives the moves, and Trick.winning_player_card the leader
+of the next trick. The counts after every first card are computed on a
+process pool:
+
+    python perft.py --depth 6 --workers 4
+
+With --fuzz, the moves of every generator of GENERATORS are compared with
+reference_moves, the rules written on lists of cards, on random positions,
+and the positions where they differ are reported. belote_old.py implements
+simpler rules, without the duty to overtrump, so its differences are
+expected.
+"""
+import argparse
+import concurrent.futures
+import os
+import random
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from belote import Belote, Player, Trick, initialize_double_linked_list
+from rules import (
+    CARDS,
+    SUITS,
+    TRICK_STRENGTHS,
+    Card,
+    Hand,
+    cards_to_mask,
+    legal_moves_mask,
+    mask_to_cards,
+    mask_to_indexes,
+)
+
+# Moves of a hand, from the cards of the trick, led first, and the trump
+MoveGenerator = Callable[[int, Sequence[int], int], int]
+
+
+@dataclass(frozen=True)
+class Position:
+    """Hands by seat, as masks, and the cards of the trick led by leader."""
+    hands: Tuple[int, int, int, int]
+    trump: int
+    leader: int
+    trick: Tuple[int, ...] = ()
+
+    @property
+    def seat_to_play(self) -> int:
+        return (self.leader + len(self.trick)) & 3
+
+
+def random_position(rng: random.Random, nb_played: int = 0) -> Position:
+    """A random deal, after nb_played random legal cards."""
+    deck = rng.sample(range(len(CARDS)), len(CARDS))
+    hands = tuple(sum(1 << card for card in deck[seat::4])
+                  for seat in range(4))
+    position = Position(hands, rng.randrange(len(SUITS)), rng.randrange(4))
+    game, trick = setup(position)
+    player = game.players[position.leader]
+    for _ in range(nb_played):
+        card = rng.choice(player.legal_moves(trick))
+        player, trick = play(player, trick, card)
+    return position_of(game, player, trick)
+
+
+def setup(position: Position) -> Tuple[Belote, Trick]:
+    game = Belote()
+    for _ in range(4):
+        game.add_player(Player())
+    initialize_double_linked_list(game.players)
+    game.set_teams()
+    game.trump = SUITS[position.trump]
+    for player, mask in zip(game.players, position.hands):
+        player.hand = Hand(mask_to_cards(mask))
+        player.hand.set_trump(position.trump)
+    trick = Trick(game)
+    for i, card in enumerate(position.trick):
+        trick.add(game.players[(position.leader + i) & 3], CARDS[card])
+    return game, trick
+
+
+def position_of(game: Belote, player: Player, trick: Trick) -> Position:
+    """The position where player is to play on trick."""
+    seat = game.players.index(player)
+    return Position(
+        tuple(player.hand.mask for player in game.players),
+        SUITS.index(game.trump),
+        (seat - len(trick.pile)) & 3,
+        tuple(card.index for _, card in trick.pile),
+    )
+
+
+def play(player: Player, trick: Trick, card: Card) -> Tuple[Player, Trick]:
+    """Play card, and return the next player and trick."""
+    trick.add(player, card)
+    player.hand.remove(card)
+    if len(trick.pile) < 4:
+        return player.next, trick
+    winner, _ = trick.winning_player_card
+    return winner, Trick(trick.game)
+
+
+def count(player: Player, trick: Trick, depth: int) -> int:
+    if depth == 0:
+        return 1
+    moves = player.legal_moves(trick)
+    if depth == 1:
+        return len(moves)
+    total = 0
+    for card in moves:
+        # Undone after the count
+        winner, points = trick.winner, trick.points
+        next_player, next_trick = play(player, trick, card)
+        total += count(next_player, next_trick, depth - 1)
+        trick.pile.pop()
+        trick.winner, trick.points = winner, points
+        player.hand.add(card)
+    return total
+
+
+def perft_position(position: Position, depth: Optional[int]) -> int:
+    nb_cards = sum(hand.bit_count() for hand in position.hands)
+    depth = nb_cards if depth is None else min(depth, nb_cards)
+    game, trick = setup(position)
+    return count(game.players[position.seat_to_play], trick, depth)
+
+
+def divide(position: Position, depth: Optional[int] = None,
+           pool: Optional[concurrent.futures.Executor] = None) -> Dict[str, int]:
+    """Count of the sequences after every first card, on pool if given."""
+    game, trick = setup(position)
+    player = game.players[position.seat_to_play]
+    cards = player.legal_moves(trick)
+    children = []
+    for card in cards:
+        child_game, child_trick = setup(position)
+        child_player, child_trick = play(
+            child_game.players[position.seat_to_play], child_trick, card)
+        children.append(position_of(child_game, child_player, child_trick))
+    depths = [None if depth is None else depth - 1] * len(children)
+    if pool is None:
+        counts = map(perft_position, children, depths)
+    else:
+        counts = pool.map(perft_position, children, depths)
+    return {card.to_string(): n for card, n in zip(cards, counts)}
+
+
+def perft(position: Position, depth: Optional[int] = None,
+          pool: Optional[concurrent.futures.Executor] = None) -> int:
+    """Sequences of depth cards, of all the cards left if depth is None or
+    beyond the end of the deal."""
+    if depth == 0 or not any(position.hands):
+        return 1
+    return sum(divide(position, depth, pool).values())
+
+
+def reference_moves(hand: int, trick: Sequence[int], trump: int) -> int:
+    """Moves of the rules of belote_old.py, with the duty to overtrump and
+    the partner winning the trick, written on lists of cards.
+
+    It shares no code with legal_moves_mask, so that the fuzzer compares it
+    with something else than itself.
+    """
+    cards = [CARDS[card] for card in mask_to_indexes(hand)]
+    if not trick:
+        return hand
+    trump_suit = SUITS[trump]
+    pile = [CARDS[card] for card in trick]
+    led_suit = pile[0].suit
+
+    def strength(card: Card) -> Tuple[bool, bool, int]:
+        return (card.suit == trump_suit, card.suit == led_suit,
+                card.get_rank(trump_suit))
+
+    winning_card = max(pile, key=strength)
+    partner_is_winning = pile.index(winning_card) == len(pile) - 2
+    same_suit = [card for card in cards if card.suit == led_suit]
+    trumps = [card for card in cards if card.suit == trump_suit]
+    higher_trumps = [card for card in trumps
+                     if winning_card.suit == trump_suit
+                     and card.get_rank(trump_suit)
+                     > winning_card.get_rank(trump_suit)]
+    if led_suit == trump_suit:
+        if not same_suit:
+            moves = cards
+        elif partner_is_winning:
+            moves = same_suit
+        else:
+            moves = higher_trumps or same_suit
+    elif same_suit:
+        moves = same_suit
+    elif trumps:
+        if partner_is_winning:
+            moves = trumps
+        else:
+            moves = higher_trumps or trumps
+    else:
+        moves = cards
+    return cards_to_mask(moves)
+
+
+def mask_moves(hand: int, trick: Sequence[int], trump: int) -> int:
+    """Moves of rules.legal_moves_mask, the winner found from the cards."""
+    if not trick:
+        return hand
+    led_suit = trick[0] >> 3
+    strengths = TRICK_STRENGTHS[trump][led_suit]
+    winner = max(range(len(trick)), key=lambda i: strengths[trick[i]])
+    return legal_moves_mask(hand, led_suit, trump, trick[winner],
+                            winner == len(trick) - 2)
+
+
+def player_moves(hand: int, trick: Sequence[int], trump: int) -> int:
+    """Moves of Player.legal_moves, on the game objects."""
+    seat = len(trick)
+    hands = tuple(hand if i == seat else 0 for i in range(4))
+    game, game_trick = setup(Position(hands, trump, 0, tuple(trick)))
+    return cards_to_mask(game.players[seat].legal_moves(game_trick))
+
+
+def old_moves(hand: int, trick: Sequence[int], trump: int) -> int:
+    """Moves of belote_old.Player.legal_moves."""
+    # belote_old is only needed for this generator
+    import belote_old
+    player = belote_old.Player()
+    player.hand = [belote_old.CARDS[CARDS[card].to_string()]
+                   for card in mask_to_indexes(hand)]
+    pile = [belote_old.CARDS[CARDS[card].to_string()] for card in trick]
+    moves = player.legal_moves(belote_old.Suit(SUITS[trump].value), pile)
+    return cards_to_mask(
+        Card.from_string(f'{card.rank.value}{card.suit.value}')
+        for card in moves)
+
+
+GENERATORS: Dict[str, MoveGenerator] = {
+    'mask': mask_moves,
+    'player': player_moves,
+    'old': old_moves,
+}
+
+
+@dataclass
+class Mismatch:
+    generator: str
+    position: Position
+    # Moves of reference_moves and of the generator, as masks
+    expected: int
+    moves: int
+
+    def __str__(self) -> str:
+        position = self.position
+        trick = [CARDS[card] for card in position.trick]
+        return (f'{self.generator}: trump {SUITS[position.trump].value}, '
+                f'trick {trick} led by {position.leader}, hand '
+                f'{mask_to_cards(position.hands[position.seat_to_play])}: '
+                f'expected {mask_to_cards(self.expected)}, '
+                f'got {mask_to_cards(self.moves)}')
+
+
+def fuzz(nb_positions: int, seed: int = 0,
+         generators: Optional[Dict[str, MoveGenerator]] = None
+         ) -> Iterator[Mismatch]:
+    """Compare the generators with reference_moves on random positions."""
+    if generators is None:
+        generators = GENERATORS
+    rng = random.Random(seed)
+    for _ in range(nb_positions):
+        position = random_position(rng, rng.randrange(len(CARDS)))
+        hand = position.hands[position.seat_to_play]
+        expected = reference_moves(hand, position.trick, position.trump)
+        for name, generator in generators.items():
+            moves = generator(hand, position.trick, position.trump)
+            if moves != expected:
+                yield Mismatch(name, position, expected, moves)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--depth', type=int, default=6,
+                        help='Cards to play, 0 for the whole deal')
+    parser.add_argument('--played', type=int, default=0,
+                        help='Random cards played before counting')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--fuzz', type=int, metavar='POSITIONS',
+                        help='Compare the generators instead of counting')
+    args = parser.parse_args()
+
+    if args.fuzz is not None:
+        mismatches: Dict[str, List[Mismatch]] = {name: [] for name in GENERATORS}
+        for mismatch in fuzz(args.fuzz, args.seed):
+            mismatches[mismatch.generator].append(mismatch)
+        for name, found in mismatches.items():
+            print(f'{name}: {len(found)} mismatches in {args.fuzz} positions')
+            for mismatch in found[:3]:
+                print(f'  {mismatch}')
+        return
+
+    position = random_position(random.Random(args.seed), args.played)
+    depth = args.depth or None
+    start = time.perf_counter()
+    with concurrent.futures.ProcessPoolExecutor(args.workers) as pool:
+        counts = divide(position, depth, pool)
+    duration = time.perf_counter() - start
+    for card, n in counts.items():
+        print(f'{card:4} {n}')
+    total = sum(counts.values())
+    print(f'{total} sequences in {duration:.3f}s, {total / duration:.0f}/s')
+
+
+if __name__ == '__main__':
+    main()
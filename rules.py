@@ -0,0 +1,347 @@
+"""The rules of Belote: cards, their order and value, and the legal moves.
+
+This module has no side effect and only imports the standard library, so
+that the engine, the bots and the pool workers start fast.
+"""
+import random
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+class Rank(Enum):
+    ACE = 'A'
+    KING = 'K'
+    QUEEN = 'Q'
+    JACK = 'J'
+    TEN = '10'
+    NINE = '9'
+    EIGHT = '8'
+    SEVEN = '7'
+
+
+TRUMP_ORDER: Dict[Rank, int] = {
+    Rank.SEVEN: 0,
+    Rank.EIGHT: 1,
+    Rank.QUEEN: 2,
+    Rank.KING: 3,
+    Rank.TEN: 4,
+    Rank.ACE: 5,
+    Rank.NINE: 6,
+    Rank.JACK: 7,
+}
+NORMAL_ORDER: Dict[Rank, int] = {
+    Rank.SEVEN: 0,
+    Rank.EIGHT: 1,
+    Rank.NINE: 2,
+    Rank.JACK: 3,
+    Rank.QUEEN: 4,
+    Rank.KING: 5,
+    Rank.TEN: 6,
+    Rank.ACE: 7,
+}
+TRUMP_VALUE: Dict[Rank, int] = {
+    Rank.SEVEN: 0,
+    Rank.EIGHT: 0,
+    Rank.QUEEN: 3,
+    Rank.KING: 4,
+    Rank.TEN: 10,
+    Rank.ACE: 11,
+    Rank.NINE: 14,
+    Rank.JACK: 20,
+}
+NORMAL_VALUE: Dict[Rank, int] = {
+    Rank.SEVEN: 0,
+    Rank.EIGHT: 0,
+    Rank.NINE: 0,
+    Rank.JACK: 2,
+    Rank.QUEEN: 3,
+    Rank.KING: 4,
+    Rank.TEN: 10,
+    Rank.ACE: 11,
+}
+
+
+class Suit(Enum):
+    DIAMOND = '♦'
+    HEARTS = '♥'
+    SPADES = '♠'
+    CLUBS = '♣'
+
+
+# Every card is also a bit of a 32-bit integer, 8 bits per suit. Inside a
+# suit, the bits follow the natural sequence 7, 8, 9, 10, J, Q, K, A.
+SUITS: Tuple[Suit, ...] = tuple(Suit)
+SEQUENCE: Tuple[Rank, ...] = (
+    Rank.SEVEN,
+    Rank.EIGHT,
+    Rank.NINE,
+    Rank.TEN,
+    Rank.JACK,
+    Rank.QUEEN,
+    Rank.KING,
+    Rank.ACE,
+)
+SUIT_INDEX: Dict[Suit, int] = {suit: index for index, suit in enumerate(SUITS)}
+
+
+@dataclass(frozen=True)
+class Card:
+    rank: Rank
+    suit: Suit
+    index: int = field(init=False, repr=False, compare=False)
+    bit: int = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        index = SUIT_INDEX[self.suit] * 8 + SEQUENCE.index(self.rank)
+        object.__setattr__(self, 'index', index)
+        object.__setattr__(self, 'bit', 1 << index)
+
+    def get_value(self, trump: Suit) -> int:
+        if self.suit == trump:
+            return TRUMP_VALUE[self.rank]
+        else:
+            return NORMAL_VALUE[self.rank]
+
+    def get_rank(self, trump: Suit) -> int:
+        if self.suit == trump:
+            return TRUMP_ORDER[self.rank]
+        else:
+            return NORMAL_ORDER[self.rank]
+
+    def to_string(self) -> str:
+        """Inverse of from_string."""
+        return f'{self.rank.value}{self.suit.value}'
+
+    @classmethod
+    def from_string(cls, s: str):
+        """The card of CARDS written s."""
+        try:
+            return _CARDS_BY_STRING[s]
+        except KeyError:
+            raise ValueError(f'{s} is not a valid card.')
+
+    def __repr__(self) -> str:
+        cls_name = self.__class__.__name__
+        return f'<{cls_name}: {self.rank.value}{self.suit.value}>'
+
+
+# The 32 cards, ordered by their index
+CARDS: Tuple[Card, ...] = tuple(
+    Card(rank, suit) for suit in SUITS for rank in SEQUENCE
+)
+_CARDS_BY_STRING: Dict[str, Card] = {card.to_string(): card for card in CARDS}
+ALL_CARDS_MASK = (1 << len(CARDS)) - 1
+NB_TRICKS = 8
+SUIT_MASKS: Tuple[int, ...] = tuple(0xff << (8 * i) for i in range(len(SUITS)))
+
+# Per card lookup tables, indexed by Card.index
+TRUMP_RANKS: Tuple[int, ...] = tuple(TRUMP_ORDER[card.rank] for card in CARDS)
+NORMAL_RANKS: Tuple[int, ...] = tuple(NORMAL_ORDER[card.rank] for card in CARDS)
+TRUMP_VALUES: Tuple[int, ...] = tuple(TRUMP_VALUE[card.rank] for card in CARDS)
+NORMAL_VALUES: Tuple[int, ...] = tuple(NORMAL_VALUE[card.rank] for card in CARDS)
+# Cards of the same suit that beat a card when its suit is the trump
+HIGHER_TRUMPS: Tuple[int, ...] = tuple(
+    sum(other.bit for other in CARDS
+        if other.suit == card.suit
+        and TRUMP_ORDER[other.rank] > TRUMP_ORDER[card.rank])
+    for card in CARDS
+)
+# Strength of every card in a trick, indexed by trump, led suit and card.
+# The card with the highest strength wins the trick.
+TRICK_STRENGTHS: Tuple[Tuple[Tuple[int, ...], ...], ...] = tuple(
+    tuple(
+        tuple(
+            16 + TRUMP_RANKS[card.index] if card.suit == trump
+            else 8 + NORMAL_RANKS[card.index] if card.suit == led_suit
+            else 0
+            for card in CARDS
+        )
+        for led_suit in SUITS
+    )
+    for trump in SUITS
+)
+# Points of every card, indexed by trump and card
+CARD_VALUES: Tuple[Tuple[int, ...], ...] = tuple(
+    tuple(
+        TRUMP_VALUES[card.index] if card.suit == trump
+        else NORMAL_VALUES[card.index]
+        for card in CARDS
+    )
+    for trump in SUITS
+)
+# Cards of each suit for every value of the suit's byte
+_SUIT_BYTE_CARDS: Tuple[Tuple[Tuple[Card, ...], ...], ...] = tuple(
+    tuple(
+        tuple(CARDS[8 * suit_index + i] for i in range(8) if byte >> i & 1)
+        for byte in range(256)
+    )
+    for suit_index in range(len(SUITS))
+)
+_SUIT_BYTE_INDEXES: Tuple[Tuple[Tuple[int, ...], ...], ...] = tuple(
+    tuple(tuple(card.index for card in cards) for cards in suit_cards)
+    for suit_cards in _SUIT_BYTE_CARDS
+)
+# Same, from the weakest to the strongest card, indexed by trump, suit and
+# byte. The last trump index is for no trump.
+_SUIT_BYTE_CARDS_BY_RANK: Tuple[
+    Tuple[Tuple[Tuple[Card, ...], ...], ...], ...] = tuple(
+    tuple(
+        tuple(
+            tuple(sorted(cards, key=lambda card: (
+                TRUMP_RANKS if suit_index == trump else NORMAL_RANKS)[card.index]))
+            for cards in suit_cards
+        )
+        for suit_index, suit_cards in enumerate(_SUIT_BYTE_CARDS)
+    )
+    for trump in range(len(SUITS) + 1)
+)
+
+
+def cards_to_mask(cards: Iterable[Card]) -> int:
+    mask = 0
+    for card in cards:
+        mask |= card.bit
+    return mask
+
+
+def mask_to_indexes(mask: int) -> List[int]:
+    return [
+        *_SUIT_BYTE_INDEXES[0][mask & 0xff],
+        *_SUIT_BYTE_INDEXES[1][mask >> 8 & 0xff],
+        *_SUIT_BYTE_INDEXES[2][mask >> 16 & 0xff],
+        *_SUIT_BYTE_INDEXES[3][mask >> 24 & 0xff],
+    ]
+
+
+def mask_to_cards(mask: int) -> List[Card]:
+    return [
+        *_SUIT_BYTE_CARDS[0][mask & 0xff],
+        *_SUIT_BYTE_CARDS[1][mask >> 8 & 0xff],
+        *_SUIT_BYTE_CARDS[2][mask >> 16 & 0xff],
+        *_SUIT_BYTE_CARDS[3][mask >> 24 & 0xff],
+    ]
+
+
+def legal_moves_mask(hand: int, led_suit: int, trump: int,
+                     winning_card: int, partner_is_winning: bool) -> int:
+    """Return the playable cards of hand, as a mask.
+
+    led_suit and trump are suit indexes, winning_card is the index of the
+    card currently winning the trick.
+    """
+    same_suit = hand & SUIT_MASKS[led_suit]
+    if led_suit == trump:
+        if not same_suit:
+            return hand
+        if partner_is_winning:
+            return same_suit
+        return same_suit & HIGHER_TRUMPS[winning_card] or same_suit
+
+    if same_suit:
+        return same_suit
+    trumps = hand & SUIT_MASKS[trump]
+    if trumps:
+        if partner_is_winning:
+            return trumps
+        if winning_card >> 3 == trump:
+            return trumps & HIGHER_TRUMPS[winning_card] or trumps
+        return trumps
+    # At this point, you can play whatever you want.
+    return hand
+
+
+class Hand:
+    """Cards of a player, indexed by suit.
+
+    The cards are the bits of mask, a byte per suit, so adding, removing and
+    taking the cards of a suit are bit operations. Once the trump is set,
+    the cards of every suit are iterated from the weakest to the strongest.
+    """
+
+    def __init__(self, cards: Iterable[Card] = ()) -> None:
+        self.mask = cards_to_mask(cards)
+        self.trump: Optional[int] = None
+        self.by_rank = _SUIT_BYTE_CARDS_BY_RANK[len(SUITS)]
+
+    def set_trump(self, trump: Optional[int]) -> None:
+        self.trump = trump
+        self.by_rank = _SUIT_BYTE_CARDS_BY_RANK[
+            len(SUITS) if trump is None else trump]
+
+    def add(self, card: Card) -> None:
+        self.mask |= card.bit
+
+    def remove(self, card: Card) -> None:
+        if not self.mask & card.bit:
+            raise ValueError(f'{card} is not in the hand')
+        self.mask &= ~card.bit
+
+    def clear(self) -> None:
+        self.mask = 0
+
+    def suit(self, suit: int) -> int:
+        """Cards of a suit, as a mask."""
+        return self.mask & SUIT_MASKS[suit]
+
+    def trumps_above(self, card: Card) -> int:
+        """Trumps beating card, which has to be a trump, as a mask."""
+        return self.mask & HIGHER_TRUMPS[card.index]
+
+    def cards(self, mask: int) -> List[Card]:
+        """Cards of mask, by suit and rank."""
+        by_rank = self.by_rank
+        return [
+            *by_rank[0][mask & 0xff],
+            *by_rank[1][mask >> 8 & 0xff],
+            *by_rank[2][mask >> 16 & 0xff],
+            *by_rank[3][mask >> 24 & 0xff],
+        ]
+
+    def __iter__(self) -> Iterator[Card]:
+        return iter(self.cards(self.mask))
+
+    def __len__(self) -> int:
+        return self.mask.bit_count()
+
+    def __contains__(self, card: Card) -> bool:
+        return bool(self.mask & card.bit)
+
+    def __repr__(self) -> str:
+        return repr(self.cards(self.mask))
+
+
+class Deck:
+    def __init__(self):
+        self.cards: List[Card] = list(CARDS)
+        # There should be 32 cards
+        assert len(self.cards) == 32
+        random.shuffle(self.cards)
+
+    def cut(self, index: int) -> None:
+        assert 0 <= index < len(self.cards)
+
+        first_chunk = self.cards[:index]
+        second_chunk = self.cards[index:]
+
+        # We should cut at least 3 cards
+        assert len(first_chunk) >= 3
+        assert len(second_chunk) >= 3
+
+        self.cards[:] = second_chunk + first_chunk
+
+    def pop_many(self, nb_cards: int) -> List[Card]:
+        cards = [self.cards.pop() for _ in range(nb_cards)]
+
+        assert len(cards) == nb_cards
+        return cards
+
+    def peek(self) -> Card:
+        return self.cards[-1]
+
+    def __len__(self) -> int:
+        return len(self.cards)
+
+    def __repr__(self) -> str:
+        cls_name = self.__class__.__name__
+        return f'<{cls_name}: {repr(self.cards)}>'
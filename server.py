@@ -0,0 +1,692 @@
+"""The Belote server: a lobby seating the connections at tables.
+
+Importing this module has no side effect; the server only starts from the
+command line:
+
+    python server.py --port 8888 --bot-delay 5
+"""
+import argparse
+import asyncio
+import concurrent.futures
+import itertools
+import secrets
+import signal
+import socket
+from typing import Callable, Dict, List, Optional, Tuple
+
+import metrics
+from belote import Belote, Outbox, Player, Snapshot, Trick, encode
+from bots import (
+    TAKE_THRESHOLD,
+    BidProblem,
+    CardProblem,
+    MonteCarlo,
+    best,
+    evaluate_cards,
+    evaluate_trumps,
+)
+from checkpoints import Checkpoints, read_checkpoints
+from deadlines import TimerWheel
+from equity import EquityTable
+from gamelog import GameLog
+from handoff import MAX_DATA, Handoff
+from rules import (
+    ALL_CARDS_MASK,
+    CARDS,
+    SUIT_INDEX,
+    SUITS,
+    mask_to_indexes,
+)
+
+# Length of the reconnection tokens, in hexadecimal digits. The first 2
+# digits are the worker of the seat.
+TOKEN_SIZE = 32
+
+
+def token_worker(token: str) -> Optional[int]:
+    try:
+        return int(token[:2], 16)
+    except ValueError:
+        return None
+
+
+class BotPlayer(Player):
+    """A server-side player answering the prompts of Belote.start.
+
+    The decisions run on the Monte Carlo pool, so the event loop keeps
+    serving the other tables meanwhile. With an equity table, the first
+    round of the bidding is looked up.
+    """
+
+    def __init__(self, game: Belote, monte_carlo: MonteCarlo,
+                 equity: Optional[EquityTable] = None) -> None:
+        super().__init__()
+        self.game = game
+        self.monte_carlo = monte_carlo
+        self.equity = equity
+        self.prompt = ''
+
+    def send_message(self, msg: str):
+        self.prompt = msg
+
+    def send_bytes(self, data: bytes):
+        pass
+
+    @property
+    def seat(self) -> int:
+        return self.game.players.index(self)
+
+    def bid_problem(self) -> BidProblem:
+        game = self.game
+        return BidProblem(self.seat, self.hand_mask,
+                          game.players.index(game.dealer), game.card.index)
+
+    async def recv_message(self, default=None):
+        turned_suit = self.game.card.index >> 3
+        if self.prompt.startswith('Do you want to take the card?'):
+            if self.equity is not None:
+                problem = self.bid_problem()
+                average = self.equity.lookup(
+                    problem.hand, problem.turned,
+                    (problem.seat - problem.dealer) & 3)
+                if average is not None:
+                    return 'yes' if average > TAKE_THRESHOLD else 'no'
+            average, = await self.monte_carlo.evaluate_async(
+                evaluate_trumps, self.bid_problem(), [turned_suit])
+            return 'yes' if average > TAKE_THRESHOLD else 'no'
+        if self.prompt.startswith('What should be the trump?'):
+            choices = [suit for suit in range(len(SUITS)) if suit != turned_suit]
+            averages = await self.monte_carlo.evaluate_async(
+                evaluate_trumps, self.bid_problem(), choices)
+            trump, average = best(choices, averages)
+            return SUITS[trump].value if average > TAKE_THRESHOLD else 'no'
+        return ''
+
+    def card_problem(self, trick: Trick) -> CardProblem:
+        game = self.game
+        players = game.players
+        # The cards of a restored deal's finished tricks are not in
+        # game.tricks, but they are in no hand
+        played = ALL_CARDS_MASK
+        for player in players:
+            played &= ~player.hand.mask
+        return CardProblem(
+            seat=self.seat,
+            hand=self.hand_mask,
+            trump=SUIT_INDEX[game.trump],
+            leader=players.index(trick.pile[0][0]) if trick.pile else self.seat,
+            trick=[(players.index(player), card.index)
+                   for player, card in trick.pile],
+            played=played,
+            counts=[len(player.hand) for player in players],
+            scores=[team.score for team in game.teams],
+            taker=players.index(game.bidder),
+            turned=game.card.index,
+            possible=(None if game.knowledge is None
+                      else game.knowledge.possible(self.seat, self.hand_mask)),
+        )
+
+    async def ask_to_play(self, trick: Trick):
+        legal = self.legal_moves_mask(trick)
+        if legal & (legal - 1):
+            cards = mask_to_indexes(legal)
+            averages = await self.monte_carlo.evaluate_async(
+                evaluate_cards, self.card_problem(trick), cards)
+            card, _ = best(cards, averages)
+        else:
+            card = legal.bit_length() - 1
+        self.plays(trick, CARDS[card])
+
+
+def bot_factory(monte_carlo: MonteCarlo,
+                equity: Optional[EquityTable] = None
+                ) -> Callable[[Belote], BotPlayer]:
+    """Bots of the lobby's tables, sharing monte_carlo and equity."""
+    return lambda game: BotPlayer(game, monte_carlo, equity)
+
+
+class Lobby:
+    """Seat the connections at tables of 4 players.
+
+    Tables are created when 4 connections are waiting, and dropped when their
+    game is over. The players who are still connected go back to the waiting
+    line. With a bot_factory, the connections waiting for more than bot_delay
+    seconds are seated with bots. The deals are appended to log if given.
+    With a turn_timeout, the players who don't answer in time get the
+    default answer. With a target, the tables play matches to target points
+    instead of single deals.
+
+    Every seated player gets a token, to take the seat back from a new
+    connection after a disconnection. The connections join the waiting line
+    after their first line only, so that a connection taking a seat back is
+    never seated at a new table. With checkpoints, the state of the
+    tables is saved before every trick, and restore_tables() resumes them
+    after a restart.
+
+    With a handoff, the lobby is the worker handoff.worker of shards.py. The
+    tokens of the seats of the other workers are passed to them with their
+    connection.
+    """
+
+    def __init__(self, loop,
+                 bot_factory: Optional[Callable[[Belote], Player]] = None,
+                 bot_delay: float = 5, log: Optional[GameLog] = None,
+                 turn_timeout: Optional[float] = None,
+                 checkpoints: Optional[Checkpoints] = None,
+                 target: int = 0,
+                 handoff_directory: Optional[str] = None,
+                 worker: int = 0) -> None:
+        self.loop = loop
+        self.log = log
+        self.waiting: Dict['BeloteProtocol', None] = {}
+        self.tables: Dict[asyncio.Task, List['BeloteProtocol']] = {}
+        # Table of every seated connection
+        self.protocol_tables: Dict['BeloteProtocol', asyncio.Task] = {}
+        self.games: Dict[asyncio.Task, Belote] = {}
+        # Players of the tables, by token
+        self.seats: Dict[str, Tuple[asyncio.Task, Player]] = {}
+        self.checkpoints = checkpoints
+        self.table_ids = itertools.count(1)
+        self.nb_finished_tables = 0
+        self.nb_dropped = 0
+        self.bot_factory = bot_factory
+        self.bot_delay = bot_delay
+        self.outbox = Outbox(loop)
+        self.turn_timeout = turn_timeout
+        self.target = target
+        self.wheel = None if turn_timeout is None else TimerWheel(loop)
+        self.worker = worker
+        self.handoff = None
+        if handoff_directory is not None:
+            self.handoff = Handoff(loop, handoff_directory, worker, self.adopt)
+
+    def join(self, protocol: 'BeloteProtocol') -> None:
+        # The messages go through the protocol for the flow control
+        protocol.player = Player(protocol, self.outbox, self.wheel,
+                                 self.turn_timeout)
+        self.waiting[protocol] = None
+        if len(self.waiting) >= 4:
+            self.open_table()
+        elif self.bot_factory is not None:
+            self.loop.call_later(self.bot_delay, self.seat_with_bots, protocol)
+
+    def leave(self, protocol: 'BeloteProtocol') -> None:
+        self.waiting.pop(protocol, None)
+
+    def seat_with_bots(self, protocol: 'BeloteProtocol') -> None:
+        # The connection may have been seated or closed in the meantime
+        if protocol in self.waiting:
+            self.open_table()
+
+    def open_table(self) -> None:
+        protocols = list(itertools.islice(self.waiting, 4))
+        game = Belote(self.log, self.target)
+        for protocol in protocols:
+            del self.waiting[protocol]
+            game.add_player(protocol.player)
+        while len(game.players) < 4:
+            game.add_player(self.bot_factory(game))
+        task = game.start_game_if_ready(self.loop)
+        self.add_table(task, game, protocols)
+        for protocol in protocols:
+            protocol.player.token = (f'{self.worker:02x}'
+                                     + secrets.token_hex(TOKEN_SIZE // 2 - 1))
+            protocol.player.send_message(
+                f'Your token is {protocol.player.token}')
+            self.seats[protocol.player.token] = (task, protocol.player)
+
+    def add_table(self, task: asyncio.Task, game: Belote,
+                  protocols: List['BeloteProtocol']) -> None:
+        if not game.table_id:
+            game.table_id = next(self.table_ids)
+        if self.checkpoints is not None:
+            game.on_trick = self.checkpoint
+        self.tables[task] = protocols
+        for protocol in protocols:
+            self.protocol_tables[protocol] = task
+        self.games[task] = game
+        task.add_done_callback(self.close_table)
+
+    def checkpoint(self, game: Belote) -> None:
+        tokens = b''.join(
+            (player.token or '').encode().ljust(TOKEN_SIZE, b'\0')
+            for player in game.players)
+        self.checkpoints.save(game.table_id, tokens + game.snapshot().pack())
+
+    def restore_tables(self, states: Dict[int, bytes]) -> None:
+        """Resume the tables saved by the checkpoints.
+
+        The seats wait for their players to reconnect with their token,
+        except the bots' seats, which get new bots.
+        """
+        for table_id, state in states.items():
+            game = Belote()
+            game.table_id = table_id
+            for seat in range(4):
+                token = state[seat * TOKEN_SIZE:(seat + 1) * TOKEN_SIZE]
+                token = token.rstrip(b'\0').decode()
+                if token or self.bot_factory is None:
+                    player = Player(None, self.outbox, self.wheel,
+                                    self.turn_timeout)
+                    player.token = token or None
+                    player.disconnect()
+                else:
+                    player = self.bot_factory(game)
+                game.add_player(player)
+            game.restore(Snapshot.unpack(state[4 * TOKEN_SIZE:]))
+            task = self.loop.create_task(game.resume())
+            self.add_table(task, game, [])
+            for player in game.players:
+                if player.token is not None:
+                    self.seats[player.token] = (task, player)
+        # Don't reuse the ids of the restored tables
+        self.table_ids = itertools.count(max(states, default=0) + 1)
+
+    def resume(self, protocol: 'BeloteProtocol', token: str) -> bool:
+        """Seat a connection in place of the disconnected player of token.
+
+        The seats of the other workers are handed off.
+        """
+        worker = token_worker(token)
+        if (self.handoff is not None and worker != self.worker
+                and worker is not None and self.handoff.has_worker(worker)):
+            protocol.handoff = (worker, token)
+            return True
+        task, player = self.seats.get(token, (None, None))
+        if player is None or not player.disconnected:
+            return False
+        protocols = self.tables[task]
+        if player.transport in protocols:
+            protocols.remove(player.transport)
+            del self.protocol_tables[player.transport]
+        protocols.append(protocol)
+        self.protocol_tables[protocol] = task
+        protocol.player = player
+        player.reconnect(protocol)
+        self.games[task].send_state(player)
+        return True
+
+    def hand_off(self, protocol: 'BeloteProtocol') -> None:
+        """Pass a connection to the worker of the token it resumes."""
+        worker, token = protocol.handoff
+        data = protocol.replay(token)
+        if len(data) <= MAX_DATA:
+            sock = protocol.transport.get_extra_info('socket').dup()
+            self.handoff.send(worker, sock, data)
+        # The connection lives on in the other worker
+        protocol.transport.abort()
+
+    def adopt(self, sock: socket.socket, data: bytes) -> None:
+        """Serve a connection handed off by another worker."""
+        self.loop.create_task(self.adopt_async(sock, data))
+
+    async def adopt_async(self, sock: socket.socket, data: bytes) -> None:
+        _, protocol = await self.loop.connect_accepted_socket(
+            lambda: BeloteProtocol(self, greet=False), sock)
+        protocol.data_received(data)
+
+    def close(self) -> None:
+        if self.wheel is not None:
+            self.wheel.close()
+        if self.handoff is not None:
+            self.handoff.close()
+
+    @property
+    def nb_connections(self) -> int:
+        return len(self.waiting) + sum(map(len, self.tables.values()))
+
+    def close_table(self, task: asyncio.Task) -> None:
+        protocols = self.tables.pop(task)
+        for protocol in protocols:
+            del self.protocol_tables[protocol]
+        game = self.games.pop(task)
+        for player in game.players:
+            self.seats.pop(player.token, None)
+        if self.checkpoints is not None:
+            self.checkpoints.discard(game.table_id)
+        self.nb_finished_tables += 1
+        players = [protocol.player for protocol in protocols]
+        nb_messages = sum(player.nb_messages for player in players)
+        nb_bytes = sum(player.nb_bytes for player in players)
+        metrics.TABLE_MESSAGES.observe(nb_messages)
+        metrics.TABLE_BYTES.observe(nb_bytes)
+        metrics.MESSAGES.inc(nb_messages)
+        metrics.MESSAGE_BYTES.inc(nb_bytes)
+        if not task.cancelled() and task.exception() is not None:
+            self.loop.call_exception_handler({
+                'message': 'Belote table failed',
+                'exception': task.exception(),
+                'task': task,
+            })
+        for protocol in protocols:
+            if not protocol.transport.is_closing():
+                self.join(protocol)
+
+    def drop(self, protocol: 'BeloteProtocol') -> None:
+        """Close a connection which does not read its messages.
+
+        Its table is forfeited: the other players go back to the waiting
+        line.
+        """
+        protocol.transport.abort()
+        self.nb_dropped += 1
+        self.leave(protocol)
+        self.forfeit(protocol)
+
+    def forfeit(self, protocol: 'BeloteProtocol') -> None:
+        """Stop the table of a connection, without the connection."""
+        task = self.protocol_tables.pop(protocol, None)
+        if task is not None:
+            self.tables[task].remove(protocol)
+            task.cancel()
+
+    def buffered(self) -> Dict['BeloteProtocol', int]:
+        """Bytes waiting to be sent, by connection."""
+        protocols = itertools.chain(self.waiting, *self.tables.values())
+        return {protocol: protocol.buffered for protocol in protocols}
+
+
+# Answers sent as a single byte frame by the clients using the binary
+# framing, indexed by their code
+FRAME_CODES: Tuple[str, ...] = (
+    *(card.to_string() for card in CARDS),
+    'no',
+    'yes',
+    *(suit.value for suit in SUITS),
+)
+_FRAME_CODE_INDEX: Dict[str, int] = {
+    answer: code for code, answer in enumerate(FRAME_CODES)}
+
+
+def encode_frame(message: str) -> bytes:
+    """Frame of a message, for the clients using the binary framing."""
+    code = _FRAME_CODE_INDEX.get(message)
+    if code is not None:
+        return bytes((1, code))
+    data = message.encode()
+    if len(data) > 0xff:
+        raise ValueError(f'{message} is too long for a frame')
+    return bytes((len(data),)) + data
+
+
+def decode_frame(payload: bytes) -> str:
+    if len(payload) == 1 and payload[0] < len(FRAME_CODES):
+        return FRAME_CODES[payload[0]]
+    return payload.decode(errors='replace')
+
+
+# First message of the connections, as they are seated after their first line
+GREETING = encode("Send 'play' to join or 'resume <token>'")
+
+
+class BeloteProtocol(asyncio.Protocol):
+    """A connection, writing with flow control.
+
+    Above high_water bytes in the transport buffer, the messages are kept in
+    a backlog until the transport drains below low_water. When the backlog
+    exceeds max_backlog bytes, the lobby drops the connection.
+
+    The client sends lines of at most max_line bytes. After a 'binary' line,
+    it sends frames instead: a length byte and the message, the answers of
+    FRAME_CODES being sent as their single byte code.
+
+    A new client is greeted with GREETING. It first sends 'resume <token>'
+    to take its seat back, or any other message, such as 'play', to join the
+    waiting line. The connection is closed after an unknown token, and
+    handed off to its worker after the token of another worker. Once the
+    connection has joined, a 'resume' line is an answer like any other.
+    """
+    high_water = 64 * 1024
+    low_water = 16 * 1024
+    max_backlog = 256 * 1024
+    max_line = 1024
+
+    def __init__(self, lobby: Lobby, greet: bool = True):
+        super().__init__()
+        self.lobby = lobby
+        self.greet = greet
+        self.transport: asyncio.Transport = None
+        self.player: Player = None
+        self.paused = False
+        self.backlog: List[bytes] = []
+        self.backlog_size = 0
+        # Received bytes of the messages not complete yet
+        self.buffer = bytearray()
+        # The first bytes of the buffer without a newline
+        self.scanned = 0
+        self.binary = False
+        # Worker and token of the seat to hand the connection off to
+        self.handoff: Optional[Tuple[int, str]] = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+        transport.set_write_buffer_limits(self.high_water, self.low_water)
+        if self.greet:
+            self.write(GREETING)
+
+    def write(self, data: bytes) -> None:
+        if self.transport.is_closing():
+            return
+        if not self.paused:
+            self.transport.write(data)
+            return
+        self.backlog.append(data)
+        self.backlog_size += len(data)
+        if self.backlog_size > self.max_backlog:
+            self.lobby.drop(self)
+
+    def is_closing(self) -> bool:
+        return self.transport.is_closing()
+
+    @property
+    def buffered(self) -> int:
+        """Bytes waiting to be sent to the client."""
+        return self.transport.get_write_buffer_size() + self.backlog_size
+
+    def pause_writing(self):
+        self.paused = True
+
+    def resume_writing(self):
+        self.paused = False
+        if self.backlog:
+            data = b''.join(self.backlog)
+            self.backlog.clear()
+            self.backlog_size = 0
+            self.transport.write(data)
+
+    def connection_lost(self, exc):
+        self.lobby.leave(self)
+        if self.player is not None:
+            self.player.disconnect()
+        self.backlog.clear()
+        self.backlog_size = 0
+
+    def data_received(self, data):
+        self.buffer += data
+        if self.binary:
+            self.read_frames()
+        else:
+            self.read_lines()
+        if self.handoff is not None:
+            self.lobby.hand_off(self)
+
+    def stopped(self) -> bool:
+        """Whether the received messages are no longer read here."""
+        return self.transport.is_closing() or self.handoff is not None
+
+    def replay(self, token: str) -> bytes:
+        """Bytes resuming the seat of token, then the unread messages."""
+        if self.binary:
+            resume = b'binary\n' + encode_frame(f'resume {token}')
+        else:
+            resume = f'resume {token}\n'.encode()
+        return resume + self.buffer
+
+    def read_lines(self) -> None:
+        buffer = self.buffer
+        start = 0
+        end = buffer.find(b'\n', self.scanned)
+        while end >= 0:
+            if end - start > self.max_line:
+                self.lobby.drop(self)
+                return
+            line = buffer[start:end]
+            start = end + 1
+            self.message_received(line.decode(errors='replace').strip())
+            if self.stopped():
+                del buffer[:start]
+                return
+            if self.binary:
+                del buffer[:start]
+                self.read_frames()
+                return
+            end = buffer.find(b'\n', start)
+        del buffer[:start]
+        self.scanned = len(buffer)
+        if self.scanned > self.max_line:
+            self.lobby.drop(self)
+
+    def read_frames(self) -> None:
+        buffer = self.buffer
+        start = 0
+        while start < len(buffer):
+            end = start + 1 + buffer[start]
+            if end > len(buffer):
+                break
+            payload = buffer[start + 1:end]
+            start = end
+            self.message_received(decode_frame(payload))
+            if self.stopped():
+                break
+        del buffer[:start]
+
+    def message_received(self, message: str) -> None:
+        # The lines of the players are answers
+        if message.startswith('resume ') and self.player is None:
+            if not self.lobby.resume(self, message[len('resume '):]):
+                # One guess per connection
+                self.write(encode('Unknown token'))
+                self.transport.close()
+        elif message == 'binary':
+            self.binary = True
+        elif self.player is None:
+            self.lobby.join(self)
+        else:
+            self.player.queue.put_nowait(message)
+
+
+def serve(host: str = '127.0.0.1', port: int = 8888,
+          reuse_port: bool = False, debug: bool = False,
+          bot_delay: Optional[float] = None,
+          log_path: Optional[str] = None,
+          metrics_port: Optional[int] = None,
+          turn_timeout: Optional[float] = 30,
+          checkpoint_path: Optional[str] = None,
+          target: int = 0, equity_path: Optional[str] = None,
+          worker: int = 0, handoff_directory: Optional[str] = None) -> None:
+    """Serve tables, filled with bots after bot_delay seconds if given.
+
+    The deals are logged to log_path if given. The metrics are served on
+    metrics_port of the local host if given. The players have turn_timeout
+    seconds to answer. The tables are checkpointed to checkpoint_path if
+    given, and the tables found there are resumed. With a target, the
+    tables play matches to target points. The bots look up the first round
+    of the bidding in the equity table at equity_path if given. The
+    workers of shards.py hand the connections off to each other through
+    handoff_directory.
+    """
+    equity = None if equity_path is None else EquityTable(equity_path)
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    loop.set_debug(debug)
+    log = None if log_path is None else GameLog(log_path, loop=loop)
+    checkpoints = None
+    if checkpoint_path is not None:
+        # Read before the checkpoints overwrite the file
+        states = read_checkpoints(checkpoint_path)
+        checkpoints = Checkpoints(loop, checkpoint_path)
+    if bot_delay is None:
+        lobby = Lobby(loop, log=log, turn_timeout=turn_timeout,
+                      checkpoints=checkpoints, target=target,
+                      handoff_directory=handoff_directory, worker=worker)
+    else:
+        pool = concurrent.futures.ProcessPoolExecutor()
+        monte_carlo = MonteCarlo(pool=pool, time_budget=1)
+        lobby = Lobby(loop, bot_factory(monte_carlo, equity), bot_delay, log,
+                      turn_timeout, checkpoints, target, handoff_directory,
+                      worker)
+    if checkpoint_path is not None:
+        lobby.restore_tables(states)
+    server = loop.run_until_complete(loop.create_server(
+        lambda: BeloteProtocol(lobby), host, port, reuse_port=reuse_port))
+    metrics.TABLES.function = lambda: len(lobby.tables)
+    metrics.CONNECTIONS.function = lambda: lobby.nb_connections
+    lag_monitor = metrics.LagMonitor(loop)
+    lag_monitor.start()
+    if metrics_port is not None:
+        metrics_server = loop.run_until_complete(
+            metrics.serve_metrics('127.0.0.1', metrics_port))
+
+    # Serve requests until Ctrl+C is pressed or SIGTERM is received, as the
+    # workers of shards.py are stopped
+    loop.add_signal_handler(signal.SIGTERM, loop.stop)
+    print('Serving on {}'.format(server.sockets[0].getsockname()))
+    try:
+        loop.run_forever()
+    except KeyboardInterrupt:
+        pass
+
+    # Close the server
+    lag_monitor.stop()
+    lobby.close()
+    server.close()
+    loop.run_until_complete(server.wait_closed())
+    if metrics_port is not None:
+        metrics_server.close()
+        loop.run_until_complete(metrics_server.wait_closed())
+    if checkpoints is not None:
+        checkpoints.close()
+    loop.close()
+    if bot_delay is not None:
+        pool.shutdown(cancel_futures=True)
+    if log is not None:
+        log.close()
+    if equity is not None:
+        equity.close()
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """Options of serve(), shared with shards.py."""
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8888)
+    parser.add_argument('--debug', action='store_true',
+                        help='Run the event loop in debug mode')
+    parser.add_argument('--bot-delay', type=float,
+                        help='Seat the waiting players with bots after this '
+                        'many seconds')
+    parser.add_argument('--log', help='Append the deals to this file')
+    parser.add_argument('--metrics-port', type=int)
+    parser.add_argument('--turn-timeout', type=float, default=30)
+    parser.add_argument('--target', type=int, default=0,
+                        help='Play matches to this many points instead of '
+                        'single deals')
+    parser.add_argument('--checkpoint',
+                        help='Checkpoint the tables to this file')
+    parser.add_argument('--equity',
+                        help='Equity table of the bidding of the bots, built '
+                        'by equity.py')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    serve(args.host, args.port, debug=args.debug, bot_delay=args.bot_delay,
+          log_path=args.log, metrics_port=args.metrics_port,
+          turn_timeout=args.turn_timeout, checkpoint_path=args.checkpoint,
+          target=args.target, equity_path=args.equity)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""Run the server in several worker processes sharing the same port.
+
+Every worker has its own event loop and Lobby. The kernel spreads the
+incoming connections between the workers (SO_REUSEPORT), and a table is
+made of connections accepted by the same worker, so the game state never
+leaves the process. A client taking its seat back from a new connection
+usually reaches another worker: the connection is handed off to the worker
+of the seat, known from the token (see handoff.py).
+
+The options are the ones of server.py, and every worker logs the deals and
+checkpoints its tables to its own file, suffixed with its index. The worker
+i serves its metrics on --metrics-port + i:
+
+    python shards.py --workers 4 --bot-delay 5 --log deals.log
+"""
+import argparse
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+from typing import List, Optional
+
+from server import add_arguments, serve
+
+
+def worker_path(path: Optional[str], worker: int) -> Optional[str]:
+    """The file of a worker, as the workers can't share one."""
+    return None if path is None else f'{path}.{worker}'
+
+
+def start_workers(host: str, port: int, nb_workers: int, debug: bool = False,
+                  metrics_port: Optional[int] = None,
+                  bot_delay: Optional[float] = None,
+                  log_path: Optional[str] = None,
+                  turn_timeout: Optional[float] = 30,
+                  checkpoint_path: Optional[str] = None,
+                  target: int = 0, equity_path: Optional[str] = None,
+                  handoff_directory: Optional[str] = None
+                  ) -> List[multiprocessing.Process]:
+    """The worker i serves its metrics on metrics_port + i.
+
+    The other options are the ones of serve(), log_path and checkpoint_path
+    being suffixed with the index of the worker. The workers hand the
+    connections off to each other through handoff_directory if given.
+    """
+    workers = [
+        multiprocessing.Process(
+            target=serve, args=(host, port),
+            kwargs={'reuse_port': True, 'debug': debug,
+                    'bot_delay': bot_delay,
+                    'log_path': worker_path(log_path, i),
+                    'metrics_port': metrics_port and metrics_port + i,
+                    'turn_timeout': turn_timeout,
+                    'checkpoint_path': worker_path(checkpoint_path, i),
+                    'target': target, 'equity_path': equity_path,
+                    'worker': i, 'handoff_directory': handoff_directory},
+            name=f'belote-worker-{i}', daemon=True)
+        for i in range(nb_workers)
+    ]
+    for worker in workers:
+        worker.start()
+    return workers
+
+
+def stop_workers(workers: List[multiprocessing.Process],
+                 timeout: float = 0) -> None:
+    """Give the workers timeout seconds to exit, then send them SIGTERM.
+
+    Either way, they write their logs and checkpoints before exiting.
+    """
+    deadline = time.monotonic() + timeout
+    for worker in workers:
+        worker.join(max(0, deadline - time.monotonic()))
+    for worker in workers:
+        if worker.is_alive():
+            worker.terminate()
+    for worker in workers:
+        worker.join()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_arguments(parser)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    handoff_directory = tempfile.mkdtemp(prefix='belote-')
+    workers = start_workers(
+        args.host, args.port, args.workers, args.debug, args.metrics_port,
+        args.bot_delay, args.log, args.turn_timeout, args.checkpoint,
+        args.target, args.equity, handoff_directory)
+    try:
+        for worker in workers:
+            worker.join()
+    except KeyboardInterrupt:
+        # The workers got the SIGINT too, and are closing
+        pass
+    finally:
+        stop_workers(workers, timeout=10)
+        shutil.rmtree(handoff_directory, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,375 @@
+"""Double dummy solver for the card play.
+
+Given the four hands, the trump and the player who leads, it computes the
+points both teams get in the remaining tricks when everybody plays
+perfectly, knowing all the cards.
+
+It is an alpha-beta search on the rules of legal_moves_mask and
+TRICK_STRENGTHS. The hands only lose cards during the search, so the set of
+remaining cards and the leader identify a position at the start of a trick:
+the bounds found for it are kept in a transposition table.
+
+After the first card of a node, the others are searched with a null window,
+which only tells whether they are better. The card that caused the last
+cutoff with the same legal cards against the same winning card is tried
+first, and the last card of a trick is skipped when the table already
+bounds the position after it.
+"""
+from typing import Dict, List, Sequence, Tuple
+
+from engine import LAST_TRICK_BONUS
+from rules import (
+    CARD_VALUES,
+    CARDS,
+    NORMAL_RANKS,
+    SUITS,
+    TRICK_STRENGTHS,
+    TRUMP_RANKS,
+    legal_moves_mask,
+    mask_to_indexes,
+)
+
+# Cards that win over a card, indexed by trump, led suit and card
+BEATEN_BY: Tuple[Tuple[Tuple[int, ...], ...], ...] = tuple(
+    tuple(
+        tuple(
+            sum(1 << other for other in range(len(CARDS))
+                if strengths[other] > strengths[card])
+            for card in range(len(CARDS))
+        )
+        for strengths in led_strengths
+    )
+    for led_strengths in TRICK_STRENGTHS
+)
+
+
+def _rank(i: int, is_trump: bool) -> int:
+    return (TRUMP_RANKS if is_trump else NORMAL_RANKS)[i]
+
+
+def _value(i: int, is_trump: bool) -> int:
+    # CARD_VALUES[0] holds the values when the first suit is the trump
+    return CARD_VALUES[0 if is_trump else 1][i]
+
+
+def _suit_orders(key) -> Tuple[Tuple[Tuple[Tuple[int, ...], ...], ...], ...]:
+    """For every suit, as a plain suit and as the trump, and every value of
+    the suit's byte: the cards of the byte sorted by key(i, is_trump), where
+    i is the position of the card in the byte."""
+    return tuple(
+        tuple(
+            tuple(
+                tuple(8 * suit + i for i in sorted(
+                    (i for i in range(8) if byte >> i & 1),
+                    key=lambda i: key(i, is_trump)))
+                for byte in range(256)
+            )
+            for is_trump in (False, True)
+        )
+        for suit in range(len(SUITS))
+    )
+
+
+_STRONGEST_FIRST = _suit_orders(lambda i, is_trump: -_rank(i, is_trump))
+_CHEAPEST_FIRST = _suit_orders(
+    lambda i, is_trump: (_value(i, is_trump), _rank(i, is_trump)))
+_MOST_VALUABLE_FIRST = _suit_orders(
+    lambda i, is_trump: (-_value(i, is_trump), _rank(i, is_trump)))
+
+
+def _equivalents(is_trump: bool, alive: int, byte: int) -> int:
+    """Cards of byte that can be dropped from the search: the ones with the
+    same value as the card of byte just below them among the alive cards."""
+    dropped = 0
+    previous = -1
+    for i in sorted(range(8), key=lambda i: _rank(i, is_trump)):
+        if not alive >> i & 1:
+            continue
+        if (byte >> i & 1 and previous >= 0 and byte >> previous & 1
+                and _value(i, is_trump) == _value(previous, is_trump)):
+            dropped |= 1 << i
+        previous = i
+    return dropped
+
+
+# Filled on demand, indexed by is_trump << 16 | alive << 8 | byte
+_EQUIVALENTS: Dict[int, int] = {}
+
+
+class Solver:
+    def __init__(self, hands: Sequence[int], trump: int) -> None:
+        self.hands: List[int] = list(hands)
+        self.trump = trump
+        self.values = CARD_VALUES[trump]
+        self.strengths = TRICK_STRENGTHS[trump]
+        self.beaten_by = BEATEN_BY[trump]
+        # Cards to try, in order, for the legal cards in a context
+        self.orders: Dict[int, Tuple[int, ...]] = {}
+        # remaining cards and leader -> (lower bound, upper bound)
+        self.table: Dict[int, Tuple[int, int]] = {}
+        # Last card that caused a cutoff, by legal cards and winning card
+        self.killers: Dict[int, int] = {}
+        self.nodes = 0
+
+    def solve(self, leader: int) -> Tuple[int, int]:
+        """Return the points of both teams in the remaining tricks."""
+        remaining = self.hands[0] | self.hands[1] | self.hands[2] | self.hands[3]
+        points = sum(self.values[card] for card in mask_to_indexes(remaining))
+        if remaining:
+            points += LAST_TRICK_BONUS
+        value = self.search(remaining, leader, points, -1, points + 1)
+        return value, points - value
+
+    def lead_values(self, leader: int) -> Dict[int, int]:
+        """Points of the team 0 in the remaining tricks for every card the
+        leader can lead."""
+        remaining = self.hands[0] | self.hands[1] | self.hands[2] | self.hands[3]
+        points = sum(self.values[card] for card in mask_to_indexes(remaining))
+        points += LAST_TRICK_BONUS
+        return {
+            card: self.play(remaining, remaining & ~(1 << card),
+                            (leader + 1) & 3, 1, card >> 3, leader, card,
+                            self.values[card], points, -1, points + 1)
+            for card in mask_to_indexes(self.hands[leader])
+        }
+
+    def search(self, remaining: int, leader: int, points: int,
+               alpha: int, beta: int) -> int:
+        """Points of the team 0 from the start of a trick, fail-soft.
+
+        points is what is still to be won, including the last trick bonus.
+        """
+        if not remaining:
+            return 0
+        if remaining.bit_count() == 4:
+            return self.last_trick(remaining, leader, points)
+        # Nothing can be won outside of [0, points]
+        if alpha >= points:
+            return points
+        if beta <= 0:
+            return 0
+
+        key = remaining << 2 | leader
+        lower, upper = self.table.get(key, (0, points))
+        if lower >= beta:
+            return lower
+        if upper <= alpha:
+            return upper
+        if lower == upper:
+            return lower
+        alpha = max(alpha, lower - 1)
+        beta = min(beta, upper + 1)
+
+        value = self.play(remaining, remaining, leader, 0, 0, leader, 0, 0,
+                          points, alpha, beta)
+        if value <= alpha:
+            upper = value
+        elif value >= beta:
+            lower = value
+        else:
+            lower = upper = value
+        self.table[key] = (lower, upper)
+        return value
+
+    def last_trick(self, remaining: int, leader: int, points: int) -> int:
+        """Every player has one card left: there is nothing to choose."""
+        led_card = (self.hands[leader] & remaining).bit_length() - 1
+        strengths = self.strengths[led_card >> 3]
+        winner, winning_card = leader, led_card
+        for i in range(1, 4):
+            seat = (leader + i) & 3
+            card = (self.hands[seat] & remaining).bit_length() - 1
+            if strengths[card] > strengths[winning_card]:
+                winner, winning_card = seat, card
+        return 0 if winner & 1 else points
+
+    def play(self, trick_start: int, remaining: int, seat: int, position: int,
+             led_suit: int, winner: int, winning_card: int, trick_points: int,
+             points: int, alpha: int, beta: int) -> int:
+        """Points of the team 0 when seat plays the position-th card.
+
+        trick_start is the remaining cards at the start of the trick.
+        """
+        self.nodes += 1
+        hand = self.hands[seat] & remaining
+        if position:
+            strengths = self.strengths[led_suit]
+            partner_is_winning = (winner ^ seat) & 1 == 0
+            legal = legal_moves_mask(hand, led_suit, self.trump, winning_card,
+                                     partner_is_winning)
+            # The forced cards are played here, without a node of their own
+            while not legal & (legal - 1):
+                card = legal.bit_length() - 1
+                if strengths[card] > strengths[winning_card]:
+                    winner, winning_card = seat, card
+                remaining &= ~(1 << card)
+                trick_points += self.values[card]
+                if position == 3:
+                    if winner & 1:
+                        return self.search(remaining, winner,
+                                           points - trick_points, alpha, beta)
+                    return trick_points + self.search(
+                        remaining, winner, points - trick_points,
+                        alpha - trick_points, beta - trick_points)
+                seat = (seat + 1) & 3
+                position += 1
+                partner_is_winning = (winner ^ seat) & 1 == 0
+                legal = legal_moves_mask(
+                    self.hands[seat] & remaining, led_suit, self.trump,
+                    winning_card, partner_is_winning)
+        else:
+            partner_is_winning = False
+            legal = hand
+
+        killer_key = 0
+        if legal & (legal - 1):
+            # The order only depends on the alive cards of the suits of legal
+            present = legal | legal >> 4
+            present |= present >> 2
+            present |= present >> 1
+            key = (trick_start & (present & 0x01010101) * 0xff) << 32 | legal
+            if not position:
+                key <<= 2
+            elif partner_is_winning:
+                key = key << 2 | 1
+            else:
+                key = (key << 32 | legal & self.beaten_by[led_suit][winning_card]) << 2 | 2
+            cards = self.orders.get(key)
+            if cards is None:
+                cards = self.orders[key] = tuple(self.order(
+                    self.drop_equivalents(legal, trick_start), trick_start,
+                    position, led_suit, winning_card, partner_is_winning))
+            killer_key = legal << 5 | winning_card
+            first = self.killers.get(killer_key, -1)
+            if first != cards[0] and first in cards:
+                cards = (first, *[card for card in cards if card != first])
+        else:
+            cards = (legal.bit_length() - 1,)
+
+        maximizing = seat & 1 == 0
+        if position == 3 and killer_key:
+            # Enhanced transposition cutoff: a bound of the table after one of
+            # the cards may be enough
+            table = self.table
+            for card in cards:
+                if strengths[card] > strengths[winning_card]:
+                    new_winner = seat
+                else:
+                    new_winner = winner
+                bounds = table.get((remaining & ~(1 << card)) << 2 | new_winner)
+                if bounds is None:
+                    continue
+                won = 0 if new_winner & 1 else trick_points + self.values[card]
+                if maximizing:
+                    if won + bounds[0] >= beta:
+                        return won + bounds[0]
+                elif won + bounds[1] <= alpha:
+                    return won + bounds[1]
+        best = -1 if maximizing else points + 1
+        for card in cards:
+            if not position:
+                led_suit = card >> 3
+                strengths = self.strengths[led_suit]
+                new_winner, new_winning_card = seat, card
+            elif strengths[card] > strengths[winning_card]:
+                new_winner, new_winning_card = seat, card
+            else:
+                new_winner, new_winning_card = winner, winning_card
+            new_remaining = remaining & ~(1 << card)
+            new_trick_points = trick_points + self.values[card]
+
+            # Principal variation search: after the first card, a null window
+            # tells whether a card is better, and only then its value
+            low, high = alpha, beta
+            if card != cards[0] and high - low > 1:
+                if maximizing:
+                    high = low + 1
+                else:
+                    low = high - 1
+            while True:
+                if position == 3:
+                    if new_winner & 1:
+                        value = self.search(new_remaining, new_winner,
+                                            points - new_trick_points,
+                                            low, high)
+                    else:
+                        value = new_trick_points + self.search(
+                            new_remaining, new_winner, points - new_trick_points,
+                            low - new_trick_points, high - new_trick_points)
+                else:
+                    value = self.play(trick_start, new_remaining, (seat + 1) & 3,
+                                      position + 1, led_suit, new_winner,
+                                      new_winning_card, new_trick_points, points,
+                                      low, high)
+                if (low, high) == (alpha, beta) or not alpha < value < beta:
+                    break
+                low, high = alpha, beta
+
+            if maximizing:
+                if value > best:
+                    best = value
+                    if best > alpha:
+                        alpha = best
+            elif value < best:
+                best = value
+                if best < beta:
+                    beta = best
+            if alpha >= beta:
+                if killer_key:
+                    self.killers[killer_key] = card
+                break
+        return best
+
+    def drop_equivalents(self, legal: int, alive: int) -> int:
+        """Keep one card of every group of equivalent cards."""
+        for suit in range(len(SUITS)):
+            shift = 8 * suit
+            byte = legal >> shift & 0xff
+            if byte & (byte - 1):
+                key = (suit == self.trump) << 16 | (alive >> shift & 0xff) << 8 | byte
+                dropped = _EQUIVALENTS.get(key)
+                if dropped is None:
+                    dropped = _EQUIVALENTS[key] = _equivalents(
+                        suit == self.trump, alive >> shift & 0xff, byte)
+                legal &= ~(dropped << shift)
+        return legal
+
+    def order(self, legal: int, alive: int, position: int, led_suit: int,
+              winning_card: int, partner_is_winning: bool) -> List[int]:
+        """Try the most promising cards first.
+
+        The leader starts with the masters of the plain suits, then the
+        trumps from the strongest, then the cheapest cards. When the partner
+        is winning, the most valuable cards are given. Otherwise, the
+        cheapest cards winning the trick are tried first, then the cheapest
+        cards.
+        """
+        trump = self.trump
+        cards: List[int] = []
+        if not position:
+            others: List[int] = []
+            for suit in range(len(SUITS)):
+                byte = legal >> (8 * suit) & 0xff
+                if not byte or suit == trump:
+                    continue
+                master = _STRONGEST_FIRST[suit][False][alive >> (8 * suit) & 0xff][0]
+                if legal >> master & 1:
+                    cards.append(master)
+                    byte &= ~(1 << (master & 7))
+                others += _CHEAPEST_FIRST[suit][False][byte]
+            cards += _STRONGEST_FIRST[trump][True][legal >> (8 * trump) & 0xff]
+            cards += others
+        elif partner_is_winning:
+            for suit in range(len(SUITS)):
+                cards += _MOST_VALUABLE_FIRST[suit][suit == trump][legal >> (8 * suit) & 0xff]
+        else:
+            winning = legal & BEATEN_BY[trump][led_suit][winning_card]
+            for mask in (winning, legal & ~winning):
+                if mask:
+                    for suit in range(len(SUITS)):
+                        cards += _CHEAPEST_FIRST[suit][suit == trump][mask >> (8 * suit) & 0xff]
+        return cards
+
+
+def solve(hands: Sequence[int], trump: int, leader: int) -> Tuple[int, int]:
+    return Solver(hands, trump).solve(leader)
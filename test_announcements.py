@@ -0,0 +1,63 @@
+from unittest import TestCase
+
+from announcements import (
+    announcement_scores,
+    has_belote,
+    hand_announcements,
+)
+from rules import Card
+
+
+def mask(*cards: str) -> int:
+    return sum(1 << Card.from_string(card).index for card in cards)
+
+
+class AnnouncementsTest(TestCase):
+    def points(self, *cards: str):
+        return sorted(announcement.points
+                      for announcement in hand_announcements(mask(*cards)))
+
+    def test_sequences(self):
+        self.assertEqual(self.points('7♠', '8♠', '9♠'), [20])
+        self.assertEqual(self.points('10♥', 'J♥', 'Q♥', 'K♥'), [50])
+        self.assertEqual(self.points('9♦', '10♦', 'J♦', 'Q♦', 'K♦', 'A♦'),
+                         [100])
+        self.assertEqual(self.points('7♣', '8♣', '9♣', 'J♣', 'Q♣', 'K♣'),
+                         [20, 20])
+        self.assertEqual(self.points('7♣', '8♣', '10♣', 'J♣', 'A♥'), [])
+
+    def test_carres(self):
+        self.assertEqual(self.points('J♠', 'J♥', 'J♦', 'J♣'), [200])
+        self.assertEqual(self.points('9♠', '9♥', '9♦', '9♣'), [150])
+        self.assertEqual(self.points('A♠', 'A♥', 'A♦', 'A♣'), [100])
+        self.assertEqual(self.points('7♠', '7♥', '7♦', '7♣'), [])
+        self.assertEqual(
+            self.points('J♠', 'J♥', 'J♦', 'J♣', 'Q♠', 'K♠', '9♥', '10♥'),
+            [20, 20, 200])
+
+    def test_belote(self):
+        self.assertTrue(has_belote(mask('K♥', 'Q♥', '7♠'), 1))
+        self.assertFalse(has_belote(mask('K♥', 'Q♥', '7♠'), 0))
+        self.assertFalse(has_belote(mask('K♥', 'J♥'), 1))
+
+    def test_scores(self):
+        hands = [mask('7♠', '8♠', '9♠', '7♥', '8♥', '9♥', '10♥'),
+                 mask('J♦', 'Q♦', 'K♦'),
+                 mask('A♣', 'K♣', 'Q♣'),
+                 mask('K♠', 'Q♠')]
+        # The team of the strongest announcement scores all of its own, the
+        # other one only its belote-rebelote
+        self.assertEqual(announcement_scores(hands, 2), [50 + 20 + 20, 20])
+        hands[1] |= mask('J♠', 'J♥', 'J♦', 'J♣')
+        self.assertEqual(announcement_scores(hands, 2), [0, 200 + 20 + 20])
+
+    def test_ties(self):
+        hands = [mask('10♠', 'J♠', 'Q♠'), mask('10♥', 'J♥', 'Q♥'), 0, 0]
+        # The sequence of the trump is the strongest
+        self.assertEqual(announcement_scores(hands, 1), [0, 20])
+        self.assertEqual(announcement_scores(hands, 2), [20, 0])
+        # Without the trump, neither team scores
+        self.assertEqual(announcement_scores(hands, 3), [0, 0])
+        # The highest card breaks the ties of points
+        hands[1] = mask('J♥', 'Q♥', 'K♥')
+        self.assertEqual(announcement_scores(hands, 3), [0, 20])
@@ -0,0 +1,56 @@
+from unittest import SkipTest, TestCase
+
+try:
+    import numpy as np
+except ImportError:
+    raise SkipTest('NumPy is not installed')
+
+from batch import (
+    TURNED_POSITION,
+    deal_hands,
+    hand_features,
+    hand_masks,
+    shuffled_decks,
+)
+from belote import Player, initialize_double_linked_list
+from rules import CARDS, SUITS, Deck, cards_to_mask
+
+
+class BatchTest(TestCase):
+    def setUp(self):
+        self.decks = shuffled_decks(50, np.random.default_rng(0))
+
+    def test_decks_are_permutations(self):
+        self.assertTrue((np.sort(self.decks, axis=1) == np.arange(32)).all())
+
+    def test_deal_matches_players(self):
+        for row, (dealer, taker) in zip(self.decks, [(1, 2), (3, 3), (0, 1)]):
+            deck = Deck()
+            deck.cards = [CARDS[card] for card in row]
+            players = [Player() for _ in range(4)]
+            initialize_double_linked_list(players)
+            players[dealer].deal_5_cards(deck)
+            self.assertEqual(deck.peek().index, row[TURNED_POSITION])
+            players[dealer].deal_remaining(deck, players[taker])
+
+            masks = hand_masks(deal_hands(row[None], dealer, taker))[0]
+            self.assertEqual(masks.tolist(),
+                             [cards_to_mask(p.hand) for p in players])
+
+    def test_features(self):
+        hands = deal_hands(self.decks, dealer=2, taker=0)
+        features = hand_features(hand_masks(hands))
+        for deal in range(len(hands)):
+            for seat in range(4):
+                cards = [CARDS[card] for card in hands[deal, seat]]
+                for trump_index, trump in enumerate(SUITS):
+                    trumps = [card for card in cards if card.suit == trump]
+                    ranks = {card.rank.value for card in trumps}
+                    self.assertEqual(features.points[deal, seat, trump_index],
+                                     sum(card.get_value(trump) for card in cards))
+                    self.assertEqual(
+                        features.trump_count[deal, seat, trump_index], len(trumps))
+                    self.assertEqual(
+                        features.has_jack[deal, seat, trump_index], 'J' in ranks)
+                    self.assertEqual(
+                        features.has_nine[deal, seat, trump_index], '9' in ranks)
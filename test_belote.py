@@ -1,6 +1,28 @@
+import asyncio
+import random
 from unittest import TestCase
 
-from belote import Player, initialize_double_linked_list
+from belote import (
+    MAX_PLAY_ATTEMPTS,
+    Belote,
+    Outbox,
+    Player,
+    Snapshot,
+    Trick,
+    initialize_double_linked_list,
+)
+from rules import (
+    ALL_CARDS_MASK,
+    CARDS,
+    SUIT_INDEX,
+    SUIT_MASKS,
+    Card,
+    Hand,
+    Suit,
+    cards_to_mask,
+    legal_moves_mask,
+    mask_to_cards,
+)
 
 
 class InitializeDoubleLinkedList(TestCase):
@@ -23,3 +45,351 @@ class InitializeDoubleLinkedList(TestCase):
 
         self.assertEqual(player_4.next, player_1)
         self.assertEqual(player_4.previous, player_3)
+
+
+class CardMasks(TestCase):
+    def test_cards_have_distinct_bits(self):
+        self.assertEqual(cards_to_mask(CARDS), ALL_CARDS_MASK)
+        self.assertEqual(mask_to_cards(ALL_CARDS_MASK), list(CARDS))
+
+    def test_from_string(self):
+        for card in CARDS:
+            self.assertIs(Card.from_string(card.to_string()), card)
+        for s in ('', '♠', '1♠', 'A', 'A♠ '):
+            with self.assertRaises(ValueError):
+                Card.from_string(s)
+
+    def test_suit_masks(self):
+        for suit_mask, suit in zip(SUIT_MASKS, Suit):
+            self.assertEqual(
+                mask_to_cards(suit_mask),
+                [card for card in CARDS if card.suit == suit])
+
+    def test_must_follow_suit(self):
+        hand = cards_to_mask(map(Card.from_string, ['7♥', 'A♥', 'J♠']))
+        legal = legal_moves_mask(hand, SUIT_INDEX[Suit.HEARTS],
+                                 SUIT_INDEX[Suit.SPADES],
+                                 Card.from_string('10♥').index, False)
+        self.assertEqual(mask_to_cards(legal),
+                         [Card.from_string('7♥'), Card.from_string('A♥')])
+
+    def test_must_overtrump(self):
+        hand = cards_to_mask(map(Card.from_string, ['7♠', 'J♠', 'A♥']))
+        legal = legal_moves_mask(hand, SUIT_INDEX[Suit.DIAMOND],
+                                 SUIT_INDEX[Suit.SPADES],
+                                 Card.from_string('9♠').index, False)
+        self.assertEqual(mask_to_cards(legal), [Card.from_string('J♠')])
+
+    def test_partner_is_winning(self):
+        hand = cards_to_mask(map(Card.from_string, ['7♠', 'J♠', 'A♥']))
+        legal = legal_moves_mask(hand, SUIT_INDEX[Suit.DIAMOND],
+                                 SUIT_INDEX[Suit.SPADES],
+                                 Card.from_string('9♠').index, True)
+        self.assertEqual(mask_to_cards(legal),
+                         [Card.from_string('7♠'), Card.from_string('J♠')])
+
+
+class FakeTransport:
+    def __init__(self):
+        self.closing = False
+        self.written = []
+
+    def write(self, data):
+        self.written.append(data)
+
+    def is_closing(self):
+        return self.closing
+
+    def close(self):
+        self.closing = True
+
+    abort = close
+
+    def set_write_buffer_limits(self, high=None, low=None):
+        pass
+
+    def get_write_buffer_size(self):
+        return 0
+
+
+class HandTest(TestCase):
+    def setUp(self):
+        self.hand = Hand(Card.from_string(s)
+                         for s in ('A♠', 'J♠', '10♥', '9♠', '7♥', 'K♠'))
+
+    def cards(self, *strings):
+        return [Card.from_string(s) for s in strings]
+
+    def test_order_by_rank(self):
+        self.assertEqual(list(self.hand),
+                         self.cards('7♥', '10♥', '9♠', 'J♠', 'K♠', 'A♠'))
+        self.hand.set_trump(SUIT_INDEX[Suit.SPADES])
+        self.assertEqual(list(self.hand),
+                         self.cards('7♥', '10♥', 'K♠', 'A♠', '9♠', 'J♠'))
+
+    def test_lookups(self):
+        self.assertEqual(len(self.hand), 6)
+        self.assertEqual(self.hand.suit(SUIT_INDEX[Suit.HEARTS]),
+                         cards_to_mask(self.cards('7♥', '10♥')))
+        self.assertEqual(self.hand.trumps_above(Card.from_string('A♠')),
+                         cards_to_mask(self.cards('9♠', 'J♠')))
+
+    def test_remove(self):
+        self.hand.remove(Card.from_string('J♠'))
+        self.assertNotIn(Card.from_string('J♠'), self.hand)
+        with self.assertRaises(ValueError):
+            self.hand.remove(Card.from_string('J♠'))
+
+
+class OutboxTest(TestCase):
+    def test_one_write_per_step(self):
+        loop = asyncio.new_event_loop()
+        self.addCleanup(loop.close)
+        outbox = Outbox(loop)
+        game = Belote()
+        for _ in range(4):
+            game.add_player(Player(FakeTransport(), outbox))
+        game.broadcast('The card is 7♠')
+        game.players[1].send_message('Do you want to take the card?')
+
+        # The broadcast is encoded once
+        first, second = (outbox.pending[game.players[i].transport][-1]
+                         for i in (0, 2))
+        self.assertIs(first, second)
+
+        loop.run_until_complete(asyncio.sleep(0))
+        self.assertEqual(outbox.nb_writes, 4)
+        self.assertEqual(game.players[1].transport.written,
+                         [b'You are the Player 2\n'
+                          b'The card is 7\xe2\x99\xa0\n'
+                          b'Do you want to take the card?\n'])
+        self.assertEqual(outbox.pending, {})
+
+
+class TrickTest(TestCase):
+    def setUp(self):
+        self.game = Belote()
+        self.game.trump = Suit.SPADES
+        self.players = [Player() for _ in range(4)]
+        self.trick = Trick(self.game)
+
+    def play(self, *cards):
+        for player, card in zip(self.players, cards):
+            self.trick.add(player, Card.from_string(card))
+
+    def test_led_suit_wins(self):
+        self.play('10♥', 'A♦', 'K♥', 'A♣')
+        self.assertEqual(self.trick.winning_player_card,
+                         (self.players[0], Card.from_string('10♥')))
+        self.assertEqual(self.trick.total_score, 10 + 11 + 4 + 11)
+
+    def test_trump_wins(self):
+        self.play('A♥', '7♠', '9♠', '8♠')
+        self.assertEqual(self.trick.winning_player_card,
+                         (self.players[2], Card.from_string('9♠')))
+        self.assertEqual(self.trick.total_score, 11 + 0 + 14 + 0)
+
+    def test_beats(self):
+        self.play('Q♠', 'K♠')
+        self.assertTrue(self.trick.beats(Card.from_string('9♠')))
+        self.assertFalse(self.trick.beats(Card.from_string('8♠')))
+        self.assertFalse(self.trick.beats(Card.from_string('A♥')))
+
+
+def dealt_game():
+    game = Belote()
+    for _ in range(4):
+        game.add_player(Player(FakeTransport()))
+    initialize_double_linked_list(game.players)
+    game.set_teams()
+    game.dealer, taker = game.players[0], game.players[3]
+    game.dealer.deal_5_cards(game.deck)
+    game.card = game.deck.peek()
+    game.trump = game.card.suit
+    game.bidder = taker
+    taker.team.has_contract = True
+    game.dealer.deal_remaining(game.deck, taker)
+    for player in game.players:
+        player.hand.set_trump(SUIT_INDEX[game.trump])
+    return game
+
+
+class AskToPlayTest(TestCase):
+    def setUp(self):
+        self.game = dealt_game()
+        self.player = self.game.dealer.next
+        self.hand = list(self.player.hand)
+        self.other = next(card for card in CARDS
+                          if card not in self.player.hand)
+
+    def play(self, *answers):
+        """Lead a trick, answering the questions with answers, then with
+        the default card. Return the card played and the questions."""
+        answers = list(answers)
+        questions = []
+
+        async def ask(question, default):
+            questions.append(question)
+            return answers.pop(0) if answers else default
+        self.player.ask = ask
+        trick = Trick(self.game)
+        loop = asyncio.new_event_loop()
+        loop.run_until_complete(self.player.ask_to_play(trick))
+        loop.close()
+        return trick.winning_player_card[1], questions
+
+    def written(self):
+        return b''.join(self.player.transport.written).decode()
+
+    def test_ask_again(self):
+        card, questions = self.play('nope', self.other.to_string(),
+                                    self.hand[-1].to_string())
+        self.assertEqual(card, self.hand[-1])
+        self.assertEqual(len(questions), 3)
+        self.assertIn('nope is not a valid card.', self.written())
+        self.assertIn(f'{self.other} is not a legal move.', self.written())
+        self.assertNotIn(card, self.player.hand)
+
+    def test_default_after_errors(self):
+        card, questions = self.play(*['nope'] * MAX_PLAY_ATTEMPTS)
+        self.assertEqual(len(questions), MAX_PLAY_ATTEMPTS)
+        self.assertIn(card, self.hand)
+        self.assertEqual(len(self.player.hand), 7)
+
+
+class SnapshotTest(TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+
+    def test_round_trip(self):
+        game = dealt_game()
+        game.leader = game.players[1]
+        trick = Trick(game)
+        game.tricks.append(trick)
+        for player in game.leader.iter_from_self():
+            if len(trick.pile) == 2:
+                break
+            player.plays(trick, player.legal_moves(trick)[0])
+        snapshot = game.snapshot()
+        self.assertEqual(snapshot.seat_to_play, 3)
+
+        data = snapshot.pack()
+        self.assertEqual(len(data), 35)
+        self.assertEqual(Snapshot.unpack(data), snapshot)
+
+        restored = Belote()
+        for _ in range(4):
+            restored.add_player(Player(FakeTransport()))
+        restored.restore(Snapshot.unpack(data))
+        self.assertEqual(restored.snapshot(), snapshot)
+        self.assertEqual(restored.knowledge.counts,
+                         [len(player.hand) for player in restored.players])
+
+        # Nobody is connected to the restored game
+        for player in restored.players:
+            player.disconnect()
+        self.loop.run_until_complete(restored.resume())
+        self.assertEqual(restored.nb_tricks, 8)
+        self.assertEqual(sum(team.score for team in restored.teams), 162)
+        self.assertEqual(restored.knowledge.played, ALL_CARDS_MASK)
+        self.assertTrue(all(len(player.hand) == 0
+                            for player in restored.players))
+
+    def test_gather_after_restore(self):
+        game = dealt_game()
+        game.leader = game.players[1]
+        for _ in range(4):
+            trick = Trick(game)
+            game.tricks.append(trick)
+            for player in game.leader.iter_from_self():
+                player.plays(trick, player.legal_moves(trick)[0])
+            game.leader = trick.winning_player_card[0]
+            game.nb_tricks += 1
+        restored = Belote()
+        for _ in range(4):
+            restored.add_player(Player(FakeTransport()))
+        restored.restore(game.snapshot())
+
+        random.seed(0)
+        restored.gather()
+        cards = [card.index for card in restored.deck.cards]
+        self.assertEqual(sorted(cards), list(range(32)))
+        # The cards of the 4 finished tricks are not put back in order
+        played = [card.index for trick in game.tricks for _, card in trick.pile]
+        order = [card for card in cards if card in played]
+        self.assertFalse(any(order == sorted(played)[i:] + sorted(played)[:i]
+                             for i in range(len(played))))
+
+
+class ScriptedPlayer(Player):
+    """Passes the first nb_passes questions of the bidding, then takes, and
+    plays the default cards."""
+
+    def __init__(self, nb_passes: int = 0) -> None:
+        super().__init__(FakeTransport())
+        self.nb_passes = nb_passes
+
+    async def ask(self, question: str, default: str) -> str:
+        if question.startswith(('Do you want', 'What should')):
+            self.nb_passes -= 1
+            if self.nb_passes >= 0:
+                return 'no'
+            return 'yes' if question.startswith('Do') else 'no'
+        return default
+
+
+class RecordingLog:
+    def __init__(self):
+        self.records = []
+
+    def append(self, record):
+        self.records.append(record)
+
+
+class MatchTest(TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+
+    def play_match(self, nb_passes: int = 0) -> Belote:
+        game = Belote(RecordingLog(), target=500)
+        for _ in range(4):
+            game.add_player(ScriptedPlayer(nb_passes))
+        self.loop.run_until_complete(game.start_game_if_ready(self.loop))
+        return game
+
+    def test_match(self):
+        game = self.play_match()
+        records = game.log.records
+        first, second = (team.total for team in game.teams)
+        self.assertGreaterEqual(max(first, second), 500)
+        self.assertNotEqual(first, second)
+        self.assertEqual(first + second,
+                         sum(sum(record.scores) for record in records))
+        # The tricks, and the announcements if any
+        for record in records:
+            self.assertGreaterEqual(sum(record.scores), 162)
+        for previous, record in zip(records, records[1:]):
+            self.assertEqual(record.dealer, (previous.dealer + 1) & 3)
+            self.assertEqual(sorted(record.deck), list(range(32)))
+        # The tricks of the first deal were reused
+        self.assertEqual(len(game.trick_pool), 8)
+        self.assertTrue(any(b'won the match' in data
+                            for data in game.players[0].transport.written))
+        deals = [data for data in game.players[0].transport.written
+                 if data.startswith(b'Deal: ')]
+        self.assertEqual(len(deals), sum(record.taker is not None
+                                         for record in records))
+
+    def test_redeal(self):
+        game = self.play_match(nb_passes=2)
+        passed, taken = game.log.records[:2]
+        self.assertIsNone(passed.taker)
+        self.assertIsNotNone(taken.taker)
+        self.assertEqual(taken.dealer, (passed.dealer + 1) & 3)
+        # The cards left in the deck are still together after the cut
+        remaining = list(passed.deck[:12])
+        start = list(taken.deck).index(remaining[0])
+        self.assertEqual([taken.deck[(start + i) % 32] for i in range(12)],
+                         remaining)
@@ -0,0 +1,95 @@
+import asyncio
+import concurrent.futures
+import random
+import time
+from unittest import TestCase
+
+from belote import Belote
+from bots import (
+    BidProblem,
+    MonteCarlo,
+    MonteCarloStrategy,
+    evaluate_trumps,
+    playout,
+    sample_hands,
+)
+from engine import play_deal
+from rules import ALL_CARDS_MASK
+from server import BotPlayer
+
+
+class SamplingTest(TestCase):
+    def test_sample_hands(self):
+        rng = random.Random(0)
+        hand = 0xff
+        unseen = ALL_CARDS_MASK & ~hand & ~(1 << 8)
+        for _ in range(20):
+            hands = sample_hands(rng, 0, hand, unseen, [8, 7, 8, 8],
+                                 holder=3, card=31)
+            self.assertEqual(hands[0], hand)
+            self.assertEqual([h.bit_count() for h in hands], [8, 7, 8, 8])
+            self.assertEqual(hands[0] | hands[1] | hands[2] | hands[3] | 1 << 8,
+                             ALL_CARDS_MASK)
+            self.assertTrue(hands[3] >> 31 & 1)
+
+    def test_playout(self):
+        cards = random.Random(1).sample(range(32), 32)
+        hands = [sum(1 << card for card in cards[i::4]) for i in range(4)]
+        self.assertEqual(sum(playout(hands, 2, 1, (), (0, 0))), 162)
+
+
+class DeadlineTest(TestCase):
+    problem = BidProblem(seat=1, hand=0x1f, dealer=0, turned=31)
+
+    def test_passed_deadline(self):
+        _, nb_done = evaluate_trumps(self.problem, [0, 3], 50, 0,
+                                     time.time() - 1)
+        self.assertEqual(nb_done, 1)
+        _, nb_done = evaluate_trumps(self.problem, [0, 3], 50, 0)
+        self.assertEqual(nb_done, 50)
+
+    def test_running_chunks_stop(self):
+        # A single chunk far too long for the budget must not keep the worker
+        # busy for the next decision
+        with concurrent.futures.ProcessPoolExecutor(1) as pool:
+            monte_carlo = MonteCarlo(nb_samples=100_000, pool=pool,
+                                     time_budget=0.2, chunk_size=100_000,
+                                     seed=0)
+            start = time.monotonic()
+            monte_carlo.evaluate(evaluate_trumps, self.problem, [0])
+            pool.submit(sum, ()).result()
+            self.assertLess(time.monotonic() - start, 2)
+
+
+class TakeEverything:
+    def lookup(self, hand, turned, position):
+        return 162
+
+
+class BotTest(TestCase):
+    def test_equity_table(self):
+        # The first bot to speak takes, from the table
+        strategy = MonteCarloStrategy(MonteCarlo(nb_samples=2, seed=0),
+                                      TakeEverything())
+        result = play_deal([strategy] * 4, dealer=2, rng=random.Random(3))
+        self.assertEqual(result.taker, 3)
+
+    def test_strategy(self):
+        strategy = MonteCarloStrategy(MonteCarlo(nb_samples=4, seed=0))
+        result = play_deal([strategy] * 4, rng=random.Random(2))
+        self.assertIn(sum(result.scores) - sum(result.announcements), (0, 162))
+
+    def test_bots_play_a_game(self):
+        monte_carlo = MonteCarlo(nb_samples=4, chunk_size=2, seed=0)
+        game = Belote()
+        for _ in range(4):
+            game.add_player(BotPlayer(game, monte_carlo))
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(game.start_game_if_ready(loop))
+        finally:
+            loop.close()
+        if game.bidder is not None:
+            self.assertEqual(sum(team.score for team in game.teams),
+                             162 + sum(game.announcements))
+            self.assertTrue(all(not player.hand for player in game.players))
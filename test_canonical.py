@@ -0,0 +1,72 @@
+import itertools
+import random
+from unittest import TestCase
+
+from canonical import (
+    bidding_key,
+    canonical,
+    hand_key,
+    permute,
+    permute_card,
+    state_key,
+    suit_order,
+)
+from solver import solve
+
+PERMUTATIONS = list(itertools.permutations(range(4)))
+
+
+def random_hands(rng, nb_cards=8):
+    cards = rng.sample(range(32), 4 * nb_cards)
+    return [sum(1 << card for card in cards[i::4]) for i in range(4)]
+
+
+class CanonicalTest(TestCase):
+    def setUp(self):
+        self.rng = random.Random(0)
+
+    def test_hand_key(self):
+        hand = random_hands(self.rng)[0]
+        keys = {hand_key(permute(hand, order)) for order in PERMUTATIONS}
+        self.assertEqual(keys, {hand_key(hand)})
+        self.assertEqual(len({hand_key(permute(hand, order), order.index(2))
+                              for order in PERMUTATIONS}), 1)
+
+    def test_bidding_key(self):
+        hand = random_hands(self.rng, 5)[0]
+        turned = 0
+        key = bidding_key(hand, turned)
+        for order in PERMUTATIONS:
+            self.assertEqual(
+                bidding_key(permute(hand, order), permute_card(turned, order)),
+                key)
+        self.assertNotEqual(bidding_key(hand, 8), key)
+
+    def test_state_key(self):
+        hands = random_hands(self.rng, 4)
+        played = ((1 << 32) - 1) & ~(hands[0] | hands[1] | hands[2] | hands[3])
+        trick = [card for card in range(32) if played >> card & 1][:2]
+        played &= ~sum(1 << card for card in trick)
+        key = state_key(hands, 1, 3, trick, played)
+        for order in PERMUTATIONS:
+            self.assertEqual(state_key(
+                [permute(hand, order) for hand in hands], order.index(1), 3,
+                [permute_card(card, order) for card in trick],
+                permute(played, order)), key)
+        self.assertNotEqual(state_key(hands, 1, 2, trick, played), key)
+
+    def test_canonical_form(self):
+        hands = random_hands(self.rng)
+        key, order = canonical(hands, (2,))
+        self.assertEqual(order[0], 2)
+        self.assertEqual(order, suit_order(hands, (2,)))
+        self.assertEqual(canonical([permute(hand, order) for hand in hands],
+                                   (0,)), (key, (0, 1, 2, 3)))
+
+    def test_same_values(self):
+        hands = random_hands(self.rng, 4)
+        for order in PERMUTATIONS[::5]:
+            self.assertEqual(
+                solve([permute(hand, order) for hand in hands],
+                      order.index(3), 1),
+                solve(hands, 3, 1))
@@ -0,0 +1,36 @@
+import asyncio
+import os
+import tempfile
+from unittest import TestCase
+
+from checkpoints import Checkpoints, read_checkpoints
+
+
+class CheckpointsTest(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'tables.ckpt')
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+
+    def test_batched_writes(self):
+        checkpoints = Checkpoints(self.loop, self.path, interval=0.01)
+        for table_id in range(1, 101):
+            checkpoints.save(table_id, bytes([table_id]) * 3)
+        checkpoints.discard(1)
+        self.assertFalse(os.path.exists(self.path))
+
+        self.loop.run_until_complete(asyncio.sleep(0.05))
+        self.assertEqual(checkpoints.nb_writes, 1)
+        states = read_checkpoints(self.path)
+        self.assertEqual(len(states), 99)
+        self.assertEqual(states[42], b'***')
+
+        checkpoints.save(2, b'new')
+        checkpoints.close()
+        self.assertEqual(checkpoints.nb_writes, 2)
+        self.assertEqual(read_checkpoints(self.path)[2], b'new')
+
+    def test_missing_file(self):
+        self.assertEqual(read_checkpoints(self.path), {})
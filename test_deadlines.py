@@ -0,0 +1,34 @@
+import asyncio
+from unittest import TestCase
+
+from deadlines import TimerWheel
+
+
+class TimerWheelTest(TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+        self.wheel = TimerWheel(self.loop, resolution=0.01, nb_slots=4)
+        self.addCleanup(self.wheel.close)
+
+    def run_for(self, seconds):
+        self.loop.run_until_complete(asyncio.sleep(seconds))
+
+    def test_call_later(self):
+        calls = []
+        start = self.loop.time()
+        self.wheel.call_later(0.02, calls.append, 'first')
+        # Longer than the wheel: it goes around more than once
+        self.wheel.call_later(0.1, calls.append, 'second')
+        cancelled = self.wheel.call_later(0.05, calls.append, 'cancelled')
+        self.assertEqual(len(self.wheel), 3)
+        cancelled.cancel()
+        self.assertEqual(len(self.wheel), 2)
+
+        self.run_for(0.05)
+        self.assertEqual(calls, ['first'])
+        self.run_for(0.1)
+        self.assertEqual(calls, ['first', 'second'])
+        self.assertGreaterEqual(self.loop.time() - start, 0.1)
+        self.assertEqual(len(self.wheel), 0)
+        self.assertIsNone(self.wheel.handle)
@@ -0,0 +1,53 @@
+import random
+from unittest import TestCase
+
+from belote import Player, initialize_double_linked_list
+from engine import RandomStrategy, Strategy, deal_5_cards, play_deal
+from rules import CARDS, Deck, cards_to_mask
+
+
+class Taker(Strategy):
+    def choose_take(self, state):
+        return True
+
+
+class DealTest(TestCase):
+    def test_deal_order_matches_players(self):
+        deck = Deck()
+        indexes = [card.index for card in deck.cards]
+        players = [Player() for _ in range(4)]
+        initialize_double_linked_list(players)
+        players[1].deal_5_cards(deck)
+
+        hands = [0, 0, 0, 0]
+        deal_5_cards(indexes, hands, 1)
+        self.assertEqual(hands, [cards_to_mask(p.hand) for p in players])
+        self.assertEqual(indexes, [card.index for card in deck.cards])
+
+    def test_everybody_passes(self):
+        result = play_deal([Strategy()] * 4)
+        self.assertIsNone(result.taker)
+        self.assertEqual(result.moves, [])
+
+    def test_first_player_takes(self):
+        deck = list(range(len(CARDS)))
+        result = play_deal([Taker()] * 4, dealer=3, deck=deck)
+        self.assertEqual(result.taker, 0)
+        # The turned card is the 21st of the deck, and goes to the taker
+        self.assertEqual(result.trump, 11 >> 3)
+        self.assertIn((0, 11), result.moves)
+        self.assertEqual(sum(result.scores), 162 + sum(result.announcements))
+        self.assertEqual(len(result.moves), 32)
+        self.assertEqual(len(result.trick_winners), 8)
+        self.assertEqual(result.moves[0][0], 0)
+
+    def test_random_deals(self):
+        rng = random.Random(0)
+        strategies = [RandomStrategy(rng, take_probability=0.5)] * 4
+        for dealer in range(4):
+            result = play_deal(strategies, dealer=dealer, rng=rng)
+            if result.taker is not None:
+                self.assertEqual(sum(result.scores),
+                                 162 + sum(result.announcements))
+                self.assertEqual(
+                    {card for _, card in result.moves}, set(range(32)))
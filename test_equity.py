@@ -0,0 +1,53 @@
+import itertools
+import os
+import tempfile
+from unittest import TestCase
+
+from canonical import permute
+from equity import (
+    NB_HANDS,
+    NO_VALUE,
+    EquityTable,
+    build_table,
+    canonical_hands,
+    hand_rank,
+)
+
+
+class EquityTest(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'equity.table')
+
+    def test_hand_rank(self):
+        ranks = {hand_rank(sum(1 << card for card in cards))
+                 for cards in itertools.combinations(range(32), 5)}
+        self.assertEqual(ranks, set(range(NB_HANDS)))
+
+    def test_lookup(self):
+        # Ace turned, in the first suit
+        turned = 7
+        hands = list(itertools.islice(canonical_hands(turned), 10))
+        entries = [(position, turned, hand)
+                   for hand in hands for position in range(4)]
+        build_table(self.path, nb_samples=4, entries=entries, chunk_size=7)
+        with EquityTable(self.path) as table:
+            self.assertEqual(table.nb_samples, 4)
+            for hand in hands:
+                value = table.lookup(hand, turned, 1)
+                self.assertIsNotNone(value)
+                self.assertLess(value, NO_VALUE)
+                # The same hand, with the suits swapped
+                order = (2, 0, 3, 1)
+                self.assertEqual(
+                    table.lookup(permute(hand, order), 8 * order.index(0) + 7,
+                                 1),
+                    value)
+            self.assertIsNone(table.lookup(hands[0], 6, 1))
+
+    def test_not_a_table(self):
+        with open(self.path, 'wb') as file:
+            file.write(b'BELOTE\x00\x01')
+        with self.assertRaises(ValueError):
+            EquityTable(self.path)
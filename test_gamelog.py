@@ -0,0 +1,112 @@
+import asyncio
+import importlib.util
+import os
+import random
+import tempfile
+from unittest import TestCase, skipIf
+
+from belote import Belote
+from bots import MonteCarlo
+from engine import RandomStrategy, play_deal, shuffled_deck
+from gamelog import RECORD, DealRecord, GameLog, GameLogReader
+from server import BotPlayer
+
+HAS_NUMPY = importlib.util.find_spec('numpy') is not None
+
+
+def random_records(nb_records: int):
+    rng = random.Random(0)
+    records = []
+    for i in range(nb_records):
+        deck = shuffled_deck(rng)
+        record = DealRecord(list(deck), i & 3)
+        result = play_deal([RandomStrategy(rng)] * 4, record.dealer, deck)
+        record.taker, record.trump = result.taker, result.trump
+        record.plays, record.scores = result.moves, result.scores
+        records.append(record)
+    return records
+
+
+class GameLogTest(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'deals.log')
+
+    def test_flush_interval(self):
+        loop = asyncio.new_event_loop()
+        self.addCleanup(loop.close)
+        record = DealRecord(list(range(32)), 0)
+        with GameLog(self.path, loop=loop, interval=0.01) as log:
+            log.append(record)
+            log.append(record)
+            with GameLogReader(self.path) as reader:
+                self.assertEqual(len(reader), 0)
+            loop.run_until_complete(asyncio.sleep(0.05))
+            with GameLogReader(self.path) as reader:
+                self.assertEqual(list(reader), [record, record])
+            self.assertIsNone(log.handle)
+
+    def test_round_trip(self):
+        records = random_records(100)
+        with GameLog(self.path, buffer_size=RECORD.size * 7) as log:
+            for record in records[:50]:
+                log.append(record)
+        with GameLog(self.path) as log:
+            for record in records[50:]:
+                log.append(record)
+
+        with GameLogReader(self.path) as reader:
+            self.assertEqual(len(reader), 100)
+            self.assertEqual(list(reader), records)
+            self.assertEqual(reader[42], records[42])
+
+    @skipIf(not HAS_NUMPY, 'NumPy is not installed')
+    def test_array(self):
+        records = random_records(100)
+        with GameLog(self.path) as log:
+            for record in records:
+                log.append(record)
+        with GameLogReader(self.path) as reader:
+            array = reader.array()
+            self.assertEqual(array['dealer'].tolist(),
+                             [record.dealer for record in records])
+            self.assertEqual(array['scores'].sum(axis=1).tolist(),
+                             [sum(record.scores) for record in records])
+            del array
+
+    def test_truncated_record(self):
+        records = random_records(3)
+        with GameLog(self.path) as log:
+            for record in records:
+                log.append(record)
+        with open(self.path, 'r+b') as file:
+            file.truncate(os.path.getsize(self.path) - 1)
+        with GameLogReader(self.path) as reader:
+            self.assertEqual(list(reader), records[:2])
+
+        with GameLog(self.path) as log:
+            log.append(records[2])
+        with GameLogReader(self.path) as reader:
+            self.assertEqual(list(reader), records)
+
+    def test_game_is_logged(self):
+        with GameLog(self.path) as log:
+            game = Belote(log)
+            monte_carlo = MonteCarlo(nb_samples=2, seed=0)
+            for _ in range(4):
+                game.add_player(BotPlayer(game, monte_carlo))
+            loop = asyncio.new_event_loop()
+            try:
+                loop.run_until_complete(game.start_game_if_ready(loop))
+            finally:
+                loop.close()
+
+        with GameLogReader(self.path) as reader:
+            record, = reader
+        self.assertEqual(record, game.deal_record())
+        self.assertEqual(sorted(record.deck), list(range(32)))
+        if record.taker is not None:
+            self.assertEqual(len(record.plays), 32)
+            self.assertEqual(sum(record.scores),
+                             162 + sum(game.announcements))
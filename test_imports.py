@@ -0,0 +1,41 @@
+import os
+import subprocess
+import sys
+from typing import Set
+from unittest import TestCase
+
+from bench import LIBRARY_MODULES
+
+# The modules of this repository that every library module may import
+LIBRARY_IMPORTS = {
+    'rules': {'rules'},
+    'engine': {'rules', 'announcements', 'knowledge', 'engine'},
+    'bots': {'rules', 'announcements', 'knowledge', 'engine', 'canonical',
+             'equity', 'bots'},
+}
+# Slow to import, and only needed by the server or the tools: the time of the
+# imports is measured by bench.py
+HEAVY_MODULES = {'asyncio', 'numpy', 'multiprocessing', 'server'}
+
+
+def imported_modules(module: str) -> Set[str]:
+    """Top-level modules imported by module in a fresh interpreter."""
+    code = (f'import sys, {module}; '
+            "print(*{name.partition('.')[0] for name in sys.modules})")
+    output = subprocess.run([sys.executable, '-c', code], capture_output=True,
+                            text=True, check=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__)))
+    return set(output.stdout.split())
+
+
+class ImportTest(TestCase):
+    def test_library_imports(self):
+        local = {name[:-len('.py')] for name in os.listdir(
+            os.path.dirname(os.path.abspath(__file__))) if name.endswith('.py')}
+        self.assertEqual(set(LIBRARY_IMPORTS), set(LIBRARY_MODULES))
+        for module, expected in LIBRARY_IMPORTS.items():
+            with self.subTest(module=module):
+                modules = imported_modules(module)
+                self.assertEqual(modules & local, expected)
+                self.assertEqual(modules & HEAVY_MODULES, set())
+
@@ -0,0 +1,89 @@
+import random
+from unittest import TestCase
+
+from engine import RandomStrategy, play_deal
+from knowledge import Knowledge, sample_deal
+from rules import ALL_CARDS_MASK, CARDS, SUIT_MASKS, Card
+
+
+def index(card: str) -> int:
+    return Card.from_string(card).index
+
+
+class Checker(RandomStrategy):
+    """Plays randomly, checking the knowledge against the actual hands."""
+
+    uses_knowledge = True
+
+    def __init__(self, test: TestCase, rng: random.Random) -> None:
+        super().__init__(rng, take_probability=1)
+        self.test = test
+
+    def choose_card(self, state, legal):
+        hand = state.hands[state.seat]
+        possible = state.knowledge.possible(state.seat, hand)
+        self.test.assertEqual(state.knowledge.counts,
+                              [mask.bit_count() for mask in state.hands])
+        for mask, cards in zip(state.hands, possible):
+            self.test.assertEqual(mask & ~cards, 0)
+        hands = sample_deal(self.rng, possible, state.knowledge.counts)
+        self.test.assertEqual(hands[state.seat], hand)
+        self.test.assertEqual(hands[0] | hands[1] | hands[2] | hands[3],
+                              ALL_CARDS_MASK & ~state.played)
+        for sampled, cards, mask in zip(hands, possible, state.hands):
+            self.test.assertEqual(sampled & ~cards, 0)
+            self.test.assertEqual(sampled.bit_count(), mask.bit_count())
+        return super().choose_card(state, legal)
+
+
+class KnowledgeTest(TestCase):
+    def test_voids(self):
+        # Spades are trump, seat 1 doesn't follow hearts nor trumps
+        knowledge = Knowledge(2, 0, index('7♠'))
+        knowledge.observe(0, index('A♥'))
+        knowledge.observe(1, index('7♣'))
+        self.assertEqual(knowledge.excluded[1], SUIT_MASKS[1] | SUIT_MASKS[2])
+        # Seat 2 trumps, without showing anything
+        knowledge.observe(2, index('8♠'))
+        self.assertEqual(knowledge.excluded[2], SUIT_MASKS[1])
+        # Seat 3 doesn't overtrump the trump of the opponents
+        knowledge.observe(3, index('7♠'))
+        self.assertEqual(knowledge.excluded[3],
+                         SUIT_MASKS[1] | SUIT_MASKS[2] & ~0b11 << 16)
+
+    def test_no_higher_trump(self):
+        knowledge = Knowledge(2, 0, index('7♠'))
+        knowledge.observe(0, index('9♠'))
+        knowledge.observe(1, index('A♠'))
+        # Only the jack beats the 9, and seat 1 doesn't have it
+        self.assertEqual(knowledge.excluded[1], 1 << index('J♠'))
+        # The partner of seat 0 doesn't have to overtrump it
+        knowledge.observe(2, index('7♠'))
+        self.assertEqual(knowledge.excluded[2], 0)
+
+    def test_turned_card(self):
+        turned = index('J♥')
+        knowledge = Knowledge(1, 3, turned)
+        possible = knowledge.possible(0, 0xff)
+        self.assertEqual(possible[0], 0xff)
+        self.assertTrue(possible[3] >> turned & 1)
+        self.assertFalse((possible[1] | possible[2]) >> turned & 1)
+        knowledge.observe(3, turned)
+        self.assertFalse(any(mask >> turned & 1
+                             for mask in knowledge.possible(0, 0xff)))
+
+    def test_forced_cards(self):
+        rng = random.Random(0)
+        possible = [0x0f, 0xf0 | 1 << 8, 0xf0 | 1 << 8, 1 << 8]
+        for _ in range(20):
+            hands = sample_deal(rng, possible, (4, 2, 2, 1))
+            self.assertEqual(hands[0], 0x0f)
+            self.assertEqual(hands[3], 1 << 8)
+            self.assertEqual(hands[1] | hands[2], 0xf0)
+
+    def test_deals(self):
+        rng = random.Random(0)
+        for dealer in range(20):
+            checkers = [Checker(self, rng) for _ in range(4)]
+            result = play_deal(checkers, dealer & 3, rng=rng)
+            self.assertEqual(len(result.moves), len(CARDS))
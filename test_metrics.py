@@ -0,0 +1,85 @@
+import asyncio
+import re
+from unittest import TestCase
+
+import metrics
+from belote import Belote, Player
+from bots import MonteCarlo
+from server import BotPlayer
+from test_belote import FakeTransport
+
+
+class HistogramTest(TestCase):
+    def test_render(self):
+        histogram = metrics.Histogram('h', 'A histogram', [1, 10])
+        for value in (0.5, 1, 5, 50):
+            histogram.observe(value)
+        self.assertEqual(histogram.count, 4)
+        self.assertEqual(histogram.render()[2:], [
+            'h_bucket{le="1"} 2',
+            'h_bucket{le="10"} 3',
+            'h_bucket{le="+Inf"} 4',
+            'h_sum 56.5',
+            'h_count 4',
+        ])
+
+
+class AnsweringPlayer(Player):
+    """Takes the card and plays the first legal card, through its queue."""
+
+    def __init__(self) -> None:
+        super().__init__(FakeTransport())
+
+    def send_message(self, msg: str):
+        if msg.startswith('Do you want'):
+            self.queue.put_nowait('yes')
+        elif msg.startswith('What are you playing?'):
+            self.queue.put_nowait(re.search(r'<Card: ([^>]+)>', msg)[1])
+
+
+class ServerMetricsTest(TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+
+    def test_game_is_measured(self):
+        count = metrics.BIDDING_SECONDS.count
+        game = Belote()
+        monte_carlo = MonteCarlo(nb_samples=2, seed=0)
+        for _ in range(4):
+            game.add_player(BotPlayer(game, monte_carlo))
+        self.loop.run_until_complete(game.start_game_if_ready(self.loop))
+        self.assertEqual(metrics.BIDDING_SECONDS.count, count + 1)
+
+    def test_think_time_of_the_cards(self):
+        count = metrics.THINK_SECONDS.count
+        game = Belote()
+        for _ in range(4):
+            game.add_player(AnsweringPlayer())
+        self.loop.run_until_complete(game.start_game_if_ready(self.loop))
+        # The answer to the bidding is not counted
+        self.assertEqual(metrics.THINK_SECONDS.count, count + 32)
+
+    def test_lag_monitor(self):
+        histogram = metrics.Histogram('lag', 'Lag')
+        monitor = metrics.LagMonitor(self.loop, histogram, interval=0.001)
+        monitor.start()
+        self.loop.run_until_complete(asyncio.sleep(0.05))
+        monitor.stop()
+        self.assertGreater(histogram.count, 0)
+
+    def test_endpoint(self):
+        async def get():
+            server = await metrics.serve_metrics(port=0)
+            port = server.sockets[0].getsockname()[1]
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(b'GET / HTTP/1.0\r\n\r\n')
+            response = await reader.read()
+            writer.close()
+            server.close()
+            await server.wait_closed()
+            return response
+
+        response = self.loop.run_until_complete(get())
+        self.assertTrue(response.startswith(b'HTTP/1.0 200 OK\r\n'))
+        self.assertIn(b'\nbelote_messages_total ', response)
@@ -0,0 +1,64 @@
+import concurrent.futures
+import random
+from unittest import TestCase
+
+from perft import (
+    Position,
+    divide,
+    fuzz,
+    mask_moves,
+    perft,
+    player_moves,
+    random_position,
+    reference_moves,
+)
+from rules import SUIT_MASKS
+
+
+class PerftTest(TestCase):
+    def test_following_suit(self):
+        # 2 spades each, hearts are trump: 2 choices per card of the first
+        # trick, and the last one is forced
+        hands = tuple(SUIT_MASKS[2] & 0b11 << 16 + 2 * seat
+                      for seat in range(4))
+        position = Position(hands, 1, 0)
+        self.assertEqual(perft(position), 16)
+        self.assertEqual(perft(position, 2), 4)
+        self.assertEqual(perft(position, 20), 16)
+
+    def test_depths(self):
+        position = random_position(random.Random(0))
+        self.assertEqual(perft(position, 0), 1)
+        self.assertEqual(perft(position, 1), 8)
+        counts = divide(position, 3)
+        self.assertEqual(len(counts), 8)
+        self.assertEqual(sum(counts.values()), perft(position, 3))
+
+    def test_end_of_deal(self):
+        position = random_position(random.Random(1), 26)
+        self.assertEqual(perft(position), perft(position, 6))
+        self.assertEqual(perft(random_position(random.Random(1), 32)), 1)
+
+    def test_pool(self):
+        position = random_position(random.Random(2), 3)
+        with concurrent.futures.ProcessPoolExecutor(2) as pool:
+            self.assertEqual(divide(position, 4, pool), divide(position, 4))
+
+    def test_reference(self):
+        # Spades are trump, the 10 of spades of the opponent must be beaten
+        # if possible, but not the Jack of the partner
+        hand = 1 << 16 | 1 << 17 | 1 << 23
+        self.assertEqual(reference_moves(hand, (19,), 2), 1 << 23)
+        self.assertEqual(reference_moves(hand, (20, 0), 2), hand)
+        # Hearts are led and the opponent trumped: overtrump
+        self.assertEqual(reference_moves(hand, (8, 19), 2), 1 << 23)
+        self.assertEqual(reference_moves(hand, (8,), 2), hand)
+
+    def test_fuzz(self):
+        generators = {'mask': mask_moves, 'player': player_moves}
+        self.assertEqual(list(fuzz(1000, generators=generators)), [])
+        # belote_old.py doesn't make the players overtrump
+        mismatches = list(fuzz(1000))
+        self.assertTrue(mismatches)
+        self.assertEqual({mismatch.generator for mismatch in mismatches},
+                         {'old'})
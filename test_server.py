@@ -0,0 +1,301 @@
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+from unittest import TestCase
+
+from checkpoints import Checkpoints, read_checkpoints
+from bots import MonteCarlo
+from deadlines import TimerWheel
+from equity import EquityTable, build_table
+from server import GREETING, BeloteProtocol, Lobby, bot_factory, encode_frame
+from test_belote import FakeTransport, dealt_game
+
+
+class LobbyTest(TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.lobby = Lobby(self.loop)
+        self.protocols = []
+
+    def tearDown(self):
+        for protocol in self.protocols:
+            protocol.transport.close()
+        for task in self.lobby.tables:
+            task.cancel()
+        while self.lobby.tables:
+            self.loop.run_until_complete(asyncio.sleep(0))
+        self.loop.close()
+
+    def connect(self, join: bool = True):
+        protocol = BeloteProtocol(self.lobby)
+        protocol.connection_made(FakeTransport())
+        self.protocols.append(protocol)
+        if join:
+            protocol.data_received(b'play\n')
+        return protocol
+
+    def test_tables_of_4_players(self):
+        protocols = [self.connect() for _ in range(9)]
+        self.assertEqual(len(self.lobby.tables), 2)
+        self.assertEqual(list(self.lobby.waiting), protocols[8:])
+
+        protocols[8].connection_lost(None)
+        self.assertEqual(len(self.lobby.waiting), 0)
+
+    def test_players_are_released(self):
+        protocols = [self.connect() for _ in range(4)]
+        protocols[0].transport.close()
+        task, = self.lobby.tables
+        task.cancel()
+        self.loop.run_until_complete(asyncio.sleep(0))
+
+        self.assertEqual(self.lobby.tables, {})
+        self.assertEqual(self.lobby.nb_finished_tables, 1)
+        self.assertEqual(list(self.lobby.waiting), protocols[1:])
+
+    def test_players_who_dont_answer(self):
+        self.lobby = Lobby(self.loop, turn_timeout=0.001)
+        self.lobby.wheel = TimerWheel(self.loop, resolution=0.001)
+        [self.connect() for _ in range(4)]
+        while not self.lobby.nb_finished_tables:
+            self.loop.run_until_complete(asyncio.sleep(0.01))
+        self.lobby.wheel.close()
+
+    def test_disconnected_players(self):
+        protocols = [self.connect() for _ in range(4)]
+        task, = self.lobby.tables
+        for protocol in protocols:
+            protocol.transport.close()
+            protocol.connection_lost(None)
+        self.loop.run_until_complete(task)
+        self.assertEqual(self.lobby.waiting, {})
+
+    def test_reconnection(self):
+        self.lobby = Lobby(self.loop, turn_timeout=30)
+        protocols = [self.connect() for _ in range(4)]
+        task, = self.lobby.tables
+        self.loop.run_until_complete(asyncio.sleep(0))
+        # The player who is asked to take the card leaves
+        asked, = [protocol for protocol in protocols
+                  if protocol.player.question is not None]
+        player = asked.player
+        asked.transport.close()
+        asked.connection_lost(None)
+
+        protocol = self.connect(join=False)
+        protocol.data_received(b'resume nope\nplay\n')
+        self.assertEqual(protocol.transport.written,
+                         [GREETING, b'Unknown token\n'])
+        self.assertTrue(protocol.transport.is_closing())
+        self.assertEqual(self.lobby.waiting, {})
+        protocol = self.connect(join=False)
+        protocol.data_received(f'resume {player.token}\n'.encode())
+        self.assertIs(protocol.player, player)
+        self.assertFalse(player.disconnected)
+        self.assertEqual(self.lobby.tables[task], [
+            other for other in protocols if other is not asked] + [protocol])
+        self.assertIs(self.lobby.protocol_tables[protocol], task)
+        self.assertNotIn(asked, self.lobby.protocol_tables)
+        self.assertEqual(self.lobby.waiting, {})
+        self.loop.run_until_complete(asyncio.sleep(0))
+        written = b''.join(protocol.transport.written)
+        self.assertIn(f'You are the Player {player.number}\n'.encode(),
+                      written)
+        self.assertTrue(written.endswith(player.question.encode() + b'\n'))
+        self.lobby.wheel.close()
+
+    def test_reconnection_with_3_waiting_players(self):
+        self.lobby = Lobby(self.loop, turn_timeout=30)
+        protocols = [self.connect() for _ in range(4)]
+        task, = self.lobby.tables
+        player = protocols[0].player
+        protocols[0].transport.close()
+        protocols[0].connection_lost(None)
+        waiting = [self.connect() for _ in range(3)]
+
+        protocol = self.connect(join=False)
+        self.assertEqual(list(self.lobby.waiting), waiting)
+        protocol.data_received(f'resume {player.token}\n'.encode())
+        self.assertIs(protocol.player, player)
+        # Neither the resumed table nor the waiting players were disturbed
+        self.assertEqual(list(self.lobby.tables), [task])
+        self.assertEqual(list(self.lobby.waiting), waiting)
+        self.loop.run_until_complete(asyncio.sleep(0))
+        self.assertFalse(task.done())
+        self.lobby.wheel.close()
+
+    def test_reconnection_to_another_worker(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.lobby = Lobby(self.loop, turn_timeout=30,
+                           handoff_directory=directory.name, worker=0)
+        other = Lobby(self.loop, handoff_directory=directory.name, worker=1)
+        self.addCleanup(other.close)
+        protocols = [self.connect() for _ in range(4)]
+        task, = self.lobby.tables
+        self.loop.run_until_complete(asyncio.sleep(0))
+        player = protocols[0].player
+        self.assertTrue(player.token.startswith('00'))
+        protocols[0].transport.close()
+        protocols[0].connection_lost(None)
+
+        client, server = socket.socketpair()
+        self.addCleanup(client.close)
+        transport, protocol = self.loop.run_until_complete(
+            self.loop.connect_accepted_socket(
+                lambda: BeloteProtocol(other), server))
+        client.sendall(f'resume {player.token}\nno\n'.encode())
+        while player.disconnected:
+            self.loop.run_until_complete(asyncio.sleep(0.01))
+        self.assertTrue(transport.is_closing())
+        self.assertIsNot(player.transport, protocol)
+        self.assertIn(player.transport, self.lobby.tables[task])
+        self.loop.run_until_complete(asyncio.sleep(0.01))
+        client.setblocking(False)
+        written = client.recv(4096)
+        self.assertTrue(written.startswith(GREETING))
+        self.assertIn(f'You are the Player {player.number}\n'.encode(),
+                      written)
+        player.transport.transport.close()
+        self.lobby.close()
+
+    def test_forfeit_cancels_the_deadline(self):
+        self.lobby = Lobby(self.loop, turn_timeout=30)
+        protocols = [self.connect() for _ in range(4)]
+        task, = self.lobby.tables
+        self.loop.run_until_complete(asyncio.sleep(0))
+        self.assertEqual(len(self.lobby.wheel), 1)
+        self.lobby.drop(protocols[0])
+        self.assertNotIn(protocols[0], self.lobby.protocol_tables)
+        self.loop.run_until_complete(asyncio.sleep(0))
+        self.assertTrue(task.cancelled())
+        self.assertEqual(len(self.lobby.wheel), 0)
+        self.lobby.wheel.close()
+
+    def test_first_line(self):
+        protocol = self.connect(join=False)
+        self.assertEqual(protocol.transport.written,
+                         [b"Send 'play' to join or 'resume <token>'\n"])
+        self.assertEqual(self.lobby.waiting, {})
+        protocol.data_received(b'binary\n')
+        self.assertEqual(self.lobby.waiting, {})
+        protocol.data_received(encode_frame('play') + encode_frame('no'))
+        self.assertEqual(list(self.lobby.waiting), [protocol])
+        self.assertEqual(self.messages(protocol), ['no'])
+
+    def test_restore_tables(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, 'tables.ckpt')
+        checkpoints = Checkpoints(self.loop, path)
+        self.lobby.checkpoints = checkpoints
+        game = dealt_game()
+        game.leader = game.players[2]
+        for seat, player in enumerate(game.players):
+            player.token = f'token-{seat}'
+        self.lobby.checkpoint(game)
+        checkpoints.close()
+
+        self.lobby = Lobby(self.loop, turn_timeout=30)
+        self.lobby.restore_tables(read_checkpoints(path))
+        task, = self.lobby.tables
+        self.assertEqual(self.lobby.games[task].snapshot(), game.snapshot())
+        protocol = self.connect(join=False)
+        protocol.data_received(b'resume token-2\n')
+        self.assertEqual(self.lobby.tables[task], [protocol])
+        self.loop.run_until_complete(asyncio.sleep(0))
+        written = b''.join(protocol.transport.written)
+        self.assertIn(b'What are you playing?', written)
+        self.lobby.wheel.close()
+
+    def test_bots_with_equity(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, 'equity.table')
+        build_table(path, nb_samples=1, entries=[])
+        equity = EquityTable(path)
+        self.addCleanup(equity.close)
+        self.lobby = Lobby(self.loop, bot_factory(MonteCarlo(nb_samples=1),
+                                                  equity), bot_delay=0)
+        protocol = self.connect()
+        self.loop.run_until_complete(asyncio.sleep(0.01))
+        task, = self.lobby.tables
+        players = self.lobby.games[task].players
+        self.assertIs(players[0], protocol.player)
+        self.assertTrue(all(bot.equity is equity for bot in players[1:]))
+
+    def test_equity_option(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, 'equity.table')
+        with open(path, 'wb') as file:
+            file.write(b'BELOTE\x00\x01')
+        server = os.path.join(os.path.dirname(__file__), 'server.py')
+        process = subprocess.run(
+            [sys.executable, server, '--port', '0', '--bot-delay', '1',
+             '--equity', path], capture_output=True, text=True, timeout=60)
+        self.assertNotEqual(process.returncode, 0)
+        self.assertIn(f'{path} is not an equity table', process.stderr)
+
+    def messages(self, protocol):
+        queue = protocol.player.queue
+        return [queue.get_nowait() for _ in range(queue.qsize())]
+
+    def test_line_framing(self):
+        protocol = self.connect()
+        protocol.data_received(b'ye')
+        self.assertEqual(self.messages(protocol), [])
+        protocol.data_received(b's\r\nno\n\xe2\x99')
+        self.assertEqual(self.messages(protocol), ['yes', 'no'])
+        protocol.data_received(b'\xa0\n')
+        self.assertEqual(self.messages(protocol), ['♠'])
+        self.assertEqual(protocol.buffer, b'')
+
+    def test_long_lines_are_dropped(self):
+        protocol = self.connect()
+        protocol.max_line = 8
+        protocol.data_received(b'12345678\n1234')
+        protocol.data_received(b'56789')
+        self.assertTrue(protocol.transport.is_closing())
+        self.assertEqual(self.lobby.nb_dropped, 1)
+
+    def test_binary_framing(self):
+        protocol = self.connect()
+        frames = encode_frame('A♠') + encode_frame('yes') + encode_frame('x')
+        self.assertEqual(len(frames), 6)
+        protocol.data_received(b'no\nbinary\n' + frames[:3])
+        self.assertEqual(self.messages(protocol), ['no', 'A♠'])
+        # Once seated, a resume is an answer like any other
+        protocol.data_received(frames[3:] + encode_frame('resume nope')
+                               + encode_frame('no'))
+        self.assertEqual(self.messages(protocol),
+                         ['yes', 'x', 'resume nope', 'no'])
+        self.assertEqual(protocol.transport.written, [GREETING])
+        self.assertFalse(protocol.transport.is_closing())
+
+    def test_backlog_while_paused(self):
+        protocol = self.connect()
+        protocol.pause_writing()
+        protocol.write(b'a\n')
+        protocol.write(b'b\n')
+        self.assertEqual(protocol.buffered, 4)
+        self.assertEqual(protocol.transport.written, [GREETING])
+        protocol.resume_writing()
+        self.assertEqual(protocol.transport.written, [GREETING, b'a\nb\n'])
+        self.assertEqual(self.lobby.buffered(), {protocol: 0})
+
+    def test_slow_client_is_dropped(self):
+        protocols = [self.connect() for _ in range(4)]
+        task, = self.lobby.tables
+        protocols[0].max_backlog = 10
+        protocols[0].pause_writing()
+        protocols[0].write(b'x' * 11)
+        self.assertTrue(protocols[0].transport.is_closing())
+        self.assertEqual(self.lobby.nb_dropped, 1)
+
+        self.loop.run_until_complete(asyncio.sleep(0))
+        self.assertTrue(task.cancelled())
+        self.assertEqual(list(self.lobby.waiting), protocols[1:])
@@ -0,0 +1,92 @@
+import random
+from unittest import TestCase
+
+from rules import CARD_VALUES, TRICK_STRENGTHS, legal_moves_mask, mask_to_indexes
+from solver import Solver, solve
+
+
+def minimax(hands, trump, leader):
+    """Points of the team 0, without any pruning."""
+    hands = list(hands)
+
+    def play(seat, position, led_suit, winner, winning_card, points):
+        if not position and not any(hands):
+            return 0
+        if position:
+            legal = legal_moves_mask(hands[seat], led_suit, trump,
+                                     winning_card, (winner ^ seat) & 1 == 0)
+        else:
+            legal = hands[seat]
+        values = []
+        for card in mask_to_indexes(legal):
+            suit = led_suit if position else card >> 3
+            strengths = TRICK_STRENGTHS[trump][suit]
+            if not position or strengths[card] > strengths[winning_card]:
+                new_winner, new_winning_card = seat, card
+            else:
+                new_winner, new_winning_card = winner, winning_card
+            new_points = points + CARD_VALUES[trump][card]
+            hands[seat] ^= 1 << card
+            if position == 3:
+                if not any(hands):
+                    new_points += 10
+                value = play(new_winner, 0, 0, 0, 0, 0)
+                if not new_winner & 1:
+                    value += new_points
+            else:
+                value = play((seat + 1) & 3, position + 1, suit, new_winner,
+                             new_winning_card, new_points)
+            hands[seat] ^= 1 << card
+            values.append(value)
+        return max(values) if seat & 1 == 0 else min(values)
+
+    return play(leader, 0, 0, 0, 0, 0)
+
+
+class SolverTest(TestCase):
+    def test_last_trick(self):
+        # Hearts are trump, the Jack wins
+        hands = [1 << 0, 1 << 12, 1 << 1, 1 << 2]
+        self.assertEqual(solve(hands, trump=1, leader=0), (0, 20 + 10))
+
+    def test_matches_minimax(self):
+        rng = random.Random(0)
+        for nb_cards in (2, 3, 4):
+            for _ in range(10):
+                cards = rng.sample(range(32), 4 * nb_cards)
+                hands = [sum(1 << card for card in cards[i::4])
+                         for i in range(4)]
+                trump = rng.randrange(4)
+                leader = rng.randrange(4)
+                points, other_points = solve(hands, trump, leader)
+                self.assertEqual(points, minimax(hands, trump, leader))
+                remaining = sum(CARD_VALUES[trump][card] for card in cards)
+                self.assertEqual(points + other_points, remaining + 10)
+
+    def test_full_deal(self):
+        cards = random.Random(1).sample(range(32), 32)
+        hands = [sum(1 << card for card in cards[i::4]) for i in range(4)]
+        points, other_points = solve(hands, trump=0, leader=0)
+        self.assertEqual(points + other_points, 162)
+
+    def test_full_deals_nodes(self):
+        # The hardest of the first 20 deals, with the nodes they take: unlike
+        # the time, the counts don't depend on the machine
+        for seed, max_nodes in ((4, 140_000), (8, 240_000), (9, 300_000)):
+            rng = random.Random(seed)
+            cards = rng.sample(range(32), 32)
+            hands = [sum(1 << card for card in cards[i::4]) for i in range(4)]
+            solver = Solver(hands, trump=rng.randrange(4))
+            points, other_points = solver.solve(0)
+            self.assertEqual(points + other_points, 162)
+            self.assertLess(solver.nodes, max_nodes)
+
+    def test_lead_values(self):
+        rng = random.Random(2)
+        cards = rng.sample(range(32), 12)
+        hands = [sum(1 << card for card in cards[i::4]) for i in range(4)]
+        solver = Solver(hands, trump=3)
+        values = solver.lead_values(1)
+        self.assertEqual(set(values), set(mask_to_indexes(hands[1])))
+        # The leader is in the team 1, which minimizes
+        self.assertEqual(min(values.values()), solve(hands, 3, 1)[0])
@@ -0,0 +1,37 @@
+import concurrent.futures
+from unittest import TestCase
+
+from tournament import Stats, run, summary
+
+
+class TournamentTest(TestCase):
+    def test_deterministic_chunks(self):
+        names = ('random', 'first')
+        stats = run(names, 30, seed=1, chunk_size=7)
+        self.assertEqual(stats.nb_pairs, 30)
+        with concurrent.futures.ProcessPoolExecutor(2) as pool:
+            self.assertEqual(run(names, 30, seed=1, chunk_size=7, pool=pool),
+                             stats)
+        self.assertNotEqual(run(names, 30, seed=2, chunk_size=7), stats)
+        # first never takes
+        self.assertEqual(stats.takes[1], 0)
+        self.assertGreater(stats.takes[0], 0)
+        self.assertLessEqual(stats.made[0], stats.takes[0])
+        self.assertIn('random - first', summary(names, stats))
+
+    def test_mirrored_deals_cancel_out(self):
+        # The same strategy on both sides of deals where nobody takes
+        stats = run(('first', 'first'), 10)
+        self.assertEqual(stats.margin, 0)
+        self.assertEqual(stats.points, [0, 0])
+
+    def test_margin(self):
+        stats = Stats()
+        stats.add_deal((0, 1), 0, (100, 62))
+        stats.add_deal((1, 0), 0, (90, 72))
+        stats.add_margin(100 - 62 + 72 - 90)
+        self.assertEqual(stats.points, [172, 152])
+        self.assertEqual(stats.takes, [1, 1])
+        self.assertEqual(stats.made, [1, 1])
+        self.assertEqual(stats.wins, [1, 1])
+        self.assertEqual(stats.margin, 20)
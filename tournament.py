@@ -0,0 +1,200 @@
+"""Play two strategies against each other on mirrored deals.
+
+Every deck is played twice from the same dealer, the partnerships swapping
+seats, so both strategies get the same cards. The deals are played by the
+engine, in chunks spread over a process pool; every chunk has its own seed,
+so the results only depend on --seed and --chunk-size:
+
+    python tournament.py random first --deals 100000 --workers 4
+
+A strategy is one of the names of STRATEGIES, or module:name for a function
+returning a Strategy from a random.Random, or a Strategy subclass taking it.
+"""
+import argparse
+import concurrent.futures
+import importlib
+import math
+import os
+import random
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from engine import RandomStrategy, Strategy, play_deal, shuffled_deck, team_of
+
+# Half-width of a 95% confidence interval, in standard errors
+Z_95 = 1.96
+
+
+def monte_carlo_strategy(rng: random.Random) -> Strategy:
+    # bots is only needed for this strategy
+    from bots import MonteCarlo, MonteCarloStrategy
+    return MonteCarloStrategy(MonteCarlo(50, seed=rng.getrandbits(32)))
+
+
+STRATEGIES: Dict[str, Callable[[random.Random], Strategy]] = {
+    'first': lambda rng: Strategy(),
+    'random': RandomStrategy,
+    'montecarlo': monte_carlo_strategy,
+}
+
+
+def load_strategy(name: str) -> Callable[[random.Random], Strategy]:
+    if name in STRATEGIES:
+        return STRATEGIES[name]
+    module, _, attribute = name.partition(':')
+    if not attribute:
+        raise ValueError(f'Unknown strategy {name}')
+    return getattr(importlib.import_module(module), attribute)
+
+
+@dataclass
+class Stats:
+    """Sums over deals, for the strategies A and B.
+
+    A deal is won by the team scoring more than the other, and the contract
+    is made when the taker's team wins. The margin is the difference of
+    points between A and B on both deals of a pair.
+    """
+    nb_pairs: int = 0
+    points: List[int] = field(default_factory=lambda: [0, 0])
+    squared_points: List[int] = field(default_factory=lambda: [0, 0])
+    takes: List[int] = field(default_factory=lambda: [0, 0])
+    made: List[int] = field(default_factory=lambda: [0, 0])
+    wins: List[int] = field(default_factory=lambda: [0, 0])
+    margin: int = 0
+    squared_margin: int = 0
+
+    @property
+    def nb_deals(self) -> int:
+        return 2 * self.nb_pairs
+
+    def add_deal(self, teams: Sequence[int], taker: Optional[int],
+                 scores: Tuple[int, int]) -> None:
+        """teams gives the strategy index of the team of every seat."""
+        for team in (0, 1):
+            strategy = teams[team]
+            self.points[strategy] += scores[team]
+            self.squared_points[strategy] += scores[team] ** 2
+        if taker is None:
+            return
+        taker_team = team_of(taker)
+        self.takes[teams[taker_team]] += 1
+        if scores[taker_team] > scores[1 - taker_team]:
+            self.made[teams[taker_team]] += 1
+        if scores[0] != scores[1]:
+            self.wins[teams[0 if scores[0] > scores[1] else 1]] += 1
+
+    def add_margin(self, margin: int) -> None:
+        self.nb_pairs += 1
+        self.margin += margin
+        self.squared_margin += margin ** 2
+
+    def merge(self, other: 'Stats') -> None:
+        self.nb_pairs += other.nb_pairs
+        for name in ('points', 'squared_points', 'takes', 'made', 'wins'):
+            mine, theirs = getattr(self, name), getattr(other, name)
+            for i in (0, 1):
+                mine[i] += theirs[i]
+        self.margin += other.margin
+        self.squared_margin += other.squared_margin
+
+
+def mean_interval(total: float, squared_total: float,
+                  n: int) -> Tuple[float, float]:
+    """Mean and half-width of its 95% confidence interval."""
+    if n < 2:
+        return (total / n if n else 0.0), math.inf
+    mean = total / n
+    variance = max(0.0, (squared_total - n * mean * mean) / (n - 1))
+    return mean, Z_95 * math.sqrt(variance / n)
+
+
+def rate_interval(count: int, n: int) -> Tuple[float, float]:
+    """Proportion and half-width of its 95% confidence interval."""
+    if not n:
+        return 0.0, math.inf
+    p = count / n
+    return p, Z_95 * math.sqrt(p * (1 - p) / n)
+
+
+def play_chunk(names: Tuple[str, str], nb_pairs: int, seed: int,
+               chunk: int) -> Stats:
+    rng = random.Random(f'{seed}:{chunk}')
+    a, b = (load_strategy(name)(random.Random(rng.getrandbits(64)))
+            for name in names)
+    stats = Stats()
+    for i in range(nb_pairs):
+        deck = shuffled_deck(rng)
+        dealer = i & 3
+        margin = 0
+        # A plays the seats 0 and 2 first, then 1 and 3
+        for strategies, teams in (((a, b, a, b), (0, 1)),
+                                  ((b, a, b, a), (1, 0))):
+            result = play_deal(strategies, dealer, list(deck))
+            stats.add_deal(teams, result.taker, result.scores)
+            a_points = result.scores[teams.index(0)]
+            margin += 2 * a_points - sum(result.scores)
+        stats.add_margin(margin)
+    return stats
+
+
+def run(names: Tuple[str, str], nb_pairs: int, seed: int = 0,
+        chunk_size: int = 1000,
+        pool: Optional[concurrent.futures.Executor] = None) -> Stats:
+    """Play nb_pairs pairs of mirrored deals, on pool if given."""
+    sizes = [min(chunk_size, nb_pairs - start)
+             for start in range(0, nb_pairs, chunk_size)]
+    args = [(names, size, seed, chunk) for chunk, size in enumerate(sizes)]
+    if pool is None:
+        results = [play_chunk(*arg) for arg in args]
+    else:
+        results = pool.map(play_chunk, *zip(*args))
+    stats = Stats()
+    for result in results:
+        stats.merge(result)
+    return stats
+
+
+def summary(names: Sequence[str], stats: Stats) -> str:
+    lines = [f'{stats.nb_pairs} pairs of mirrored deals',
+             f'{"strategy":16} {"points/deal":>16} {"take rate":>16} '
+             f'{"made rate":>16} {"win rate":>16}']
+    nb_wins = sum(stats.wins)
+    for i, name in enumerate(names):
+        points = mean_interval(stats.points[i], stats.squared_points[i],
+                               stats.nb_deals)
+        takes = rate_interval(stats.takes[i], stats.nb_deals)
+        made = rate_interval(stats.made[i], stats.takes[i])
+        wins = rate_interval(stats.wins[i], nb_wins)
+        lines.append(f'{name:16} {points[0]:8.2f} ±{points[1]:6.2f} '
+                     f'{takes[0]:8.3f} ±{takes[1]:6.3f} '
+                     f'{made[0]:8.3f} ±{made[1]:6.3f} '
+                     f'{wins[0]:8.3f} ±{wins[1]:6.3f}')
+    # Per deal, the margin of a pair being on 2 deals
+    margin, interval = mean_interval(stats.margin, stats.squared_margin,
+                                     stats.nb_pairs)
+    lines.append(f'{names[0]} - {names[1]}: {margin / 2:.2f} '
+                 f'±{interval / 2:.2f} points per deal')
+    return '\n'.join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('strategies', nargs=2, metavar='STRATEGY')
+    parser.add_argument('--deals', type=int, default=100000,
+                        help='Pairs of mirrored deals')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--chunk-size', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    names = tuple(args.strategies)
+    for name in names:
+        load_strategy(name)
+    with concurrent.futures.ProcessPoolExecutor(args.workers) as pool:
+        stats = run(names, args.deals, args.seed, args.chunk_size, pool)
+    print(summary(names, stats))
+
+
+if __name__ == '__main__':
+    main()